@@ -3,9 +3,16 @@ PseudoQui Backend Package Initialization
 """
 
 from .node import Node
-from .tree import BinaryTree
+from .tree import BinaryTree, TreeCursor
+from .compact_tree import CompactTree
+from .optimizer import TreeOptimizer
+from .sessions import SessionRegistry
+from .session_store import SessionColumns
 from .game_manager import GameManager, GameSession
 from .api import app
 
 __version__ = "1.0.0"
-__all__ = ['Node', 'BinaryTree', 'GameManager', 'GameSession', 'app']
+__all__ = [
+    'Node', 'BinaryTree', 'TreeCursor', 'CompactTree', 'TreeOptimizer',
+    'GameManager', 'GameSession', 'SessionRegistry', 'SessionColumns', 'app'
+]
@@ -0,0 +1,204 @@
+"""
+In-Memory Animal Database with Write-Behind
+Keeps data/animals.json in memory and writes it back from a background thread
+"""
+
+import atexit
+import json
+import os
+import threading
+from typing import Optional, Dict, Any, List, Tuple
+
+
+DEFAULT_ANIMALS_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'animals.json')
+
+
+class AnimalStore:
+    """
+    The animals database ({'animals': [{'name', 'yes_percentage'}, ...]}),
+    loaded once and indexed by name.
+
+    Updates only change memory and mark the animal dirty. A background thread
+    writes the file every flush_interval seconds, or sooner once
+    flush_threshold animals have pending updates; close() (registered with
+    atexit when the thread starts) writes whatever is left. Subclasses store
+    elsewhere by overriding _load, _prepare and _write.
+    """
+
+    def __init__(self, path: str = DEFAULT_ANIMALS_PATH, flush_interval: float = 5.0,
+                 flush_threshold: int = 50):
+        """
+        Load the database
+
+        Args:
+            path: animals.json file
+            flush_interval: Seconds between background writes while dirty
+            flush_threshold: Animals with pending updates that trigger a write right away
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self._lock = threading.Lock()  # Guards the data and the dirty set
+        self._write_lock = threading.Lock()  # One writer at a time
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._dirty: set = set()  # Names with pending updates
+        self._exists = False
+        self._data = self._load()
+        self._animals: List[Dict[str, Any]] = self._data.setdefault('animals', [])
+        self._index: Dict[str, Dict[str, Any]] = {}
+        for animal_data in self._animals:
+            self._index.setdefault(animal_data.get('name'), animal_data)
+
+    def _load(self) -> Dict[str, Any]:
+        """Read the database from storage; sets _exists if there is one"""
+        self._exists = os.path.exists(self.path)
+        if self._exists:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                print(f"Error loading animal database: {e}")
+        return {'animals': []}
+
+    def _prepare(self, names: set) -> Any:
+        """Capture what flush has to write for the given dirty names (caller holds the lock)"""
+        return json.dumps(self._data, ensure_ascii=False, indent=2)
+
+    def _write(self, payload: Any):
+        """Write what _prepare captured; may raise IOError"""
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        os.replace(temp_path, self.path)
+
+    @staticmethod
+    def _path_percentage(game_history: List[Tuple[str, bool]]) -> float:
+        """Share of "Yes" answers in a game, in percent"""
+        yes_count = sum(1 for _, answer in game_history if answer)
+        return (yes_count / len(game_history)) * 100
+
+    def _mark_dirty(self, name: str):
+        """Note a pending update and wake the flusher if enough have piled up"""
+        self._dirty.add(name)
+        if len(self._dirty) >= self.flush_threshold:
+            self._wake.set()
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """Copy of an animal's entry, or None"""
+        with self._lock:
+            animal_data = self._index.get(name)
+            return dict(animal_data) if animal_data is not None else None
+
+    def record_success(self, animal: str, was_correct: bool, game_history: List[Tuple[str, bool]]):
+        """
+        Move an animal's yes percentage toward the path of a game
+
+        Args:
+            animal: The animal that was guessed or corrected
+            was_correct: Whether the guess was correct
+            game_history: (question, answer) pairs of the game
+        """
+        if not self._exists or not game_history:
+            return
+        path_percentage = self._path_percentage(game_history)
+        with self._lock:
+            animal_data = self._index.get(animal)
+            if animal_data is not None:
+                if not was_correct:
+                    return
+                # Move 10% toward the actual percentage
+                current_pct = animal_data.get('yes_percentage', 50)
+                animal_data['yes_percentage'] = round(current_pct * 0.9 + path_percentage * 0.1, 1)
+            elif was_correct:
+                self._add(animal, path_percentage)
+            else:
+                return
+            self._mark_dirty(animal)
+
+    def add_learned(self, animal: str, game_history: List[Tuple[str, bool]]):
+        """
+        Add a newly learned animal with the yes percentage of its game
+
+        Args:
+            animal: The new animal
+            game_history: (question, answer) pairs of the game that taught it
+        """
+        if not game_history:
+            return
+        path_percentage = self._path_percentage(game_history)
+        with self._lock:
+            if animal in self._index:
+                return
+            self._add(animal, path_percentage)
+            self._exists = True
+            self._mark_dirty(animal)
+
+    def _add(self, animal: str, path_percentage: float):
+        """Append a new entry (caller holds the lock)"""
+        animal_data = {'name': animal, 'yes_percentage': round(path_percentage, 1)}
+        self._animals.append(animal_data)
+        self._index[animal] = animal_data
+
+    def flush(self) -> bool:
+        """
+        Write the database if it has pending updates
+
+        Returns:
+            True if the file is up to date
+        """
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return True
+                pending = self._dirty
+                self._dirty = set()
+                payload = self._prepare(pending)
+            try:
+                self._write(payload)
+                return True
+            except (IOError, OSError) as e:
+                print(f"Error updating animal database: {e}")
+                with self._lock:
+                    self._dirty |= pending
+                return False
+
+    def start(self):
+        """Start the background flusher (once) and flush at interpreter exit"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='animal-store-flusher', daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    def _run(self):
+        """Flusher loop: write on the interval, or when woken by the threshold"""
+        while not self._stopping:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        """Stop the flusher and write pending updates"""
+        self._stopping = True
+        self._wake.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=self.flush_interval + 1)
+        self.flush()
+
+
+_default_store: Optional[AnimalStore] = None
+_default_lock = threading.Lock()
+
+
+def get_default_store() -> AnimalStore:
+    """The store for data/animals.json, loaded and started on first use"""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = AnimalStore()
+            _default_store.start()
+        return _default_store
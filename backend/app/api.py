@@ -3,22 +3,76 @@ Flask REST API for PseudoQui Backend
 Provides endpoints for the frontend to interact with the game
 """
 
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, jsonify, request, send_from_directory
 from flask_cors import CORS
 import os
 import json
+from itertools import islice
 from .game_manager import GameManager
+from .response_cache import ResponseCache
+from . import deep_json
 
 # Initialize Flask app
 app = Flask(__name__, static_folder='../../frontend/build', static_url_path='')
 CORS(app)
 
 # Initialize game manager
+# (PSEUDOQUI_DATABASE names an SQLite database to use instead of the data files)
 game_manager = GameManager(
-    data_file=os.path.join('data', 'tree_data.json'),
-    history_file=os.path.join('data', 'game_history.json')
+    data_file=os.path.join('data', 'tree_data.snapshot'),
+    history_file=os.path.join('data', 'game_history.jsonl'),
+    database_file=os.environ.get('PSEUDOQUI_DATABASE') or None
 )
 
+# Encoded bodies of read endpoints, keyed by the data versions they were built from
+response_cache = ResponseCache()
+
+
+def get_session_id(data=None):
+    """Read the game session ID from the JSON body, query string or X-Session-ID header"""
+    return ((data or {}).get('session_id') or request.args.get('session_id')
+            or request.headers.get('X-Session-ID'))
+
+
+def missing_session():
+    """Response for game requests that do not name their session"""
+    return jsonify({
+        'success': False,
+        'message': 'session_id is required (returned by /api/game/start)'
+    }), 400
+
+
+def expired_session(error):
+    """Response for game requests whose session is unknown or has expired"""
+    return jsonify({
+        'success': False,
+        'expired': True,
+        'message': error.args[0]
+    }), 404
+
+
+def cached_response(key, build, mimetype='application/json'):
+    """
+    Response for a read endpoint, with an ETag derived from its cache key
+    
+    Args:
+        key: Endpoint, arguments and the data versions the body depends on
+             (read before building, see ResponseCache)
+        build: Returns the encoded body on a cache miss
+        mimetype: Content type of the body
+    
+    Returns:
+        304 if the request's If-None-Match names the key's ETag, else the body
+    """
+    etag = ResponseCache.etag(key)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(response_cache.get(key, build), status=200, mimetype=mimetype)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'  # Revalidate every time; unchanged data costs a 304
+    return response
+
 
 @app.route('/', methods=['GET'])
 def serve_frontend():
@@ -31,17 +85,29 @@ def start_game():
     """
     Start a new game session
     
+    Request body (optional):
+        {
+            "session_id": "id"   // restart this session instead of opening a new one
+        }
+    
     Returns:
-        JSON with initial game state and first question
+        JSON with the session ID, initial game state and first question
     """
     try:
-        game_manager.start_new_game()
+        session_id = get_session_id(request.get_json(silent=True))
+        if session_id is None or session_id not in game_manager.sessions:
+            session_id = game_manager.start_new_game(new_session=True)
+        else:
+            game_manager.start_new_game(session_id)
+        record = game_manager.get_session(session_id)
         
         return jsonify({
             'success': True,
             'message': 'New game started',
-            'question': game_manager.tree.get_current_question(),
-            'questions_asked': game_manager.current_session.questions_asked
+            'session_id': session_id,
+            'question': game_manager.tree.get_current_question(record.cursor),
+            'questions_asked': record.game.questions_asked,
+            'bundle_version': game_manager.get_tree_bundle()['version']
         }), 200
     except Exception as e:
         return jsonify({
@@ -57,6 +123,7 @@ def process_answer():
     
     Request body:
         {
+            "session_id": "id from /api/game/start",
             "answer": "yes" or "no"
         }
     
@@ -66,6 +133,9 @@ def process_answer():
     try:
         data = request.get_json()
         answer = data.get('answer', '').strip().lower()
+        session_id = get_session_id(data)
+        if session_id is None:
+            return missing_session()
         
         print(f"\n>>> API RECEIVED ANSWER: '{answer}' <<<", flush=True)
         
@@ -75,7 +145,7 @@ def process_answer():
                 'message': 'Invalid answer. Please answer with yes or no.'
             }), 400
         
-        result = game_manager.process_answer(answer)
+        result = game_manager.process_answer(answer, session_id)
         
         response_data = {
             'success': True,
@@ -89,6 +159,8 @@ def process_answer():
             response_data['question'] = result['current_question']
         
         return jsonify(response_data), 200
+    except KeyError as e:
+        return expired_session(e)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -96,6 +168,80 @@ def process_answer():
         }), 500
 
 
+def parse_answers(answers):
+    """
+    Normalize a batch of answers to "yes"/"no"
+    
+    Args:
+        answers: List of answers, or a string with one character per answer
+                 ('y', 'o' or '1' for yes; 'n' or '0' for no)
+    
+    Returns:
+        List of "yes"/"no", or None if any answer is invalid
+    """
+    if isinstance(answers, str):
+        answers = ['yes' if char in 'yo1' else 'no' if char in 'n0' else None
+                   for char in answers.strip().lower()]
+    elif isinstance(answers, list):
+        answers = [answer.strip().lower() if isinstance(answer, str) else None for answer in answers]
+    else:
+        return None
+    if not all(answer in ['yes', 'no', 'oui', 'non', 'y', 'n', 'o'] for answer in answers):
+        return None
+    return answers
+
+
+@app.route('/api/game/answers', methods=['POST'])
+def process_answers():
+    """
+    Process several answers in one request
+    
+    Request body:
+        {
+            "session_id": "id from /api/game/start",
+            "answers": ["yes", "no", ...] or "yny"
+        }
+    
+    Returns:
+        JSON with the next question or the guess, and the full path so far
+    """
+    try:
+        data = request.get_json()
+        session_id = get_session_id(data)
+        if session_id is None:
+            return missing_session()
+        
+        answers = parse_answers(data.get('answers'))
+        if answers is None:
+            return jsonify({
+                'success': False,
+                'message': 'Invalid answers. Send a list of yes/no or a string of y/n (or 1/0).'
+            }), 400
+        
+        result = game_manager.process_answers(answers, session_id)
+        
+        response_data = {
+            'success': True,
+            'questions_asked': result['questions_asked'],
+            'reached_guess': result['reached_leaf'],
+            'path': result['path']
+        }
+        
+        if result['reached_leaf']:
+            response_data['guess'] = result['animal_guessed']
+        else:
+            response_data['question'] = result['current_question']
+        
+        return jsonify(response_data), 200
+    except KeyError as e:
+        return expired_session(e)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error processing answers: {str(e)}'
+        }), 500
+
+
 @app.route('/api/game/guess-result', methods=['POST'])
 def submit_guess_result():
     """
@@ -103,6 +249,7 @@ def submit_guess_result():
     
     Request body:
         {
+            "session_id": "id from /api/game/start",
             "was_correct": true/false,
             "actual_animal": "animal name" (only if was_correct is false)
         }
@@ -114,13 +261,18 @@ def submit_guess_result():
         data = request.get_json()
         was_correct = data.get('was_correct', False)
         actual_animal = data.get('actual_animal', '')
+        session_id = get_session_id(data)
+        if session_id is None:
+            return missing_session()
         
-        game_manager.submit_guess_result(was_correct, actual_animal)
+        game_manager.submit_guess_result(was_correct, actual_animal, session_id)
         
         return jsonify({
             'success': True,
             'message': 'Guess result recorded'
         }), 200
+    except KeyError as e:
+        return expired_session(e)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -135,19 +287,25 @@ def learn_new_animal():
     
     Request body:
         {
+            "session_id": "id from /api/game/start",
             "new_animal": "animal name",
             "question": "discriminating question",
-            "answer_for_new": "yes" or "no"
+            "answer_for_new": "yes" or "no",
+            "allow_duplicate": true/false (optional, default false)
         }
     
     Returns:
-        JSON with status
+        JSON with status (409 if the animal is already known)
     """
     try:
         data = request.get_json()
         new_animal = data.get('new_animal', '').strip()
         question = data.get('question', '').strip()
         answer_for_new = data.get('answer_for_new', '').strip().lower()
+        allow_duplicate = bool(data.get('allow_duplicate', False))
+        session_id = get_session_id(data)
+        if session_id is None:
+            return missing_session()
         
         if not new_animal or not question:
             return jsonify({
@@ -161,10 +319,19 @@ def learn_new_animal():
                 'message': 'Invalid answer. Please answer with yes or no.'
             }), 400
         
-        success = game_manager.teach_new_animal(new_animal, question, answer_for_new)
+        if not allow_duplicate and game_manager.tree.has_animal(new_animal):
+            return jsonify({
+                'success': False,
+                'duplicate': True,
+                'message': f'{new_animal} is already known in another branch of the tree'
+            }), 409
+        
+        success = game_manager.teach_new_animal(new_animal, question, answer_for_new,
+                                                allow_duplicate=allow_duplicate,
+                                                session_id=session_id)
         
         if success:
-            game_manager.end_current_game()
+            game_manager.end_current_game(session_id)
             return jsonify({
                 'success': True,
                 'message': f'Learned new animal: {new_animal}',
@@ -173,8 +340,11 @@ def learn_new_animal():
         else:
             return jsonify({
                 'success': False,
-                'message': 'Error learning new animal'
-            }), 500
+                'message': 'The tree was changed by another game meanwhile (the guess was replaced '
+                           'or the animal was just learned), please play again'
+            }), 409
+    except KeyError as e:
+        return expired_session(e)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -187,20 +357,31 @@ def end_game():
     """
     End the current game session
     
+    Request body:
+        {
+            "session_id": "id from /api/game/start"
+        }
+    
     Returns:
         JSON with status
     """
     try:
-        game_manager.end_current_game()
+        session_id = get_session_id(request.get_json(silent=True))
+        if session_id is None:
+            return missing_session()
+        
+        game = game_manager.end_current_game(session_id)
         
         return jsonify({
             'success': True,
             'message': 'Game ended',
             'session': {
-                'questions_asked': game_manager.current_session.questions_asked,
-                'correct': game_manager.current_session.guessed_correctly
+                'questions_asked': game.questions_asked,
+                'correct': game.guessed_correctly
             }
         }), 200
+    except KeyError as e:
+        return expired_session(e)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -213,15 +394,59 @@ def get_tree_display():
     """
     Get text representation of the tree
     
+    Query parameters (all optional):
+        code, depth: Path code (hexadecimal) and depth of the node to start from
+        max_depth: Levels to show before collapsing subtrees
+        offset, limit: Line window to return
+        stream: 1 to stream plain text lines instead of one JSON string
+    
     Returns:
-        JSON with tree structure as string
+        JSON with tree structure as string, or a chunked text/plain stream
     """
     try:
-        tree_display = game_manager.tree.display_tree()
+        code = int(request.args.get('code', '0'), 16)
+        depth = int(request.args.get('depth', '0'))
+        max_depth = request.args.get('max_depth')
+        max_depth = int(max_depth) if max_depth is not None else None
+        offset = int(request.args.get('offset', '0'))
+        limit = request.args.get('limit')
+        limit = int(limit) if limit is not None else None
+        if min(code, depth, offset, max_depth or 0, limit or 0) < 0:
+            raise ValueError
+    except ValueError:
         return jsonify({
-            'success': True,
-            'tree': tree_display
-        }), 200
+            'success': False,
+            'message': 'code must be hexadecimal and depth, max_depth, offset and limit non-negative integers'
+        }), 400
+    
+    try:
+        tree = game_manager.tree
+        version, root = tree.head()
+        node = tree.resolve_path_code(code, depth, root)
+        if node is None:
+            return jsonify({
+                'success': False,
+                'message': 'Path code does not lead to a node'
+            }), 404
+        
+        lines = islice(tree.iter_display_lines(node, max_depth), offset,
+                       None if limit is None else offset + limit)
+        if request.args.get('stream') == '1':
+            def generate():
+                # Send lines in batches so each chunk is a reasonable write
+                while True:
+                    batch = list(islice(lines, 256))
+                    if not batch:
+                        break
+                    yield "\n".join(batch) + "\n"
+            return Response(generate(), mimetype='text/plain')
+        
+        return cached_response(
+            ('display', tree.epoch, version, code, depth, max_depth, offset, limit),
+            lambda: jsonify({
+                'success': True,
+                'tree': "\n".join(lines)
+            }).get_data())
     except Exception as e:
         return jsonify({
             'success': False,
@@ -234,24 +459,19 @@ def get_tree_path():
     """
     Get the decision path taken in the current game
     
+    Query parameters:
+        session_id: Game to describe (default: the single-player session)
+    
     Returns:
         JSON with path history showing questions and answers
     """
     try:
-        path = []
-        current = game_manager.tree.root
-        
-        # Reconstruct the path from game history
-        for question, answer in game_manager.tree.game_history:
-            path.append({
-                'question': question,
-                'answer': 'Yes' if answer else 'No'
-            })
-            # Navigate to next node
-            if answer:
-                current = current.left_child
-            else:
-                current = current.right_child
+        cursor = game_manager.get_session(get_session_id()).cursor
+        # The current node's path code encodes every answer given so far,
+        # relative to the tree version this game is playing
+        current = cursor.node
+        path = (game_manager.tree.decode_path_code(current.path_code, current.depth, cursor.root)
+                if current else [])
         
         # Add the final guess
         if current:
@@ -264,6 +484,8 @@ def get_tree_path():
             'success': True,
             'path': path
         }), 200
+    except KeyError as e:
+        return expired_session(e)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -277,18 +499,97 @@ def get_tree_data():
     Get full tree data as JSON for visualization
     
     Returns:
-        JSON tree structure
+        JSON tree structure, with each node's stable ID under 'id', and the
+        version and epoch to pass to /api/tree/changes (cached per version,
+        with an ETag)
+    """
+    try:
+        tree = game_manager.tree
+        version, root = tree.head()
+        # deep_json copes with trees nested deeper than jsonify's recursion limit
+        return cached_response(('data', tree.epoch, version), lambda: deep_json.dumps({
+            'success': True,
+            'version': version,
+            'epoch': tree.epoch,
+            'tree': root.to_dict(include_ids=True)
+        }, ensure_ascii=False).encode('utf-8'))
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error retrieving tree: {str(e)}'
+        }), 500
+
+
+@app.route('/api/tree/bundle', methods=['GET'])
+def get_tree_bundle():
+    """
+    Get the tree in a compact format for playing on the client
+    
+    Query parameters:
+        have: Version of a bundle the client already holds
+    
+    Returns:
+        JSON with 'version', 'root', 'strings' and 'nodes' (three integers per
+        node: string index, "Yes" child, "No" child, -1 if absent), or only
+        'version' and 'unchanged' if the client's bundle is current
+    """
+    try:
+        bundle = game_manager.get_tree_bundle()
+        if request.args.get('have') == bundle['version']:
+            return jsonify({
+                'success': True,
+                'version': bundle['version'],
+                'unchanged': True
+            }), 200
+        
+        return Response(json.dumps(dict(bundle, success=True), separators=(',', ':'), ensure_ascii=False),
+                        status=200, mimetype='application/json')
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error retrieving tree bundle: {str(e)}'
+        }), 500
+
+
+@app.route('/api/tree/subtree', methods=['GET'])
+def get_subtree():
+    """
+    Get a node and a few levels below it, for expanding the tree on demand
+    
+    Query parameters:
+        node_id: Stable ID of the node (default: root)
+        depth: Levels of children to include (default: 2)
+    
+    Returns:
+        JSON with the nested nodes; collapsed questions carry node and leaf counts
     """
     try:
-        tree_data = game_manager.tree.to_dict()
+        node_id = request.args.get('node_id')
+        node_id = int(node_id) if node_id is not None else None
+        depth = int(request.args.get('depth', '2'))
+        if depth < 0:
+            raise ValueError
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'node_id must be an integer and depth a non-negative integer'
+        }), 400
+    
+    try:
+        subtree = game_manager.tree.get_subtree(node_id, depth)
+        if subtree is None:
+            return jsonify({
+                'success': False,
+                'message': f'No node with id {node_id}'
+            }), 404
         return jsonify({
             'success': True,
-            'tree': tree_data
+            'node': subtree
         }), 200
     except Exception as e:
         return jsonify({
             'success': False,
-            'message': f'Error retrieving tree: {str(e)}'
+            'message': f'Error retrieving subtree: {str(e)}'
         }), 500
 
 
@@ -297,15 +598,20 @@ def get_statistics():
     """
     Get game and tree statistics
     
+    The body is cached until the tree or the game history changes, or the
+    rolling windows move to their next bucket.
+    
     Returns:
         JSON with comprehensive statistics
     """
     try:
-        stats = game_manager.get_statistics()
-        return jsonify({
+        manager = game_manager
+        tree = manager.tree
+        key = ('stats', tree.epoch, tree.version, manager.history_version, manager.recent_stats.bucket())
+        return cached_response(key, lambda: jsonify({
             'success': True,
-            'statistics': stats
-        }), 200
+            'statistics': manager.get_statistics()
+        }).get_data())
     except Exception as e:
         return jsonify({
             'success': False,
@@ -319,19 +625,298 @@ def get_animals():
     Get list of all known animals
     
     Returns:
-        JSON with list of animals
+        JSON with list of animals (cached per tree version, with an ETag)
+    """
+    try:
+        tree = game_manager.tree
+        
+        def build():
+            animals = game_manager.get_all_animals()
+            return jsonify({
+                'success': True,
+                'animals': animals,
+                'count': len(animals)
+            }).get_data()
+        return cached_response(('animals', tree.epoch, tree.version), build)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error retrieving animals: {str(e)}'
+        }), 500
+
+
+@app.route('/api/animals/<name>', methods=['GET'])
+def get_animal(name):
+    """
+    Check whether an animal is known (case-insensitive)
+    
+    Returns:
+        JSON with the number of leaves holding the animal
     """
     try:
-        animals = game_manager.get_all_animals()
+        leaves = game_manager.tree.find_animal_leaves(name)
         return jsonify({
             'success': True,
-            'animals': animals,
-            'count': len(animals)
+            'animal': leaves[0].data if leaves else name,
+            'known': bool(leaves),
+            'count': len(leaves)
         }), 200
     except Exception as e:
         return jsonify({
             'success': False,
-            'message': f'Error retrieving animals: {str(e)}'
+            'message': f'Error looking up animal: {str(e)}'
+        }), 500
+
+
+@app.route('/api/animals/<name>/path', methods=['GET'])
+def get_animal_path(name):
+    """
+    Explain which answers lead to an animal
+    
+    Returns:
+        JSON with one path (questions, answers and path code) per leaf holding the animal
+    """
+    try:
+        paths = game_manager.tree.get_animal_paths(name)
+        if not paths:
+            return jsonify({
+                'success': False,
+                'message': f'Unknown animal: {name}'
+            }), 404
+        return jsonify({
+            'success': True,
+            'paths': paths
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error getting animal path: {str(e)}'
+        }), 500
+
+
+@app.route('/api/tree/resolve', methods=['GET'])
+def resolve_path_code():
+    """
+    Resolve a path code back to its node
+    
+    Query parameters:
+        code: Hexadecimal answer bitmask (bit i set for "Yes" at depth i)
+        depth: Number of answers in the code
+    
+    Returns:
+        JSON with the node reached and the questions leading to it
+    """
+    try:
+        code = int(request.args.get('code', '0'), 16)
+        depth = int(request.args.get('depth', '0'))
+        if code < 0 or depth < 0:
+            raise ValueError
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'code must be hexadecimal and depth a non-negative integer'
+        }), 400
+    
+    try:
+        node = game_manager.tree.resolve_path_code(code, depth)
+        if node is None:
+            return jsonify({
+                'success': False,
+                'message': 'Path code does not lead to a node'
+            }), 404
+        return jsonify({
+            'success': True,
+            'data': node.data,
+            'is_leaf': node.is_leaf,
+            'path': game_manager.tree.decode_path_code(code, depth)
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error resolving path code: {str(e)}'
+        }), 500
+
+
+@app.route('/api/tree/versions', methods=['GET'])
+def get_tree_versions():
+    """
+    List the addressable tree versions
+    
+    Returns:
+        JSON with the current version and every kept version number
+    """
+    try:
+        tree = game_manager.tree
+        return jsonify({
+            'success': True,
+            'current': tree.version,
+            'epoch': tree.epoch,
+            'versions': tree.list_versions()
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error listing tree versions: {str(e)}'
+        }), 500
+
+
+@app.route('/api/tree/changes', methods=['GET'])
+def get_tree_changes():
+    """
+    Get the changes made to the tree since a version the client holds
+    
+    Query parameters:
+        since: Version of the client's copy (from /api/tree/data, /api/tree/bundle
+               or an earlier call)
+        epoch: Epoch reported with that version
+    
+    Returns:
+        JSON with the current version and one entry per newer version (a learned
+        animal: the leaf at path_code/depth became 'question' with 'yes'/'no'
+        children), or 'resync': true if the client must fetch the whole tree again
+    """
+    try:
+        since = request.args.get('since', type=int)
+        if since is None:
+            return jsonify({
+                'success': False,
+                'message': 'since (a tree version) is required'
+            }), 400
+        
+        tree = game_manager.tree
+        epoch = tree.epoch
+        changes = tree.changes_since(since) if request.args.get('epoch', epoch) == epoch else None
+        if changes is None:
+            return jsonify({
+                'success': True,
+                'resync': True,
+                'version': tree.version,
+                'epoch': epoch
+            }), 200
+        
+        return jsonify({
+            'success': True,
+            'resync': False,
+            'version': since + len(changes),
+            'epoch': epoch,
+            'changes': changes
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error listing tree changes: {str(e)}'
+        }), 500
+
+
+@app.route('/api/tree/diff', methods=['GET'])
+def diff_tree_versions():
+    """
+    Compare two tree versions
+    
+    Query parameters:
+        from: Older version number
+        to: Newer version number (default: current version)
+    
+    Returns:
+        JSON with one entry per changed node position
+    """
+    try:
+        old_version = int(request.args.get('from', ''))
+        new_version = int(request.args.get('to', game_manager.tree.version))
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'from and to must be version numbers'
+        }), 400
+    
+    try:
+        changes = game_manager.tree.diff_versions(old_version, new_version)
+        return jsonify({
+            'success': True,
+            'from': old_version,
+            'to': new_version,
+            'changes': changes
+        }), 200
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 404
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error comparing tree versions: {str(e)}'
+        }), 500
+
+
+@app.route('/api/tree/rollback', methods=['POST'])
+def rollback_tree():
+    """
+    Restore an earlier tree version (recorded as a new version)
+    
+    Expected JSON:
+    {
+        "version": 3
+    }
+    
+    Returns:
+        JSON with the new current version
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        version = int(data.get('version', ''))
+    except (TypeError, ValueError):
+        return jsonify({
+            'success': False,
+            'message': 'version must be a version number'
+        }), 400
+    
+    try:
+        new_version = game_manager.rollback_tree(version)
+        return jsonify({
+            'success': True,
+            'message': f'Tree restored to version {version}',
+            'version': new_version
+        }), 200
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 404
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error rolling back tree: {str(e)}'
+        }), 500
+
+
+@app.route('/api/tree/optimize', methods=['POST'])
+def optimize_tree():
+    """
+    Rebuild the tree to reduce the expected number of questions per game
+    
+    Expected JSON:
+    {
+        "dry_run": true   // default; false swaps in the optimized tree
+    }
+    
+    Returns:
+        JSON with the average depth before and after
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        dry_run = bool(data.get('dry_run', True))
+        report = game_manager.optimize_tree(dry_run=dry_run)
+        
+        return jsonify({
+            'success': True,
+            'message': 'Tree optimized' if report['applied'] else 'Tree left unchanged',
+            'report': report
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error optimizing tree: {str(e)}'
         }), 500
 
 
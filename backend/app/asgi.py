@@ -0,0 +1,228 @@
+"""
+ASGI Entry Point for PseudoQui
+Serves the Flask routes from an asyncio event loop, with blocking work moved to a thread pool
+"""
+
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple, Callable, Iterator, Iterable, FrozenSet
+
+from werkzeug.exceptions import HTTPException
+
+from . import api
+
+
+# Endpoints that only read the published tree version: they take no lock
+# that is held while writing files, so they run directly on the event loop.
+# Routes whose work grows with the tree (the bundle is rebuilt and hashed
+# after every learn) run in the pool instead.
+INLINE_ENDPOINTS = frozenset({
+    'health_check', 'get_tree_path', 'resolve_path_code', 'get_tree_versions',
+    'get_animal', 'get_animal_path', 'get_tree_changes'
+})
+
+
+class RequestTooLarge(Exception):
+    """Request body over ASGIApp.max_body"""
+
+
+class ASGIApp:
+    """
+    ASGI application around a Flask (WSGI) app.
+
+    Connections are owned by the ASGI server, so an idle player costs a
+    socket and no thread. Each request is matched against the Flask URL
+    map: INLINE_ENDPOINTS are answered on the event loop; every other route
+    (anything that may read or write files, or wait for the game writer
+    lock) runs in a bounded thread pool, so the event loop never blocks on
+    the filesystem. Streamed responses are read from the pool in batches of
+    about chunk_size bytes.
+    """
+
+    def __init__(self, wsgi_app=api.app, inline_endpoints: FrozenSet[str] = INLINE_ENDPOINTS,
+                 max_workers: int = 32, max_body: int = 1024 * 1024, chunk_size: int = 64 * 1024,
+                 on_shutdown: Optional[Callable[[], Any]] = None):
+        """
+        Initialize the application
+
+        Args:
+            wsgi_app: Flask application to serve
+            inline_endpoints: Flask endpoint names to run on the event loop
+            max_workers: Threads for blocking requests
+            max_body: Largest accepted request body in bytes (413 beyond)
+            chunk_size: Bytes of a streamed response read per pool call
+            on_shutdown: Called (in the pool) when the server shuts down
+        """
+        self.wsgi_app = wsgi_app
+        self.inline_endpoints = inline_endpoints
+        self.max_workers = max_workers
+        self.max_body = max_body
+        self.chunk_size = chunk_size
+        self.on_shutdown = on_shutdown
+        self.executor: Optional[ThreadPoolExecutor] = None
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable):
+        if scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        elif scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+
+    def _pool(self) -> ThreadPoolExecutor:
+        """The thread pool, created on first use"""
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='asgi-worker')
+        return self.executor
+
+    async def _lifespan(self, receive: Callable, send: Callable):
+        """Start the pool with the server; flush and stop it at shutdown"""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self._pool()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.on_shutdown is not None:
+                    await asyncio.get_running_loop().run_in_executor(self._pool(), self.on_shutdown)
+                self._pool().shutdown(wait=True)
+                self.executor = None
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _read_body(self, receive: Callable) -> Optional[bytes]:
+        """
+        Read the whole request body
+
+        Returns:
+            The body, or None if the client disconnected first
+
+        Raises:
+            RequestTooLarge: If it exceeds max_body
+        """
+        chunks: List[bytes] = []
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > self.max_body:
+                raise RequestTooLarge()
+            chunks.append(chunk)
+            if not message.get('more_body', False):
+                return b''.join(chunks)
+
+    @staticmethod
+    def build_environ(scope: Dict[str, Any], body: bytes) -> Dict[str, Any]:
+        """WSGI environ (PEP 3333) for an ASGI HTTP scope"""
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': str(server[0]),
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': str(client[0]),
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False
+        }
+        for raw_name, raw_value in scope.get('headers', []):
+            name = raw_name.decode('latin-1').upper().replace('-', '_')
+            value = raw_value.decode('latin-1')
+            if name == 'CONTENT_TYPE':
+                environ['CONTENT_TYPE'] = value
+            elif name != 'CONTENT_LENGTH':
+                key = 'HTTP_' + name
+                environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
+    def runs_inline(self, environ: Dict[str, Any]) -> bool:
+        """Whether a request is answered on the event loop (see INLINE_ENDPOINTS)"""
+        try:
+            endpoint, _ = self.wsgi_app.url_map.bind_to_environ(environ).match()
+        except HTTPException:
+            return False  # The 404 handler may serve the frontend from disk
+        return endpoint in self.inline_endpoints
+
+    def _start(self, environ: Dict[str, Any]) -> Tuple[str, List[Tuple[str, str]], Iterable[bytes]]:
+        """Call the WSGI app; returns status, headers and the body iterable"""
+        started: List[Any] = []
+
+        def start_response(status, headers, exc_info=None):
+            started[:] = [status, headers]
+
+        body = self.wsgi_app(environ, start_response)
+        return started[0], started[1], body
+
+    def _next_chunk(self, iterator: Iterator[bytes]) -> Tuple[bytes, bool]:
+        """Read about chunk_size bytes of the body; returns them and whether more follows"""
+        chunks: List[bytes] = []
+        size = 0
+        for chunk in iterator:
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= self.chunk_size:
+                return b''.join(chunks), True
+        return b''.join(chunks), False
+
+    async def _http(self, scope: Dict[str, Any], receive: Callable, send: Callable):
+        """Serve one HTTP request"""
+        try:
+            body = await self._read_body(receive)
+        except RequestTooLarge:
+            await send({'type': 'http.response.start', 'status': 413,
+                        'headers': [(b'content-type', b'text/plain'), (b'connection', b'close')]})
+            await send({'type': 'http.response.body', 'body': b'Request body too large'})
+            return
+        if body is None:
+            return  # Client disconnected
+
+        environ = self.build_environ(scope, body)
+        loop = asyncio.get_running_loop()
+        inline = self.runs_inline(environ)
+
+        async def run(function, *args):
+            if inline:
+                return function(*args)
+            return await loop.run_in_executor(self._pool(), function, *args)
+
+        status, headers, iterable = await run(self._start, environ)
+        try:
+            iterator = iter(iterable)
+            chunk, more = await run(self._next_chunk, iterator)
+            await send({
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                            for name, value in headers]
+            })
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': more})
+            while more:
+                chunk, more = await run(self._next_chunk, iterator)
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': more})
+        finally:
+            close = getattr(iterable, 'close', None)
+            if close is not None:
+                await run(close)
+
+
+def _shutdown():
+    """Write the history sidecar and pending animal updates before the process exits"""
+    api.game_manager.save_history()
+    if api.game_manager.animal_store is not None:
+        api.game_manager.animal_store.flush()
+
+
+# Entry point for ASGI servers, e.g. `uvicorn app.asgi:app`
+app = ASGIApp(on_shutdown=_shutdown)
@@ -0,0 +1,351 @@
+"""
+Compact Array-Backed Decision Tree for PseudoQui
+Stores the decision tree as parallel arrays instead of a graph of Node objects
+"""
+
+import math
+from array import array
+from typing import Optional, Dict, List, Any
+
+from .node import Node
+
+
+NO_NODE = -1
+
+
+class CompactTree:
+    """
+    Struct-of-arrays implementation of the animal decision tree.
+
+    Every node is an integer index into parallel arrays:
+    - left / right: index of the "Yes" / "No" child (NO_NODE if absent)
+    - parent: index of the parent node (NO_NODE for the root)
+    - text: index into the string table
+    - leaf_bits: one bit per node, set for animals (leaves)
+
+    The string table is a single UTF-8 blob with an offsets array, so a node
+    costs a few fixed-width integers plus its encoded text instead of a Python
+    object with a __dict__.
+
+    Children are always stored after their parent, so whole-tree scans are
+    plain forward passes over the arrays. The navigation and learning surface
+    mirrors BinaryTree; the animals database is left to BinaryTree/GameManager.
+    """
+
+    def __init__(self, root: Optional[Node] = None):
+        """
+        Initialize the compact tree
+
+        Args:
+            root: Node graph to import (if None, imports the default tree)
+        """
+        self.left = array('i')
+        self.right = array('i')
+        self.parent = array('i')
+        self.text = array('i')
+        self.leaf_bits = bytearray()
+        self.string_blob = bytearray()
+        self.string_offsets = array('I', [0])
+        self.root = NO_NODE
+
+        if root is None:
+            from .tree import BinaryTree
+            root = BinaryTree._create_default_tree()
+        self._import_nodes(root)
+
+        self.current_node = self.root
+        self.game_history = []  # Track questions asked in current game
+
+    def _add_string(self, value: str) -> int:
+        """Append value to the string table and return its index"""
+        self.string_blob += value.encode('utf-8')
+        self.string_offsets.append(len(self.string_blob))
+        return len(self.string_offsets) - 2
+
+    def get_string(self, string_id: int) -> str:
+        """Decode an entry of the string table"""
+        start, end = self.string_offsets[string_id], self.string_offsets[string_id + 1]
+        return self.string_blob[start:end].decode('utf-8')
+
+    def _append_node(self, string_id: int, is_leaf: bool, parent: int) -> int:
+        """Append a childless node and return its index"""
+        index = len(self.text)
+        self.left.append(NO_NODE)
+        self.right.append(NO_NODE)
+        self.parent.append(parent)
+        self.text.append(string_id)
+        if index >> 3 >= len(self.leaf_bits):
+            self.leaf_bits.append(0)
+        self._set_leaf(index, is_leaf)
+        return index
+
+    def _set_leaf(self, index: int, is_leaf: bool):
+        """Set or clear the leaf bit of a node"""
+        if is_leaf:
+            self.leaf_bits[index >> 3] |= 1 << (index & 7)
+        else:
+            self.leaf_bits[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+
+    def is_leaf(self, index: int) -> bool:
+        """Check whether the node at index is an animal"""
+        return bool(self.leaf_bits[index >> 3] >> (index & 7) & 1)
+
+    def get_data(self, index: int) -> str:
+        """Get the question or animal name stored at index"""
+        return self.get_string(self.text[index])
+
+    def _import_nodes(self, root: Optional[Node]):
+        """Copy a Node graph into the arrays in preorder, deduplicating strings"""
+        if root is None:
+            return
+
+        string_ids: Dict[str, int] = {}
+
+        def intern(value: str) -> int:
+            if value not in string_ids:
+                string_ids[value] = self._add_string(value)
+            return string_ids[value]
+
+        self.root = self._append_node(intern(root.data), root.is_leaf, NO_NODE)
+        stack = [(root, self.root)]
+        while stack:
+            node, index = stack.pop()
+            for child_node, links in ((node.left_child, self.left), (node.right_child, self.right)):
+                if child_node is not None:
+                    child = self._append_node(intern(child_node.data), child_node.is_leaf, index)
+                    links[index] = child
+                    stack.append((child_node, child))
+
+    def reset_game(self):
+        """Reset to root node for a new game"""
+        self.current_node = self.root
+        self.game_history = []
+
+    def answer_question(self, answer: bool) -> bool:
+        """
+        Navigate the tree based on the answer to current question
+
+        Args:
+            answer: True for "Yes", False for "No"
+
+        Returns:
+            True if we've reached a leaf node (guessed the animal), False otherwise
+        """
+        if self.current_node == NO_NODE:
+            return False
+        if self.is_leaf(self.current_node):
+            return True
+
+        self.game_history.append((self.get_data(self.current_node), answer))
+
+        if answer:
+            self.current_node = self.left[self.current_node]
+        else:
+            self.current_node = self.right[self.current_node]
+
+        return self.current_node != NO_NODE and self.is_leaf(self.current_node)
+
+    def get_current_question(self) -> str:
+        """Get the current question to ask the user"""
+        if self.current_node == NO_NODE:
+            return ""
+        return self.get_data(self.current_node)
+
+    def get_guess(self) -> str:
+        """Get the current guess (animal at leaf node)"""
+        if self.current_node == NO_NODE or not self.is_leaf(self.current_node):
+            return ""
+        return self.get_data(self.current_node)
+
+    def learn_new_animal(self, new_animal: str, discriminating_question: str,
+                         answer_for_new: bool) -> bool:
+        """
+        Learn a new animal when the current guess was wrong
+
+        The leaf slot is reused for the question and the old animal keeps its
+        string entry, so learning appends two nodes and never moves existing ones.
+
+        Args:
+            new_animal: The animal the user was thinking of
+            discriminating_question: Question that differentiates new animal from guessed one
+            answer_for_new: True if answer is "Yes" for the new animal, False for "No"
+
+        Returns:
+            True if learning was successful
+        """
+        index = self.current_node
+        if index == NO_NODE or not self.is_leaf(index):
+            return False
+
+        new_leaf = self._append_node(self._add_string(new_animal), True, index)
+        old_leaf = self._append_node(self.text[index], True, index)
+
+        self.text[index] = self._add_string(discriminating_question)
+        self._set_leaf(index, False)
+        if answer_for_new:
+            self.left[index], self.right[index] = new_leaf, old_leaf
+        else:
+            self.left[index], self.right[index] = old_leaf, new_leaf
+
+        return True
+
+    def _node_depths(self) -> array:
+        """Compute every node's depth in one forward pass (parents precede children)"""
+        depths = array('i', bytes(4 * len(self.parent)))
+        parent = self.parent
+        for index in range(len(parent)):
+            if parent[index] != NO_NODE:
+                depths[index] = depths[parent[index]] + 1
+        return depths
+
+    def get_tree_height(self) -> int:
+        """Height of the tree (0 for single node, -1 for empty tree)"""
+        if self.root == NO_NODE:
+            return -1
+        return max(self._node_depths())
+
+    def get_node_count(self) -> int:
+        """Count total number of nodes in the tree"""
+        return len(self.text)
+
+    def get_leaf_count(self) -> int:
+        """Count number of leaf nodes (animals)"""
+        return bin(int.from_bytes(self.leaf_bits, 'little')).count('1')
+
+    def get_average_depth(self) -> float:
+        """Average depth of leaf nodes (average questions per game)"""
+        depths = self._node_depths()
+        total_depth = 0
+        leaves = 0
+        for index in range(len(depths)):
+            if self.is_leaf(index):
+                total_depth += depths[index]
+                leaves += 1
+        return total_depth / leaves if leaves else 0
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get comprehensive statistics about the tree
+
+        Returns:
+            Dictionary with tree statistics (same keys as BinaryTree)
+        """
+        depths = self._node_depths()
+        height = max(depths) if len(depths) else -1
+        leaves = 0
+        total_depth = 0
+        for index in range(len(depths)):
+            if self.is_leaf(index):
+                total_depth += depths[index]
+                leaves += 1
+
+        balance = 0
+        if height > 0 and leaves > 1:
+            optimal_height = math.ceil(math.log2(leaves))
+            balance = max(0, min(1, (height - optimal_height) / height))
+
+        return {
+            'height': height,
+            'total_nodes': len(depths),
+            'leaf_count': leaves,
+            'average_depth': round(total_depth / leaves if leaves else 0, 2),
+            'balance_factor': balance
+        }
+
+    def get_all_animals(self) -> List[str]:
+        """Get list of all known animals in the tree"""
+        return [self.get_data(index) for index in range(len(self.text)) if self.is_leaf(index)]
+
+    def memory_usage(self) -> int:
+        """Approximate bytes used by the node arrays and string table"""
+        arrays = (self.left, self.right, self.parent, self.text, self.string_offsets)
+        return sum(a.itemsize * len(a) for a in arrays) + len(self.leaf_bits) + len(self.string_blob)
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        """Convert entire tree to the nested dictionary format of Node.to_dict"""
+        if self.root == NO_NODE:
+            return None
+
+        dicts: Dict[int, Dict[str, Any]] = {}
+        # Children come after parents, so walking backwards finishes them first
+        for index in range(len(self.text) - 1, -1, -1):
+            left, right = self.left[index], self.right[index]
+            dicts[index] = {
+                'data': self.get_data(index),
+                'is_leaf': self.is_leaf(index),
+                'left': dicts.pop(left) if left != NO_NODE else None,
+                'right': dicts.pop(right) if right != NO_NODE else None
+            }
+        return dicts[self.root]
+
+    def to_bundle(self) -> Dict[str, Any]:
+        """
+        Flat format for navigating the tree on the client
+
+        Returns:
+            {'root': index, 'strings': string table, 'nodes': three integers per node:
+            string index, "Yes" child, "No" child (-1 if absent; animals have no children)}
+        """
+        strings = [self.get_string(string_id) for string_id in range(len(self.string_offsets) - 1)]
+        nodes: List[int] = []
+        for index in range(len(self.text)):
+            nodes += (self.text[index], self.left[index], self.right[index])
+        return {'root': self.root, 'strings': strings, 'nodes': nodes}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CompactTree':
+        """Create compact tree from the nested dictionary format"""
+        tree = cls.__new__(cls)
+        return tree._load_dict(data)
+
+    def _load_dict(self, data: Optional[Dict[str, Any]]) -> 'CompactTree':
+        """Replace the arrays with the contents of a nested dictionary"""
+        self.left, self.right = array('i'), array('i')
+        self.parent, self.text = array('i'), array('i')
+        self.leaf_bits = bytearray()
+        self.string_blob, self.string_offsets = bytearray(), array('I', [0])
+        self.root = NO_NODE
+
+        if data is not None:
+            string_ids: Dict[str, int] = {}
+
+            def intern(value: str) -> int:
+                if value not in string_ids:
+                    string_ids[value] = self._add_string(value)
+                return string_ids[value]
+
+            self.root = self._append_node(intern(data['data']), data['is_leaf'], NO_NODE)
+            stack = [(data, self.root)]
+            while stack:
+                item, index = stack.pop()
+                for key, links in (('left', self.left), ('right', self.right)):
+                    child_data = item.get(key)
+                    if child_data:
+                        child = self._append_node(intern(child_data['data']), child_data['is_leaf'], index)
+                        links[index] = child
+                        stack.append((child_data, child))
+
+        self.reset_game()
+        return self
+
+    @classmethod
+    def from_binary_tree(cls, tree) -> 'CompactTree':
+        """Build a compact copy of a BinaryTree"""
+        return cls(tree.root)
+
+    def to_node(self) -> Optional[Node]:
+        """Rebuild the equivalent Node graph"""
+        if self.root == NO_NODE:
+            return None
+        nodes: List[Optional[Node]] = [None] * len(self.text)
+        for index in range(len(self.text)):
+            node = Node(self.get_data(index), is_leaf=self.is_leaf(index))
+            nodes[index] = node
+            parent = self.parent[index]
+            if parent != NO_NODE:
+                node.parent = nodes[parent]
+                if self.left[parent] == index:
+                    nodes[parent].left_child = node
+                else:
+                    nodes[parent].right_child = node
+        return nodes[self.root]
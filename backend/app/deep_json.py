@@ -0,0 +1,185 @@
+"""
+Depth-Safe JSON Encoding and Decoding
+The stdlib json module recurses once per nesting level, so a learned tree that
+grows down one side cannot be saved or loaded past Python's recursion limit.
+These helpers use the fast stdlib path and fall back to explicit-stack
+implementations only when the nesting is too deep for it.
+"""
+
+import json
+import re
+from json.decoder import scanstring
+from json.encoder import encode_basestring
+from typing import Any, Iterator, IO, Tuple
+
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def _encode_scalar(value: Any) -> str:
+    """Encode a non-container JSON value"""
+    if isinstance(value, str):
+        return encode_basestring(value)
+    if value is None:
+        return 'null'
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    return json.dumps(value)
+
+
+def iter_encode(value: Any) -> Iterator[str]:
+    """
+    Encode a JSON value to text chunks using an explicit stack
+
+    Args:
+        value: Nested dicts/lists of JSON scalars
+
+    Yields:
+        Chunks of compact JSON text
+    """
+    # Work items are (is_raw_text, item); key prefixes are cached since trees repeat them
+    key_prefixes = {}
+    work = [(False, value)]
+    pop, push = work.pop, work.append
+    while work:
+        is_raw, item = pop()
+        if is_raw:
+            yield item
+        elif isinstance(item, dict):
+            push((True, '}'))
+            items = list(item.items())
+            for position in range(len(items) - 1, -1, -1):
+                key, child = items[position]
+                prefix = key_prefixes.get((position == 0, key))
+                if prefix is None:
+                    prefix = ('' if position == 0 else ', ') + encode_basestring(str(key)) + ': '
+                    key_prefixes[(position == 0, key)] = prefix
+                if isinstance(child, (dict, list, tuple)):
+                    push((False, child))
+                    push((True, prefix))
+                else:
+                    push((True, prefix + _encode_scalar(child)))
+            yield '{'
+        elif isinstance(item, (list, tuple)):
+            push((True, ']'))
+            for position in range(len(item) - 1, -1, -1):
+                push((False, item[position]))
+                if position:
+                    push((True, ', '))
+            yield '['
+        else:
+            yield _encode_scalar(item)
+
+
+def dumps(value: Any, **kwargs) -> str:
+    """
+    Serialize value to a JSON string, whatever its nesting depth
+
+    Args:
+        value: Value to encode
+        **kwargs: Options for json.dumps (used when the value is shallow enough)
+
+    Returns:
+        JSON text
+    """
+    try:
+        return json.dumps(value, **kwargs)
+    except RecursionError:
+        return ''.join(iter_encode(value))
+
+
+def dump(value: Any, fp: IO[str], **kwargs):
+    """Serialize value to an open text file (encoded fully before writing)"""
+    fp.write(dumps(value, **kwargs))
+
+
+def _loads_iterative(text: str) -> Any:
+    """Decode JSON text with an explicit stack of open containers"""
+    scan_once = json.JSONDecoder().scan_once
+    skip = _WHITESPACE.match
+    stack = []  # Entries: [container, pending key for dicts]
+    index = skip(text, 0).end()
+
+    def parse_key(index: int) -> Tuple[str, int]:
+        """Parse an object key and its colon, returning (key, index of the value)"""
+        if text[index:index + 1] != '"':
+            raise json.JSONDecodeError("Expecting property name enclosed in double quotes", text, index)
+        key, index = scanstring(text, index + 1)
+        index = skip(text, index).end()
+        if text[index:index + 1] != ':':
+            raise json.JSONDecodeError("Expecting ':' delimiter", text, index)
+        return key, skip(text, index + 1).end()
+
+    while True:
+        # Parse one value starting at index
+        char = text[index:index + 1]
+        if char == '{' or char == '[':
+            container = {} if char == '{' else []
+            index = skip(text, index + 1).end()
+            if text[index:index + 1] == ('}' if char == '{' else ']'):
+                value = container
+                index += 1
+            else:
+                key = None
+                if char == '{':
+                    key, index = parse_key(index)
+                stack.append([container, key])
+                continue
+        else:
+            try:
+                value, index = scan_once(text, index)
+            except StopIteration:
+                raise json.JSONDecodeError("Expecting value", text, index) from None
+
+        # Attach the value to its parents, closing finished containers
+        while True:
+            if not stack:
+                index = skip(text, index).end()
+                if index != len(text):
+                    raise json.JSONDecodeError("Extra data", text, index)
+                return value
+
+            entry = stack[-1]
+            container = entry[0]
+            is_dict = type(container) is dict
+            if is_dict:
+                container[entry[1]] = value
+            else:
+                container.append(value)
+
+            index = skip(text, index).end()
+            char = text[index:index + 1]
+            if char == ',':
+                index = skip(text, index + 1).end()
+                if is_dict:
+                    entry[1], index = parse_key(index)
+                break
+
+            closing = '}' if is_dict else ']'
+            if char != closing:
+                raise json.JSONDecodeError(f"Expecting ',' or '{closing}'", text, index)
+            index += 1
+            value = stack.pop()[0]
+
+
+def loads(text: str) -> Any:
+    """
+    Deserialize a JSON string, whatever its nesting depth
+
+    Args:
+        text: JSON document
+
+    Returns:
+        Decoded value
+    """
+    try:
+        return json.loads(text)
+    except RecursionError:
+        return _loads_iterative(text)
+
+
+def load(fp: IO[str]) -> Any:
+    """Deserialize JSON from an open text file"""
+    return loads(fp.read())
@@ -3,26 +3,83 @@ Game Management and Game Session Logic
 Handles game flow, scoring, and persistence
 """
 
+import hashlib
 import json
 import os
-from typing import Optional, Dict, Any, List
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List, Iterator
 from datetime import datetime
 from .tree import BinaryTree
+from .compact_tree import CompactTree
+from .optimizer import TreeOptimizer
+from .sessions import SessionRegistry, SessionRecord
+from .journal import TreeJournal
+from .history_log import HistoryLog
+from .sqlite_store import SQLiteDatabase, SQLiteHistory, SQLiteAnimalStore
+from .stats import GameStatistics
+from .session_store import SessionColumns, to_epoch_ms, from_epoch_ms
+from . import deep_json, snapshot
 
 
 class GameSession:
     """
     Represents a single game session with scoring
+    
+    Slotted, with times kept as integer epoch milliseconds; the datetime
+    attributes are properties over them. Animal names are kept as given
+    (interning them in a process-wide table would keep every free-text
+    answer alive for good); SessionColumns interns them per container.
     """
+    __slots__ = ('questions_asked', 'guessed_correctly', 'learned_new_animal',
+                 '_start_ms', '_end_ms', '_guessed', '_actual')
+    
     def __init__(self):
         self.questions_asked = 0
-        self.start_time = datetime.now()
-        self.end_time = None
+        self._start_ms = to_epoch_ms(datetime.now())
+        self._end_ms: Optional[int] = None
         self.guessed_correctly = False
-        self.animal_guessed = ""
-        self.animal_actual = ""
+        self._guessed = ""
+        self._actual = ""
         self.learned_new_animal = False
     
+    @property
+    def start_time(self) -> datetime:
+        """When the game started"""
+        return from_epoch_ms(self._start_ms)
+    
+    @start_time.setter
+    def start_time(self, value: datetime):
+        self._start_ms = to_epoch_ms(value)
+    
+    @property
+    def end_time(self) -> Optional[datetime]:
+        """When the game ended (None while it is running)"""
+        return from_epoch_ms(self._end_ms) if self._end_ms is not None else None
+    
+    @end_time.setter
+    def end_time(self, value: Optional[datetime]):
+        self._end_ms = to_epoch_ms(value) if value is not None else None
+    
+    @property
+    def animal_guessed(self) -> str:
+        """Animal the tree guessed"""
+        return self._guessed
+    
+    @animal_guessed.setter
+    def animal_guessed(self, value: Optional[str]):
+        self._guessed = value or ""
+    
+    @property
+    def animal_actual(self) -> str:
+        """Animal the player was thinking of, when the guess was wrong"""
+        return self._actual
+    
+    @animal_actual.setter
+    def animal_actual(self, value: Optional[str]):
+        self._actual = value or ""
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert session to dictionary for storage"""
         return {
@@ -34,29 +91,92 @@ class GameSession:
             'animal_actual': self.animal_actual,
             'learned_new_animal': self.learned_new_animal
         }
+    
+    @classmethod
+    def from_dict(cls, item: Dict[str, Any]) -> 'GameSession':
+        """Create a session from its stored dictionary"""
+        session = cls()
+        session.questions_asked = item['questions_asked']
+        session.start_time = datetime.fromisoformat(item['start_time'])
+        session.end_time = datetime.fromisoformat(item['end_time']) if item.get('end_time') else None
+        session.guessed_correctly = item['guessed_correctly']
+        session.animal_guessed = item['animal_guessed']
+        session.animal_actual = item['animal_actual']
+        session.learned_new_animal = item['learned_new_animal']
+        return session
 
 
 class GameManager:
     """
     Manages the overall game state, persistence, and scoring
+    
+    Each player gets a session (tree cursor + GameSession) from
+    start_new_game; game methods take its session_id. Calls without a
+    session_id use a default session on the tree's own cursor, for
+    single-player scripts and tests.
+    
+    Thread safety (one manager is shared by all request threads):
+    - Writers are serialized by one lock: learning, ending a game (history
+      and rolling windows), saving, optimizing, rollback and import. A learn
+      and the journal record or database rows for it are therefore applied
+      in the same order.
+    - Statistics take no writer lock: the tree and the game totals are read
+      from snapshots each change publishes with one assignment, and the
+      rolling windows have their own short in-memory lock, so /api/stats
+      never waits for a file or database write.
+    - Each session has its own lock, taken before the writer lock, so two
+      requests for the same player run in order while other players go on.
+    - Navigation takes no manager lock: a cursor follows the tree version it
+      started on, and learning publishes a new version with one assignment
+      (path copying), so readers never see a half-spliced question. Lookups
+      on the current tree (animals, node IDs, export) see the version just
+      before or just after a concurrent learn.
+    - The session registry, the name table and the animal store have their
+      own internal locks.
+    - history_version (bumped under the writer lock by finished games and
+      guess results) and the tree's version identify what read responses
+      were built from, so the API can cache them.
     """
     
-    def __init__(self, data_file: str = "data/tree_data.json", 
-                 history_file: str = "data/game_history.json"):
+    def __init__(self, data_file: str = "data/tree_data.snapshot", 
+                 history_file: str = "data/game_history.jsonl",
+                 sessions: Optional[SessionRegistry] = None,
+                 checkpoint_every: int = 100,
+                 database_file: Optional[str] = None):
         """
         Initialize game manager
         
         Args:
-            data_file: Path to save/load tree data
-            history_file: Path to save/load game history
+            data_file: Path to save/load the tree snapshot
+            history_file: Path of the active game history log segment
+            sessions: Registry for concurrent games (default: SessionRegistry())
+            checkpoint_every: Learned animals to journal before folding them into a new snapshot
+            database_file: SQLite database to keep the tree, history and animal
+                statistics in, instead of the snapshot, journal, history log and animals.json
         """
         # Ensure absolute paths for deployment
         base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         self.data_file = os.path.join(base_dir, data_file)
         self.history_file = os.path.join(base_dir, history_file)
-        self.tree = BinaryTree()
-        self.current_session = GameSession()
-        self.game_history: List[GameSession] = []
+        self.history_log: Optional[HistoryLog] = None  # Opened by load_history
+        self.recent_stats = GameStatistics()
+        self.journal = TreeJournal(os.path.splitext(self.data_file)[0] + '.journal')
+        self.checkpoint_every = checkpoint_every
+        self._journal_seq = 0  # Sequence of the last learn written to the journal
+        self.database: Optional[SQLiteDatabase] = None
+        self.animal_store: Optional[SQLiteAnimalStore] = None  # None: the shared animals.json store
+        if database_file is not None:
+            self.database = SQLiteDatabase(os.path.join(base_dir, database_file))
+            self.animal_store = SQLiteAnimalStore(self.database)
+            self.animal_store.start()
+        self.tree = self._attach(BinaryTree(persistent=True))  # Readers keep a consistent version while learning
+        self.sessions = sessions if sessions is not None else SessionRegistry()
+        self._default_game = GameSession()
+        self._default_lock = threading.Lock()
+        self._write_lock = threading.RLock()  # Serializes writers (see class docstring)
+        self._bundle = (None, None)  # ((epoch, version), bundle) of the last get_tree_bundle
+        self.history_version = 0  # Moves whenever the game history or its statistics change
+        self._history_totals = (0, 0, 0)  # (games, correct, questions), replaced as a whole
         
         # Create data directory if it doesn't exist
         os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
@@ -65,69 +185,167 @@ class GameManager:
         self.load_tree()
         self.load_history()
     
-    def start_new_game(self):
-        """Start a new game session"""
-        self.current_session = GameSession()
-        self.tree.reset_game()
+    def _attach(self, tree: BinaryTree) -> BinaryTree:
+        """Point a new tree object at this manager's animal store"""
+        tree.animal_store = self.animal_store
+        return tree
+    
+    @property
+    def current_session(self) -> GameSession:
+        """GameSession of the default session"""
+        return self._default_game
     
-    def process_answer(self, answer: str) -> Dict[str, Any]:
+    def get_session(self, session_id: Optional[str] = None) -> SessionRecord:
         """
-        Process user answer and update game state
+        Find the state of a game
         
         Args:
-            answer: "yes" or "no" (case-insensitive)
+            session_id: ID from start_new_game (None for the default session)
             
         Returns:
-            Dictionary with game state update
+            The session record
+            
+        Raises:
+            KeyError: If the session is unknown or has expired
         """
-        answer_bool = answer.lower() in ['yes', 'oui', 'o', 'y', '1', 'true']
-        self.current_session.questions_asked += 1
-        
-        print(f"\n=== DEBUG: Process Answer ===", flush=True)
-        print(f"Question asked: {self.tree.get_current_question()}", flush=True)
-        print(f"Answer: {answer} ({answer_bool})", flush=True)
+        if session_id is None:
+            record = SessionRecord(None, self.tree.cursor, self._default_game, 0)
+            record.lock = self._default_lock
+            return record
+        record = self.sessions.get(session_id)
+        if record is None:
+            raise KeyError(f"Unknown or expired session {session_id}")
+        return record
+    
+    @contextmanager
+    def _session_locked(self, session_id: Optional[str]) -> Iterator[SessionRecord]:
+        """Find a game and hold its lock (see get_session)"""
+        record = self.get_session(session_id)
+        with record.lock:
+            yield record
+    
+    def start_new_game(self, session_id: Optional[str] = None, new_session: bool = False) -> Optional[str]:
+        """
+        Start a new game session
         
-        reached_leaf = self.tree.answer_question(answer_bool)
+        Args:
+            session_id: Session to restart (None for the default session)
+            new_session: Register a new session instead
+            
+        Returns:
+            ID of the session that was started (None for the default session)
+            
+        Raises:
+            KeyError: If session_id is unknown or has expired
+        """
+        if new_session:
+            return self.sessions.create(self.tree.new_cursor(), GameSession()).session_id
         
-        current_q = self.tree.get_current_question()
-        guess = self.tree.get_guess() if reached_leaf else None
+        with self._session_locked(session_id) as record:
+            self.tree.reset_game(record.cursor)
+            if session_id is None:
+                self._default_game = GameSession()
+            else:
+                record.game = GameSession()
+            return session_id
+    
+    def process_answer(self, answer: str, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Process user answer and update game state
         
-        print(f"Reached leaf: {reached_leaf}", flush=True)
-        print(f"Current node is_leaf: {self.tree.current_node.is_leaf if self.tree.current_node else 'None'}", flush=True)
-        print(f"Current question/guess: {current_q if not reached_leaf else guess}", flush=True)
-        print(f"=== END DEBUG ===\n", flush=True)
+        Args:
+            answer: "yes" or "no" (case-insensitive)
+            session_id: Game to advance (None for the default session)
+            
+        Returns:
+            Dictionary with game state update
+        """
+        with self._session_locked(session_id) as record:
+            cursor, game = record.cursor, record.game
+            answer_bool = answer.lower() in ['yes', 'oui', 'o', 'y', '1', 'true']
+            game.questions_asked += 1
+            
+            print(f"\n=== DEBUG: Process Answer ===", flush=True)
+            print(f"Question asked: {self.tree.get_current_question(cursor)}", flush=True)
+            print(f"Answer: {answer} ({answer_bool})", flush=True)
+            
+            reached_leaf = self.tree.answer_question(answer_bool, cursor)
+            
+            current_q = self.tree.get_current_question(cursor)
+            guess = self.tree.get_guess(cursor) if reached_leaf else None
+            
+            print(f"Reached leaf: {reached_leaf}", flush=True)
+            print(f"Current node is_leaf: {cursor.node.is_leaf if cursor.node else 'None'}", flush=True)
+            print(f"Current question/guess: {current_q if not reached_leaf else guess}", flush=True)
+            print(f"=== END DEBUG ===\n", flush=True)
+            
+            return {
+                'reached_leaf': reached_leaf,
+                'current_question': current_q,
+                'animal_guessed': guess,
+                'questions_asked': game.questions_asked
+            }
+    
+    def process_answers(self, answers: List[str], session_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Process a sequence of answers in one call, exactly as if they came one by one
         
-        return {
-            'reached_leaf': reached_leaf,
-            'current_question': current_q,
-            'animal_guessed': guess,
-            'questions_asked': self.current_session.questions_asked
-        }
+        Args:
+            answers: "yes"/"no" answers in the order they are given
+            session_id: Game to advance (None for the default session)
+            
+        Returns:
+            Dictionary with the state after the last answer (see process_answer),
+            plus 'path': every question and answer of the game so far
+        """
+        with self._session_locked(session_id) as record:
+            cursor, game = record.cursor, record.game
+            for answer in answers:
+                game.questions_asked += 1
+                self.tree.answer_question(answer.lower() in ['yes', 'oui', 'o', 'y', '1', 'true'], cursor)
+            
+            reached_leaf = cursor.node is not None and cursor.node.is_leaf
+            return {
+                'reached_leaf': reached_leaf,
+                'current_question': self.tree.get_current_question(cursor),
+                'animal_guessed': self.tree.get_guess(cursor) if reached_leaf else None,
+                'questions_asked': game.questions_asked,
+                'path': [{'question': question, 'answer': 'Yes' if answer else 'No'}
+                         for question, answer in cursor.history]
+            }
     
-    def submit_guess_result(self, was_correct: bool, actual_animal: str = None):
+    def submit_guess_result(self, was_correct: bool, actual_animal: str = None,
+                            session_id: Optional[str] = None):
         """
         Submit result of the guess
         
         Args:
             was_correct: Whether the guess was correct
             actual_animal: The actual animal (if guess was wrong)
+            session_id: Game that made the guess (None for the default session)
         """
-        self.current_session.guessed_correctly = was_correct
-        guessed_animal = self.tree.get_guess()
-        
-        if was_correct:
-            # Update database: this animal's percentage should match this path
-            self.tree.update_animal_success(guessed_animal, True)
-            self.current_session.animal_guessed = guessed_animal
-        else:
-            # Update database: the actual animal should be learned
-            self.current_session.animal_actual = actual_animal
-            self.current_session.animal_guessed = guessed_animal
-            if actual_animal:
-                self.tree.update_animal_success(actual_animal, True)
+        with self._session_locked(session_id) as record:
+            cursor, game = record.cursor, record.game
+            game.guessed_correctly = was_correct
+            guessed_animal = self.tree.get_guess(cursor)
+            
+            if was_correct:
+                # Update database: this animal's percentage should match this path
+                self.tree.update_animal_success(guessed_animal, True, cursor)
+                game.animal_guessed = guessed_animal
+            else:
+                # Update database: the actual animal should be learned
+                game.animal_actual = actual_animal
+                game.animal_guessed = guessed_animal
+                if actual_animal:
+                    self.tree.update_animal_success(actual_animal, True, cursor)
+            
+            with self._write_lock:
+                self.history_version += 1
     
     def teach_new_animal(self, new_animal: str, discriminating_question: str,
-                        answer_for_new: str) -> bool:
+                        answer_for_new: str, allow_duplicate: bool = False,
+                        session_id: Optional[str] = None) -> bool:
         """
         Teach the system a new animal
         
@@ -135,38 +353,119 @@ class GameManager:
             new_animal: The animal to learn
             discriminating_question: Question to distinguish it
             answer_for_new: "yes" or "no"
+            allow_duplicate: Learn the animal even if the tree already has a leaf for it
+            session_id: Game whose guess was wrong (None for the default session)
             
         Returns:
-            True if learning was successful
+            True if learning was successful (False for a rejected duplicate, or
+            if another game already replaced the guessed leaf)
         """
-        answer_bool = answer_for_new.lower() in ['yes', 'oui', 'o', 'y', '1', 'true']
-        success = self.tree.learn_new_animal(new_animal, discriminating_question, answer_bool)
+        with self._session_locked(session_id) as record, self._write_lock:
+            if not allow_duplicate and self.tree.has_animal(new_animal):
+                return False
+            
+            answer_bool = answer_for_new.lower() in ['yes', 'oui', 'o', 'y', '1', 'true']
+            leaf, next_id = record.cursor.node, self.tree._next_id
+            success = self.tree.learn_new_animal(new_animal, discriminating_question, answer_bool,
+                                                 record.cursor)
+            
+            if success:
+                record.game.learned_new_animal = True
+                if self.database is not None:
+                    # One transaction: the leaf becomes the question, plus its two leaves
+                    try:
+                        self.database.record_learn(record.cursor.node)
+                    except sqlite3.Error as e:
+                        # The tree has already learned: rewrite every node row to match it
+                        print(f"Error recording learn in database: {e}")
+                        self.save_tree()
+                    return success
+                self._journal_seq += 1
+                try:
+                    self.journal.append(self._journal_seq, leaf.path_code, leaf.depth, leaf.node_id,
+                                        next_id, new_animal, discriminating_question, answer_bool)
+                except OSError as e:
+                    print(f"Error writing tree journal: {e}")
+                    self.save_tree()
+                if self.journal.pending >= self.checkpoint_every:
+                    self.save_tree()
+            
+            return success
+    
+    def optimize_tree(self, dry_run: bool = True) -> Dict[str, Any]:
+        """
+        Rebuild the tree to shorten games, weighted by how often each animal is played
         
-        if success:
-            self.current_session.learned_new_animal = True
-            self.save_tree()
+        Args:
+            dry_run: If True, only report the expected gain
+            
+        Returns:
+            Optimizer report (see TreeOptimizer.optimize)
+        """
+        with self._write_lock:
+            frequencies = dict(self.history_log.aggregates.animals)
+            report = TreeOptimizer(self.tree, frequencies).optimize(dry_run=dry_run)
+            if report['applied']:
+                self.save_tree()
+            return report
+    
+    def rollback_tree(self, version: int) -> int:
+        """
+        Restore an earlier tree version and save it
         
-        return success
+        Args:
+            version: Version number to restore
+            
+        Returns:
+            The new version number
+            
+        Raises:
+            ValueError: If the version is not kept
+        """
+        with self._write_lock:
+            new_version = self.tree.rollback(version)
+            self.save_tree()
+            return new_version
     
-    def end_current_game(self):
-        """End the current game and add to history"""
-        self.current_session.end_time = datetime.now()
-        self.game_history.append(self.current_session)
-        self.save_history()
+    def end_current_game(self, session_id: Optional[str] = None) -> GameSession:
+        """
+        End the current game and add to history
+        
+        Args:
+            session_id: Game to end (None for the default session)
+            
+        Returns:
+            The finished GameSession
+        """
+        with self._session_locked(session_id) as record, self._write_lock:
+            game = record.game
+            game.end_time = datetime.now()
+            self.recent_stats.record(game.guessed_correctly, game.questions_asked, game.end_time.timestamp())
+            try:
+                self.history_log.append(game.to_dict())
+            except OSError as e:
+                print(f"Error saving history: {e}")
+            self._history_changed()
+            return game
     
     def get_statistics(self) -> Dict[str, Any]:
         """
         Get comprehensive statistics
         
+        Everything comes from counters kept up to date as games end and
+        animals are learned, so the cost does not depend on how many games
+        were played. Nothing waits for the writer lock: the tree statistics
+        and game totals are snapshots published with each change.
+        
         Returns:
-            Dictionary with game and tree statistics
+            Dictionary with game and tree statistics, and rolling windows
+            ('5m', '1h', '1d') of recent games
         """
         tree_stats = self.tree.get_statistics()
         
-        # Calculate game statistics
-        total_games = len(self.game_history)
-        correct_guesses = sum(1 for g in self.game_history if g.guessed_correctly)
-        average_questions = sum(g.questions_asked for g in self.game_history) / total_games if total_games > 0 else 0
+        # Game statistics come from the history log's running counters
+        total_games, correct_guesses, questions = self._history_totals
+        average_questions = questions / total_games if total_games > 0 else 0
         
         return {
             'tree': tree_stats,
@@ -176,37 +475,93 @@ class GameManager:
                 'incorrect_guesses': total_games - correct_guesses,
                 'success_rate': (correct_guesses / total_games * 100) if total_games > 0 else 0,
                 'average_questions_per_game': round(average_questions, 2)
-            }
+            },
+            'recent': self.recent_stats.summary()
         }
     
+    def get_tree_bundle(self) -> Dict[str, Any]:
+        """
+        Get the current tree in the flat client format (see CompactTree.to_bundle)
+        
+        The bundle is built once per tree version and stamped with a hash of
+        its contents, so a client can keep it across games and server
+        restarts and only fetch it again when the stamp changes.
+        
+        Returns:
+            Dictionary with 'version' (content hash), 'root', 'strings', 'nodes',
+            and the 'tree_version' and 'epoch' to pass to /api/tree/changes
+        """
+        tree = self.tree
+        tree_version, root = tree.head()
+        key = (tree.epoch, tree_version)
+        cached_key, bundle = self._bundle
+        if bundle is None or cached_key != key:
+            bundle = CompactTree(root).to_bundle()
+            content = json.dumps(bundle, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+            bundle['version'] = hashlib.sha1(content).hexdigest()[:16]
+            bundle['tree_version'], bundle['epoch'] = tree_version, tree.epoch
+            self._bundle = (key, bundle)
+        return bundle
+    
     def save_tree(self) -> bool:
         """
-        Save tree to file
+        Checkpoint: save the whole tree as a binary snapshot and empty the journal
+        
+        Learning only appends to the journal; this runs every checkpoint_every
+        animals and whenever the tree is replaced as a whole. With a database,
+        the node rows are replaced in one transaction instead.
         
         Returns:
             True if successful
         """
-        try:
-            os.makedirs(os.path.dirname(self.data_file) if os.path.dirname(self.data_file) else ".", exist_ok=True)
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.tree.to_dict(), f, ensure_ascii=False, indent=2)
-            return True
-        except Exception as e:
-            print(f"Error saving tree: {e}")
-            return False
+        with self._write_lock:
+            try:
+                if self.database is not None:
+                    self.database.save_tree(self.tree.root)
+                    return True
+                snapshot.save(self.tree.root, self.data_file, self._journal_seq)
+                self.journal.reset()
+                return True
+            except Exception as e:
+                print(f"Error saving tree: {e}")
+                return False
     
     def load_tree(self) -> bool:
         """
         Load tree from file
         
+        Reads the binary snapshot and replays the journal over it; a JSON tree
+        (in data_file, or a tree_data.json from before snapshots next to it) is
+        imported and saved as a snapshot. With a database, the tree is read
+        from its node rows.
+        
         Returns:
             True if successful (or file doesn't exist yet)
         """
+        legacy_file = os.path.splitext(self.data_file)[0] + '.json'
         try:
-            if os.path.exists(self.data_file):
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.tree = BinaryTree.from_dict(data)
+            if self.database is not None:
+                root = self.database.load_tree()
+                if root is None:
+                    self.save_tree()
+                else:
+                    self.tree = self._attach(BinaryTree(root, persistent=True))
+                return True
+            if os.path.exists(self.data_file) and snapshot.is_snapshot(self.data_file):
+                root, self._journal_seq = snapshot.load_checkpoint(self.data_file)
+                self.tree = self._attach(BinaryTree(root, persistent=True))
+                last = self.journal.replay(self.tree, self._journal_seq)
+                if last is None:
+                    print("Error replaying tree journal: record does not match the snapshot")
+                    self.save_tree()  # Keep what was replayed, drop the rest
+                    return False
+                self._journal_seq = last
+                if self.journal.pending >= self.checkpoint_every:
+                    self.save_tree()
+                return True
+            elif os.path.exists(self.data_file) or os.path.exists(legacy_file):
+                source = self.data_file if os.path.exists(self.data_file) else legacy_file
+                self.import_tree_json(source)
                 return True
             else:
                 # File doesn't exist, use default tree and save it
@@ -215,54 +570,166 @@ class GameManager:
         except Exception as e:
             print(f"Error loading tree: {e}")
             # Use default tree on error
-            self.tree = BinaryTree()
+            self.tree = self._attach(BinaryTree(persistent=True))
             return False
     
+    def export_tree_json(self, json_path: str):
+        """
+        Write the current tree in the nested JSON format (with node IDs)
+        
+        Args:
+            json_path: Destination file
+        """
+        os.makedirs(os.path.dirname(json_path) or ".", exist_ok=True)
+        with open(json_path, 'w', encoding='utf-8') as f:
+            deep_json.dump(self.tree.to_dict(include_ids=True), f, ensure_ascii=False, indent=2)
+    
+    def import_tree_json(self, json_path: str):
+        """
+        Replace the tree with one read from a nested JSON file and save it as a snapshot
+        
+        Args:
+            json_path: File written by export_tree_json (or an older save_tree)
+        """
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = deep_json.load(f)
+        with self._write_lock:
+            self.tree = self._attach(BinaryTree.from_dict(data, persistent=True))
+            self.save_tree()
+    
     def save_history(self) -> bool:
         """
-        Save game history to file
+        Write the history aggregates sidecar
+        
+        Finished games are appended to the log as they end; the sidecar lets
+        the next start skip reading them.
         
         Returns:
             True if successful
         """
-        try:
-            os.makedirs(os.path.dirname(self.history_file) if os.path.dirname(self.history_file) else ".", exist_ok=True)
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                history_data = [g.to_dict() for g in self.game_history]
-                json.dump(history_data, f, ensure_ascii=False, indent=2)
-            return True
-        except Exception as e:
-            print(f"Error saving history: {e}")
-            return False
+        with self._write_lock:
+            try:
+                self.history_log.flush_aggregates()
+                return True
+            except Exception as e:
+                print(f"Error saving history: {e}")
+                return False
+    
+    def _find_legacy_history(self) -> Optional[str]:
+        """
+        Find a history file in the JSON array format used before the log
+        
+        Looks at history_file itself and at the .json file next to it. An
+        array at history_file is first moved aside (to .legacy) so the log
+        can be opened there.
+        
+        Returns:
+            Path of the array file to import, or None
+        """
+        staged = self.history_file + '.legacy'
+        if os.path.exists(staged):
+            return staged  # An earlier import was interrupted
+        candidates = [self.history_file, os.path.splitext(self.history_file)[0] + '.json']
+        for path in dict.fromkeys(candidates):
+            if not os.path.exists(path):
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                if f.read(1024).lstrip()[:1] != '[':
+                    continue
+            if path == self.history_file:
+                os.replace(path, staged)
+                return staged
+            return path
+        return None
     
     def load_history(self) -> bool:
         """
-        Load game history from file
+        Open the history log (or the database's sessions table)
+        
+        Only the aggregate counters and the last day of games (for the rolling
+        windows) are read; other games are streamed on demand by
+        iter_sessions. A history file in the old JSON array format is
+        imported into the log first.
         
         Returns:
             True if successful
         """
         try:
-            if os.path.exists(self.history_file):
-                with open(self.history_file, 'r', encoding='utf-8') as f:
-                    history_data = json.load(f)
-                    self.game_history = []
-                    for item in history_data:
-                        session = GameSession()
-                        session.questions_asked = item['questions_asked']
-                        session.start_time = datetime.fromisoformat(item['start_time'])
-                        session.end_time = datetime.fromisoformat(item['end_time']) if item.get('end_time') else None
-                        session.guessed_correctly = item['guessed_correctly']
-                        session.animal_guessed = item['animal_guessed']
-                        session.animal_actual = item['animal_actual']
-                        session.learned_new_animal = item['learned_new_animal']
-                        self.game_history.append(session)
-                return True
+            if self.database is not None:
+                self.history_log = SQLiteHistory(self.database)
+            else:
+                legacy_file = self._find_legacy_history()
+                self.history_log = HistoryLog(self.history_file)
+                if legacy_file:
+                    with open(legacy_file, 'r', encoding='utf-8') as f:
+                        self.history_log.import_records(json.load(f))
+                    os.remove(legacy_file)
+            
+            # Refill the rolling windows from the last day of games
+            since = datetime.fromtimestamp(self.recent_stats.clock() - self.recent_stats.longest_span)
+            self.recent_stats = GameStatistics(self.recent_stats.clock)
+            self.recent_stats.record_all(
+                ((g.end_time or g.start_time).timestamp(), g.guessed_correctly, g.questions_asked)
+                for g in self.iter_sessions(since=since))
+            self._history_changed()
             return True  # No history file is fine
         except Exception as e:
             print(f"Error loading history: {e}")
+            if self.history_log is None:
+                self.history_log = (SQLiteHistory(self.database) if self.database is not None
+                                    else HistoryLog(self.history_file))
+            self._history_changed()
             return False
     
+    def clear_history(self):
+        """
+        Delete every finished game
+        
+        The rolling windows are emptied with the log and history_version
+        moves, so statistics (and responses cached from them) start over.
+        """
+        with self._write_lock:
+            self.history_log.clear()
+            self.recent_stats = GameStatistics(self.recent_stats.clock)
+            self._history_changed()
+    
+    def _history_changed(self):
+        """Publish the game totals for get_statistics and move history_version (writer lock held)"""
+        aggregates = self.history_log.aggregates
+        self._history_totals = (aggregates.games, aggregates.correct, aggregates.questions)
+        self.history_version += 1
+    
+    def iter_sessions(self, since: Optional[datetime] = None,
+                      until: Optional[datetime] = None) -> Iterator[GameSession]:
+        """
+        Stream finished games from the history log, oldest first
+        
+        Args:
+            since: Only games that ended at or after this time
+            until: Only games that ended at or before this time
+            
+        Yields:
+            One GameSession at a time
+        """
+        for item in self.history_log.iter_records(since, until):
+            yield GameSession.from_dict(item)
+    
+    def history_columns(self, since: Optional[datetime] = None,
+                        until: Optional[datetime] = None) -> SessionColumns:
+        """
+        Load finished games into a columnar container for bulk analysis
+        
+        Args:
+            since: Only games that ended at or after this time
+            until: Only games that ended at or before this time
+            
+        Returns:
+            SessionColumns with one row per game, oldest first
+        """
+        columns = SessionColumns()
+        columns.extend_records(self.history_log.iter_records(since, until))
+        return columns
+    
     def get_all_animals(self) -> List[str]:
         """Get list of all known animals"""
         return self.tree.get_all_animals()
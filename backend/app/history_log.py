@@ -0,0 +1,348 @@
+"""
+Append-Only Game History Log
+Stores one JSON line per finished game, rotated into numbered segments by size and age,
+with aggregate counters kept in a small sidecar file
+"""
+
+import json
+import os
+import re
+import time
+from datetime import datetime
+from typing import Optional, Dict, Any, Iterator, List, Iterable, Callable, Tuple
+
+
+def record_time(record: Dict[str, Any]) -> datetime:
+    """When a stored game finished (or started, if it never ended)"""
+    return datetime.fromisoformat(record.get('end_time') or record['start_time'])
+
+
+class HistoryAggregates:
+    """
+    Counters over every recorded game, updated one record at a time
+    """
+    __slots__ = ('games', 'correct', 'questions', 'learned', 'animals')
+
+    def __init__(self):
+        self.games = 0
+        self.correct = 0
+        self.questions = 0
+        self.learned = 0
+        self.animals: Dict[str, int] = {}  # Player's animal -> number of games
+
+    def add(self, record: Dict[str, Any]):
+        """Count one stored game"""
+        self.games += 1
+        self.questions += record.get('questions_asked', 0)
+        if record.get('guessed_correctly'):
+            self.correct += 1
+            animal = record.get('animal_guessed')
+        else:
+            animal = record.get('animal_actual')
+        if record.get('learned_new_animal'):
+            self.learned += 1
+        if animal:
+            self.animals[animal] = self.animals.get(animal, 0) + 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the counters to a dictionary for storage"""
+        return {'games': self.games, 'correct': self.correct, 'questions': self.questions,
+                'learned': self.learned, 'animals': self.animals}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'HistoryAggregates':
+        """Create counters from their stored dictionary"""
+        aggregates = cls()
+        aggregates.games = data['games']
+        aggregates.correct = data['correct']
+        aggregates.questions = data['questions']
+        aggregates.learned = data['learned']
+        aggregates.animals = dict(data['animals'])
+        return aggregates
+
+
+class HistoryLog:
+    """
+    Game history as JSON lines spread over segment files.
+
+    New games go to the active segment (e.g. game_history.jsonl). Once it
+    holds max_bytes, or its first game is older than max_age seconds, it is
+    renamed to the next numbered segment (game_history.000001.jsonl, ...),
+    so appending never rewrites earlier games. Readers go through the
+    numbered segments in order, then the active one.
+
+    Opening the log reads only the aggregates sidecar (game_history.aggregates.json),
+    which also records how far into the log it counted: the number the active
+    segment will get when rotated, and the byte offset in it. Games appended
+    after the last sidecar write are counted from there, so a crash costs a
+    short catch-up instead of a full scan.
+    """
+
+    def __init__(self, path: str, max_bytes: Optional[int] = 4 * 1024 * 1024,
+                 max_age: Optional[float] = 7 * 24 * 3600,
+                 clock: Callable[[], float] = time.time, aggregate_every: int = 50):
+        """
+        Initialize the log
+
+        Args:
+            path: Active segment file
+            max_bytes: Rotate once the active segment reaches this size (None for no limit)
+            max_age: Rotate once its first game is this many seconds old (None for no limit)
+            clock: Time source in seconds since the epoch
+            aggregate_every: Games appended between writes of the aggregates sidecar
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.clock = clock
+        self._base, self._ext = os.path.splitext(path)
+        self._segment_pattern = re.compile(re.escape(os.path.basename(self._base)) + r'\.(\d+)'
+                                           + re.escape(self._ext) + '$')
+        self.aggregate_every = aggregate_every
+        self.aggregates_path = self._base + '.aggregates.json'
+        self._started: Optional[float] = None  # Time of the active segment's first game
+        self._size = self._drop_torn_tail(path)
+        if self._size:
+            self._started = self._first_record_time(path)
+        self.aggregates = HistoryAggregates()
+        self._unsaved = 0  # Games counted since the sidecar was written
+        self._load_aggregates()
+
+    @staticmethod
+    def _drop_torn_tail(path: str) -> int:
+        """Cut a half-written last line off a segment so appends start on a fresh line"""
+        if not os.path.exists(path):
+            return 0
+        with open(path, 'rb+') as f:
+            size = f.seek(0, os.SEEK_END)
+            end = size
+            while end:
+                start = max(0, end - 4096)
+                f.seek(start)
+                chunk = f.read(end - start)
+                newline = chunk.rfind(b'\n')
+                if newline >= 0:
+                    end = start + newline + 1
+                    break
+                end = start
+            if end != size:
+                f.truncate(end)
+        return end
+
+    @staticmethod
+    def _edge_lines(path: str) -> Tuple[bytes, bytes]:
+        """First and last lines of a segment"""
+        with open(path, 'rb') as f:
+            first = f.readline()
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(0, size - 4096))
+            lines = f.read().splitlines()
+        return first, (lines[-1] if lines else b'')
+
+    def _numbered_segments(self) -> Dict[int, str]:
+        """Rotated segments by number"""
+        directory = os.path.dirname(self.path) or "."
+        numbered = {}
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                match = self._segment_pattern.match(name)
+                if match:
+                    numbered[int(match.group(1))] = os.path.join(directory, name)
+        return numbered
+
+    def _next_number(self) -> int:
+        """Number the active segment gets when it is rotated"""
+        return max(self._numbered_segments(), default=0) + 1
+
+    def _count_from(self, path: str, offset: int):
+        """Add the games of a segment from a byte offset to the aggregates"""
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                try:
+                    self.aggregates.add(json.loads(line))
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+                self._unsaved += 1
+
+    def _load_aggregates(self):
+        """Read the sidecar and count games appended after it was written"""
+        try:
+            with open(self.aggregates_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            aggregates = HistoryAggregates.from_dict(data['aggregates'])
+            segment, offset = data['segment'], data['offset']
+        except (OSError, ValueError, KeyError, TypeError):
+            self.rebuild_aggregates()
+            return
+
+        numbered = self._numbered_segments()
+        self.aggregates = aggregates
+        if segment in numbered:
+            # The active segment was rotated after the sidecar was written
+            self._count_from(numbered[segment], offset)
+            for number in sorted(n for n in numbered if n > segment):
+                self._count_from(numbered[number], 0)
+            if os.path.exists(self.path):
+                self._count_from(self.path, 0)
+        elif segment == self._next_number() and offset <= self._size:
+            if self._size:
+                self._count_from(self.path, offset)
+        else:
+            self.rebuild_aggregates()
+
+    def rebuild_aggregates(self):
+        """Recount every game in the log and rewrite the sidecar"""
+        self.aggregates = HistoryAggregates()
+        for record in self:
+            self.aggregates.add(record)
+        self.flush_aggregates()
+
+    def flush_aggregates(self):
+        """Write the aggregates and the log position they cover, atomically"""
+        data = {'version': 1, 'segment': self._next_number(), 'offset': self._size,
+                'aggregates': self.aggregates.to_dict()}
+        os.makedirs(os.path.dirname(self.aggregates_path) or ".", exist_ok=True)
+        temp_path = self.aggregates_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_path, self.aggregates_path)
+        self._unsaved = 0
+
+    def segments(self) -> List[str]:
+        """Paths of all segments, oldest first (the active one last, if it exists)"""
+        numbered = self._numbered_segments()
+        paths = [numbered[number] for number in sorted(numbered)]
+        if os.path.exists(self.path):
+            paths.append(self.path)
+        return paths
+
+    def _segment_path(self, number: int) -> str:
+        """Path of a numbered segment"""
+        return f"{self._base}.{number:06d}{self._ext}"
+
+    def _first_record_time(self, path: str) -> Optional[float]:
+        """End (or start) time of the first game in a segment, as a timestamp"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                record = json.loads(f.readline())
+            return record_time(record).timestamp()
+        except (OSError, ValueError, KeyError, AttributeError):
+            return None  # Unreadable or not a game record
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over every recorded game, oldest first"""
+        return self.iter_records()
+
+    def iter_records(self, since: Optional[datetime] = None,
+                     until: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream recorded games in a time range, oldest first
+
+        Games are appended in the order they finish, so segments entirely
+        outside the range are skipped after reading their first and last lines.
+
+        Args:
+            since: Only games that finished at or after this time
+            until: Only games that finished at or before this time
+
+        Yields:
+            Stored game dictionaries, one at a time
+        """
+        for path in self.segments():
+            try:
+                if since is not None or until is not None:
+                    first, last = self._edge_lines(path)
+                    if (since is not None and last and record_time(json.loads(last)) < since) or \
+                            (until is not None and first and record_time(json.loads(first)) > until):
+                        continue
+                f = open(path, 'r', encoding='utf-8')
+            except FileNotFoundError:
+                continue  # Rotated away while listing
+            except (ValueError, KeyError):
+                f = open(path, 'r', encoding='utf-8')  # Unreadable edge line: scan the segment
+            with f:
+                for line in f:
+                    if not line.endswith('\n'):
+                        break  # Torn write
+                    try:
+                        record = json.loads(line)
+                        finished = record_time(record) if since is not None or until is not None else None
+                    except (ValueError, KeyError):
+                        continue
+                    if since is not None and finished < since:
+                        continue
+                    if until is not None and finished > until:
+                        return
+                    yield record
+
+    def append(self, record: Dict[str, Any]):
+        """
+        Append one game, rotating the active segment first if it is full or old
+
+        Args:
+            record: GameSession.to_dict() of a finished game
+        """
+        now = self.clock()
+        if self._size and ((self.max_bytes is not None and self._size >= self.max_bytes)
+                           or (self.max_age is not None and self._started is not None
+                               and now - self._started >= self.max_age)):
+            self.rotate()
+
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line)
+        if not self._size:
+            self._started = now
+        self._size += len(line.encode('utf-8'))
+        self.aggregates.add(record)
+        self._unsaved += 1
+        if self._unsaved >= self.aggregate_every:
+            self.flush_aggregates()
+
+    def rotate(self) -> Optional[str]:
+        """
+        Close the active segment by renaming it to the next number
+
+        Returns:
+            Path of the new numbered segment, or None if the active one was empty
+        """
+        if not os.path.exists(self.path) or not os.path.getsize(self.path):
+            return None
+        target = self._segment_path(self._next_number())
+        os.replace(self.path, target)
+        self._size = 0
+        self._started = None
+        return target
+
+    def import_records(self, records: Iterable[Dict[str, Any]]):
+        """
+        Store games older than everything in the log as segment 0
+
+        Used to migrate a legacy history array. Segment 0 is replaced through
+        a temporary file, so a crash leaves either all games or none, and
+        importing the same array again does not duplicate it.
+
+        Args:
+            records: Games to import, oldest first
+        """
+        target = self._segment_path(0)
+        temp_path = target + '.tmp'
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        os.replace(temp_path, target)
+        self.rebuild_aggregates()
+
+    def clear(self):
+        """Delete every segment and the aggregates sidecar"""
+        for path in self.segments():
+            os.remove(path)
+        if os.path.exists(self.aggregates_path):
+            os.remove(self.aggregates_path)
+        self._size = 0
+        self._started = None
+        self.aggregates = HistoryAggregates()
+        self._unsaved = 0
@@ -0,0 +1,113 @@
+"""
+Write-Ahead Journal for Learned Animals
+Appends one small record per learned animal so saving never rewrites the whole tree
+"""
+
+import json
+import os
+from typing import Optional, Dict, Any, Iterator
+
+from .tree import BinaryTree, TreeCursor
+
+
+class TreeJournal:
+    """
+    Append-only log of learn operations, replayed over the last snapshot.
+
+    Each line is a JSON record:
+    - seq: sequence number, increasing across checkpoints
+    - path / depth: path code (hex) and depth of the leaf that was replaced
+    - leaf: node ID of that leaf, to check the replay lands on the same node
+    - next: first node ID given to the new leaves, so replayed IDs match
+    - animal / question / yes: what was learned and the new animal's answer
+
+    A snapshot stores the last sequence it contains, so records at or below
+    it are skipped if a crash happened between writing the snapshot and
+    truncating the journal. A torn last line (crash mid-append) ends the
+    replay without error.
+    """
+
+    def __init__(self, path: str, fsync: bool = True):
+        """
+        Initialize the journal
+
+        Args:
+            path: Journal file
+            fsync: Flush each record to disk before append returns
+        """
+        self.path = path
+        self.fsync = fsync
+        self.pending = 0  # Records appended since the last checkpoint
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over the complete records in the file"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.endswith('\n'):
+                    break  # Torn write
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    break
+
+    def append(self, seq: int, leaf_path: int, leaf_depth: int, leaf_id: int, next_id: int,
+               animal: str, question: str, answer_for_new: bool):
+        """
+        Append a learn record
+
+        Args:
+            seq: Sequence number of the record
+            leaf_path: Path code of the leaf that was replaced
+            leaf_depth: Depth of that leaf
+            leaf_id: Node ID of that leaf
+            next_id: Tree's next free node ID before learning
+            animal: The new animal
+            question: Question that tells it apart from the old guess
+            answer_for_new: Answer to the question for the new animal
+        """
+        record = {'seq': seq, 'path': format(leaf_path, 'x'), 'depth': leaf_depth, 'leaf': leaf_id,
+                  'next': next_id, 'animal': animal, 'question': question, 'yes': answer_for_new}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        self.pending += 1
+
+    def replay(self, tree: BinaryTree, after: int = 0) -> Optional[int]:
+        """
+        Apply the records newer than a snapshot to its tree
+
+        Args:
+            tree: Tree loaded from the snapshot
+            after: Sequence number stored in the snapshot
+
+        Returns:
+            Sequence number of the last record applied (after if none),
+            or None if a record did not match the tree and replay stopped
+        """
+        last = after
+        self.pending = 0
+        for record in self:
+            if record['seq'] <= after:
+                continue
+            leaf = tree.resolve_path_code(int(record['path'], 16), record['depth'])
+            if leaf is None or not leaf.is_leaf or leaf.node_id != record['leaf']:
+                return None
+            cursor = TreeCursor(tree.root)
+            cursor.node = leaf
+            tree._next_id = record['next']
+            tree.learn_new_animal(record['animal'], record['question'], record['yes'], cursor)
+            last = record['seq']
+            self.pending += 1
+        return last
+
+    def reset(self):
+        """Empty the journal once its records are in a snapshot"""
+        if os.path.exists(self.path):
+            with open(self.path, 'w', encoding='utf-8'):
+                pass
+        self.pending = 0
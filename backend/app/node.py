@@ -7,7 +7,7 @@ from typing import Optional, Dict, Any
 from dataclasses import dataclass, field
 
 
-@dataclass
+@dataclass(eq=False)
 class Node:
     """
     Represents a single node in the decision tree.
@@ -18,12 +18,28 @@ class Node:
         left_child: Child node for "Yes" answers
         right_child: Child node for "No" answers
         parent: Reference to parent node for tree navigation
+        depth: Number of questions between the root and this node
+        path_code: Answers leading here, bit i set when question i was answered "Yes"
+        node_id: Stable identifier, kept across learning and saves (-1 until assigned)
+        subtree_nodes: Number of nodes in the subtree rooted here
+        subtree_leaves: Number of animals in the subtree rooted here
+
+    depth, path_code and the subtree counts are maintained by BinaryTree and
+    are not serialized; node_id is serialized on request.
+
+    Nodes compare by identity: a field-wise comparison would recurse through
+    the whole subtree and the parent links.
     """
     data: str
     is_leaf: bool = False
     left_child: Optional['Node'] = None
     right_child: Optional['Node'] = None
     parent: Optional['Node'] = None
+    depth: int = field(default=0, repr=False)
+    path_code: int = field(default=0, repr=False)
+    node_id: int = field(default=-1, repr=False)
+    subtree_nodes: int = field(default=1, repr=False)
+    subtree_leaves: int = field(default=0, repr=False)
     
     def __post_init__(self):
         """Initialize child parent references"""
@@ -32,25 +48,44 @@ class Node:
         if self.right_child:
             self.right_child.parent = self
     
-    def to_dict(self) -> Dict[str, Any]:
+    def to_dict(self, include_ids: bool = False) -> Dict[str, Any]:
         """
         Convert node to dictionary for JSON serialization
         
+        Uses an explicit stack so arbitrarily deep subtrees serialize safely.
+        
+        Args:
+            include_ids: Add each node's node_id under 'id'
+        
         Returns:
             Dictionary representation of the node
         """
-        return {
-            'data': self.data,
-            'is_leaf': self.is_leaf,
-            'left': self.left_child.to_dict() if self.left_child else None,
-            'right': self.right_child.to_dict() if self.right_child else None
-        }
+        def shallow(node: 'Node') -> Dict[str, Any]:
+            node_dict = {'data': node.data, 'is_leaf': node.is_leaf, 'left': None, 'right': None}
+            if include_ids:
+                node_dict['id'] = node.node_id
+            return node_dict
+        
+        result = shallow(self)
+        stack = [(self, result)]
+        while stack:
+            node, node_dict = stack.pop()
+            left, right = node.left_child, node.right_child
+            if left is not None:
+                node_dict['left'] = shallow(left)
+                stack.append((left, node_dict['left']))
+            if right is not None:
+                node_dict['right'] = shallow(right)
+                stack.append((right, node_dict['right']))
+        return result
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Node':
         """
         Create a node from dictionary representation
         
+        Uses an explicit stack so arbitrarily deep trees load safely.
+        
         Args:
             data: Dictionary representation of node
             
@@ -60,20 +95,26 @@ class Node:
         if data is None:
             return None
         
-        node = cls(
-            data=data['data'],
-            is_leaf=data['is_leaf']
-        )
-        
-        if data.get('left'):
-            node.left_child = cls.from_dict(data['left'])
-            node.left_child.parent = node
-        
-        if data.get('right'):
-            node.right_child = cls.from_dict(data['right'])
-            node.right_child.parent = node
+        root = cls(data=data['data'], is_leaf=data['is_leaf'], node_id=data.get('id', -1))
+        stack = [(root, data)]
+        while stack:
+            node, node_data = stack.pop()
+            
+            left_data = node_data.get('left')
+            if left_data:
+                node.left_child = cls(data=left_data['data'], is_leaf=left_data['is_leaf'],
+                                      node_id=left_data.get('id', -1))
+                node.left_child.parent = node
+                stack.append((node.left_child, left_data))
+            
+            right_data = node_data.get('right')
+            if right_data:
+                node.right_child = cls(data=right_data['data'], is_leaf=right_data['is_leaf'],
+                                       node_id=right_data.get('id', -1))
+                node.right_child.parent = node
+                stack.append((node.right_child, right_data))
         
-        return node
+        return root
     
     def __repr__(self) -> str:
         """String representation of node"""
@@ -0,0 +1,298 @@
+"""
+Offline Tree Optimizer for PseudoQui
+Rebuilds the decision tree to reduce the expected number of questions per game
+"""
+
+from typing import Optional, Dict, List, Any, Iterable, Tuple
+
+from .node import Node
+from .tree import BinaryTree
+
+
+class TreeOptimizer:
+    """
+    Shorten games by removing nodes a consistent player never needs.
+
+    An animal only "knows" the answers on its own path, so reordering
+    questions cannot shorten any path without inventing answers no player
+    gave. What learning does leave behind is dead weight:
+
+    - Repeated questions: when a question was already answered higher up on
+      the path, the opposite branch is unreachable and the node is replaced
+      by its live branch (unless that would lose the only leaf of an animal).
+    - Duplicate animals: an animal learned in several places keeps the leaf
+      that minimizes the frequency-weighted depth; each other copy is removed
+      and its sibling subtree moves up one level.
+
+    Every animal stays reachable through answers it was learned with.
+    """
+
+    def __init__(self, tree: BinaryTree, frequencies: Optional[Dict[str, float]] = None,
+                 smoothing: float = 1.0):
+        """
+        Initialize the optimizer
+
+        Args:
+            tree: Tree to optimize (only modified by optimize with dry_run=False)
+            frequencies: How often each animal was the answer of a game
+            smoothing: Weight added to every animal so unplayed ones still count
+        """
+        self.tree = tree
+        self.smoothing = smoothing
+        self.frequencies: Dict[str, float] = {}
+        for name, count in (frequencies or {}).items():
+            key = BinaryTree.normalize_name(name)
+            self.frequencies[key] = self.frequencies.get(key, 0) + count
+
+    @staticmethod
+    def frequencies_from_history(sessions: Iterable[Any]) -> Dict[str, int]:
+        """
+        Count how often each animal was the player's answer
+
+        Args:
+            sessions: Finished GameSession objects
+
+        Returns:
+            Dictionary of animal name -> number of games
+        """
+        counts: Dict[str, int] = {}
+        for session in sessions:
+            animal = session.animal_guessed if session.guessed_correctly else session.animal_actual
+            if animal:
+                counts[animal] = counts.get(animal, 0) + 1
+        return counts
+
+    def _animal_weight(self, name: str) -> float:
+        """Frequency weight of an animal, smoothed"""
+        return self.frequencies.get(BinaryTree.normalize_name(name), 0) + self.smoothing
+
+    @staticmethod
+    def _copy(root: Node) -> Node:
+        """Deep-copy a Node graph without recursion, keeping node IDs"""
+        copy_root = Node(root.data, is_leaf=root.is_leaf, node_id=root.node_id)
+        stack = [(root, copy_root)]
+        while stack:
+            original, copy = stack.pop()
+            for child, attribute in ((original.left_child, 'left_child'), (original.right_child, 'right_child')):
+                if child is not None:
+                    child_copy = Node(child.data, is_leaf=child.is_leaf, parent=copy, node_id=child.node_id)
+                    setattr(copy, attribute, child_copy)
+                    stack.append((child, child_copy))
+        return copy_root
+
+    @staticmethod
+    def _splice(node: Node, replacement: Node, tree: BinaryTree):
+        """Put replacement (a descendant of node) in node's place"""
+        parent = node.parent
+        replacement.parent = parent
+        if parent is None:
+            tree.root = replacement
+        elif parent.left_child is node:
+            parent.left_child = replacement
+        else:
+            parent.right_child = replacement
+
+    @staticmethod
+    def _lifted(leaf: Node) -> Tuple[Optional[Node], Optional[Node]]:
+        """
+        What removing a leaf changes: the question that goes and the branch taking its place
+
+        A question left without answers goes too, so the climb continues past
+        questions whose only child is on the removed path.
+
+        Returns:
+            (question, replacement), or (None, None) if the leaf is the whole tree
+        """
+        node, parent = leaf, leaf.parent
+        while parent is not None:
+            sibling = parent.right_child if parent.left_child is node else parent.left_child
+            if sibling is not None:
+                return parent, sibling
+            node, parent = parent, parent.parent
+        return None, None
+
+    @staticmethod
+    def _leaf_names(node: Node) -> Dict[str, int]:
+        """Count leaves per normalized animal name in a subtree"""
+        counts: Dict[str, int] = {}
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if current.is_leaf:
+                key = BinaryTree.normalize_name(current.data)
+                counts[key] = counts.get(key, 0) + 1
+            stack.extend(child for child in (current.left_child, current.right_child) if child is not None)
+        return counts
+
+    def _prune_repeated_questions(self, tree: BinaryTree) -> int:
+        """
+        Replace questions already answered higher up by their live branch
+
+        Args:
+            tree: Working copy to edit in place
+
+        Returns:
+            Number of question nodes removed
+        """
+        live: Dict[str, int] = {}
+        for leaf in tree.get_animal_leaves():
+            key = BinaryTree.normalize_name(leaf.data)
+            live[key] = live.get(key, 0) + 1
+
+        removed = 0
+        answers: Dict[str, Optional[bool]] = {}
+        # Events: ('enter', node), ('set', question, answer) before a branch,
+        # ('set', question, previous) once both branches are done
+        stack: List[tuple] = [('enter', tree.root)]
+        while stack:
+            event = stack.pop()
+            if event[0] == 'set':
+                if event[2] is None:
+                    answers.pop(event[1], None)
+                else:
+                    answers[event[1]] = event[2]
+                continue
+
+            node = event[1]
+            if node.is_leaf:
+                continue
+            question = BinaryTree.normalize_name(node.data)
+            if question in answers:
+                live_child, dead_child = ((node.left_child, node.right_child) if answers[question]
+                                          else (node.right_child, node.left_child))
+                dead = self._leaf_names(dead_child) if dead_child is not None else {}
+                # Keep the node if the dead branch holds the last leaf of some animal
+                if live_child is not None and all(live[key] > count for key, count in dead.items()):
+                    for key, count in dead.items():
+                        live[key] -= count
+                    self._splice(node, live_child, tree)
+                    removed += 1
+                    stack.append(('enter', live_child))
+                    continue
+
+            stack.append(('set', question, answers.get(question)))
+            if node.right_child is not None:
+                stack.append(('enter', node.right_child))
+                stack.append(('set', question, False))
+            if node.left_child is not None:
+                stack.append(('enter', node.left_child))
+                stack.append(('set', question, True))
+        return removed
+
+    def _merge_duplicates(self, tree: BinaryTree) -> int:
+        """
+        Keep one leaf per animal, choosing the copy that minimizes weighted depth
+
+        Removing a copy lifts its sibling subtree one level, so the kept leaf
+        trades the animal's own depth against the weight of those siblings.
+        Animals are merged one at a time; depths, indexes and weights are
+        recomputed after every merge, since it moved subtrees that may hold
+        copies of the next animal.
+
+        Args:
+            tree: Working copy with fresh indexes, edited in place
+
+        Returns:
+            Number of leaves removed
+        """
+        duplicated = [key for key, leaves in tree._animal_index.items() if len(leaves) > 1]
+        weights = self._subtree_weights(tree)
+        removed = 0
+        for key in duplicated:
+            leaves = tree._animal_index.get(key, [])
+            if len(leaves) < 2:
+                continue
+            weight = self._animal_weight(leaves[0].data)
+            gains = [weights.get(self._lifted(leaf)[1], 0.0) for leaf in leaves]
+            total_gain = sum(gains)
+            keep = min(range(len(leaves)),
+                       key=lambda i: weight * leaves[i].depth - (total_gain - gains[i]))
+            for position, leaf in enumerate(leaves):
+                question, replacement = self._lifted(leaf)
+                if position == keep or question is None:
+                    continue
+                self._splice(question, replacement, tree)
+                removed += 1
+            tree.rebuild_indexes()
+            weights = self._subtree_weights(tree)
+        return removed
+
+    def _subtree_weights(self, tree: BinaryTree) -> Dict[Node, float]:
+        """Frequency weight below every node; copies of an animal share its weight"""
+        weights: Dict[Node, float] = {}
+        if tree.root is None:
+            return weights
+        order = []
+        stack = [tree.root]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(child for child in (node.left_child, node.right_child) if child is not None)
+        # Reversed preorder visits children before their parent
+        for node in reversed(order):
+            if node.is_leaf:
+                copies = len(tree.find_animal_leaves(node.data)) or 1
+                weights[node] = self._animal_weight(node.data) / copies
+            else:
+                weights[node] = weights.get(node.left_child, 0.0) + weights.get(node.right_child, 0.0)
+        return weights
+
+    def _measure(self, tree: BinaryTree) -> Dict[str, Any]:
+        """
+        Measure the expected game length of a tree
+
+        Returns:
+            Dictionary with average_depth, weighted_average_depth, height and total_nodes
+        """
+        statistics = tree.get_statistics()
+        total_weight = 0.0
+        weighted_depth = 0.0
+        for leaves in tree._animal_index.values():
+            weight = self._animal_weight(leaves[0].data)
+            total_weight += weight
+            weighted_depth += weight * sum(leaf.depth for leaf in leaves) / len(leaves)
+        return {
+            'average_depth': statistics['average_depth'],
+            'weighted_average_depth': round(weighted_depth / total_weight, 4) if total_weight else 0,
+            'height': statistics['height'],
+            'total_nodes': statistics['total_nodes']
+        }
+
+    def optimize(self, dry_run: bool = True) -> Dict[str, Any]:
+        """
+        Rebuild a copy of the tree and report the expected gain
+
+        Args:
+            dry_run: If True, only report; otherwise swap in the optimized tree when it is better
+
+        Returns:
+            Report with the before/after measurements and what was removed
+        """
+        before = self._measure(self.tree)
+        report = {
+            'dry_run': dry_run,
+            'improved': False,
+            'applied': False,
+            'animals': len(self.tree._animal_index),
+            'removed_questions': 0,
+            'merged_duplicates': 0,
+            'before': before,
+            'after': before
+        }
+        if self.tree.root is None or self.tree.root.is_leaf:
+            return report
+
+        work = BinaryTree(self._copy(self.tree.root))
+        report['removed_questions'] = self._prune_repeated_questions(work)
+        work.rebuild_indexes()
+        report['merged_duplicates'] = self._merge_duplicates(work)
+        work.rebuild_indexes()
+
+        after = self._measure(work)
+        report['after'] = after
+        report['improved'] = ((after['weighted_average_depth'], after['total_nodes'])
+                              < (before['weighted_average_depth'], before['total_nodes']))
+        if report['improved'] and not dry_run:
+            self.tree.replace_root(work.root)
+            report['applied'] = True
+        return report
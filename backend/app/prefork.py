@@ -0,0 +1,373 @@
+"""
+Pre-Forked Multi-Process Server for PseudoQui
+One writer process owns the GameManager; forked workers answer questions from the shared tree
+"""
+
+import http.client
+import logging
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+from typing import Optional, Callable, List
+
+from flask import Flask, Response, jsonify, request
+from flask_cors import CORS
+from werkzeug.serving import make_server
+
+from . import api
+from .compact_tree import NO_NODE
+from .sessions import SessionRegistry, SessionRecord
+from .shared_tree import SharedTreeWriter, SharedTreeReader, SharedSessionTable, SlotState
+from .tree import BinaryTree
+
+
+# Connection-level headers that are not forwarded between worker and writer
+_HOP_BY_HOP = frozenset({'connection', 'keep-alive', 'transfer-encoding', 'content-length', 'host'})
+
+
+class SharedSessionRegistry(SessionRegistry):
+    """
+    Session registry of the writer process, backed by a SharedSessionTable.
+
+    Every session owns a slot of the table; workers record answers there
+    directly. Whenever the writer looks a session up, its cursor and
+    question count are rebuilt from the slot (the path code resolved on the
+    current tree), so guess results, learning and ending a game see the
+    answers given to any worker.
+    """
+
+    def __init__(self, table: SharedSessionTable, tree: Callable[[], BinaryTree], **kwargs):
+        """
+        Initialize the registry
+
+        Args:
+            table: Shared table (one slot per session)
+            tree: Returns the tree the cursors are rebuilt on
+            **kwargs: SessionRegistry options (max_sessions is capped below the table size)
+        """
+        kwargs['max_sessions'] = min(kwargs.get('max_sessions', table.slots - 1), table.slots - 1)
+        super().__init__(**kwargs)
+        self.table = table
+        self.tree = tree
+
+    def create(self, cursor, game) -> SessionRecord:
+        with self._lock:  # Slot allocation and eviction must not interleave
+            return super().create(cursor, game)
+
+    def _new_id(self) -> str:
+        session_id = self.table.allocate(self.clock())
+        if session_id is None:
+            raise RuntimeError(f"All {self.table.slots} shared session slots are in use")
+        return session_id
+
+    def get(self, session_id: Optional[str]) -> Optional[SessionRecord]:
+        """Look up a live session with its cursor synced from the shared slot (see SessionRegistry.get)"""
+        with self._lock:
+            record = super().get(session_id)
+            if record is not None:
+                self._sync(record)
+            return record
+
+    def remove(self, session_id: str) -> bool:
+        with self._lock:
+            removed = super().remove(session_id)
+            if removed:
+                self.table.free(session_id)
+            return removed
+
+    def _refresh(self, record: SessionRecord) -> bool:
+        state = self.table.read(record.session_id)
+        if state is None or state.last_access <= record.last_access:
+            return False
+        record.last_access = state.last_access
+        return True
+
+    def _sync(self, record: SessionRecord):
+        """Rebuild the cursor and question count of a record from its slot"""
+        state = self.table.read(record.session_id)
+        if state is None:
+            return
+        tree = self.tree()
+        cursor = record.cursor
+        cursor.root = tree.root
+        cursor.node = tree.resolve_path_code(state.path_code, state.depth)
+        if cursor.node is None:  # The path left the tree (e.g. after a rollback)
+            cursor.node, cursor.history = tree.root, []
+        else:
+            cursor.history = [(step['question'], step['answer'] == 'Yes')
+                              for step in tree.decode_path_code(state.path_code, state.depth, tree.root)]
+        record.game.questions_asked = state.questions
+
+
+class TreePublisher:
+    """
+    WSGI middleware publishing the manager's tree whenever its root changed.
+
+    The writer app is served through it: the tree is published after the
+    app built its response and before the response is sent, so a learned
+    animal is visible to every worker by the time the player sees the
+    learn request succeed.
+    """
+
+    def __init__(self, wsgi_app, writer: SharedTreeWriter, tree: Callable[[], BinaryTree]):
+        """
+        Initialize the middleware
+
+        Args:
+            wsgi_app: Writer app (api.app)
+            writer: Shared tree to publish to
+            tree: Returns the tree to publish
+        """
+        self.wsgi_app = wsgi_app
+        self.writer = writer
+        self.tree = tree
+        self._published = None
+        self._lock = threading.Lock()
+
+    def publish(self) -> int:
+        """Publish the current root if it is new; returns the published generation"""
+        with self._lock:  # Read the root inside the lock so versions are never published out of order
+            root = self.tree().root
+            if root is not self._published:
+                self.writer.publish(root)
+                self._published = root
+            return self.writer.generation
+
+    def __call__(self, environ, start_response):
+        body = self.wsgi_app(environ, start_response)
+        self.publish()
+        return body
+
+
+def create_worker_app(tree: SharedTreeReader, table: SharedSessionTable, writer_port: int,
+                      writer_host: str = '127.0.0.1') -> Flask:
+    """
+    Build the Flask app run by each worker process
+
+    /api/game/answer and /api/game/answers are served from the shared tree
+    and session table; every other request is forwarded to the writer.
+
+    Args:
+        tree: Reader of the published tree
+        table: Shared session table
+        writer_port: Port of the writer's internal server
+        writer_host: Host of the writer's internal server
+
+    Returns:
+        The worker app
+    """
+    worker = Flask(__name__)
+    CORS(worker)
+    connections = threading.local()
+
+    def forward():
+        """Send the current request to the writer and relay its response"""
+        headers = {name: value for name, value in request.headers.items() if name.lower() not in _HOP_BY_HOP}
+        target = request.full_path if request.query_string else request.path
+        body = request.get_data()
+        for attempt in range(2):  # A kept-alive connection may have been closed by the writer
+            connection = getattr(connections, 'writer', None)
+            if connection is None:
+                connection = connections.writer = http.client.HTTPConnection(writer_host, writer_port)
+            try:
+                connection.request(request.method, target, body, headers)
+                reply = connection.getresponse()
+                content = reply.read()
+                break
+            except (http.client.HTTPException, OSError):
+                connection.close()
+                connections.writer = None
+                if attempt:
+                    raise
+        return Response(content, status=reply.status,
+                        headers=[(name, value) for name, value in reply.getheaders()
+                                 if name.lower() not in _HOP_BY_HOP])
+
+    def advance(session_id: str, answers: List[bool], with_path: bool):
+        """Apply answers to a game's slot; returns the response (see api.process_answer)"""
+        state = table.read(session_id)
+        if state is None:
+            return api.expired_session(KeyError(f"Unknown or expired session: {session_id}"))
+
+        version = tree.refresh()
+        node = state.node
+        if state.generation != version.generation or node == NO_NODE:
+            node = version.resolve_path_code(state.path_code, state.depth)
+        path_code, depth = state.path_code, state.depth
+        for answer in answers:
+            if node == NO_NODE:
+                return jsonify({
+                    'success': False,
+                    'message': 'The tree was changed by another game meanwhile, please play again'
+                }), 409
+            # Same moves as BinaryTree.answer_question: a guess stays where it is
+            if not version.is_leaf(node):
+                if answer:
+                    path_code |= 1 << depth
+                depth += 1
+                node = version.child(node, answer)
+
+        questions = state.questions + len(answers)
+        table.update(session_id, SlotState(version.generation, node, questions, depth, path_code,
+                                           time.monotonic()))
+
+        reached_leaf = node != NO_NODE and version.is_leaf(node)
+        response_data = {
+            'success': True,
+            'questions_asked': questions,
+            'reached_guess': reached_leaf
+        }
+        if with_path:
+            response_data['path'] = version.decode_path_code(path_code, depth)
+        if reached_leaf:
+            response_data['guess'] = version.get_data(node)
+        else:
+            response_data['question'] = version.get_data(node)
+        return jsonify(response_data), 200
+
+    @worker.route('/api/game/answer', methods=['POST'])
+    def process_answer():
+        """Answer the current question of a game (see api.process_answer)"""
+        try:
+            data = request.get_json()
+            answer = data.get('answer', '').strip().lower()
+            session_id = api.get_session_id(data)
+            if session_id is None:
+                return api.missing_session()
+
+            if answer not in ['yes', 'no', 'oui', 'non', 'y', 'n', 'o']:
+                return jsonify({
+                    'success': False,
+                    'message': 'Invalid answer. Please answer with yes or no.'
+                }), 400
+
+            return advance(session_id, [answer in ['yes', 'oui', 'o', 'y']], with_path=False)
+        except Exception as e:
+            return jsonify({
+                'success': False,
+                'message': f'Error processing answer: {str(e)}'
+            }), 500
+
+    @worker.route('/api/game/answers', methods=['POST'])
+    def process_answers():
+        """Answer several questions of a game at once (see api.process_answers)"""
+        try:
+            data = request.get_json()
+            session_id = api.get_session_id(data)
+            if session_id is None:
+                return api.missing_session()
+
+            answers = api.parse_answers(data.get('answers'))
+            if answers is None:
+                return jsonify({
+                    'success': False,
+                    'message': 'Invalid answers. Send a list of yes/no or a string of y/n (or 1/0).'
+                }), 400
+
+            answer_bools = [answer in ['yes', 'oui', 'o', 'y'] for answer in answers]
+            return advance(session_id, answer_bools, with_path=True)
+        except Exception as e:
+            return jsonify({
+                'success': False,
+                'message': f'Error processing answers: {str(e)}'
+            }), 500
+
+    @worker.route('/api/game/start', methods=['POST'])
+    def start_game():
+        """Start or restart a game on the writer, then put its slot back at the root"""
+        response = forward()
+        data = response.get_json(silent=True) or {}
+        if response.status_code == 200 and data.get('session_id'):
+            table.update(data['session_id'], SlotState(0, NO_NODE, 0, 0, 0, time.monotonic()))
+        return response
+
+    @worker.route('/', defaults={'path': ''}, methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'])
+    @worker.route('/<path:path>', methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'])
+    def proxy(path):
+        """Everything else is handled by the writer"""
+        return forward()
+
+    return worker
+
+
+def run_worker(listener: socket.socket, tree_path: str, table_path: str, writer_port: int):
+    """Serve the worker app on an inherited listening socket (does not return)"""
+    tree = SharedTreeReader(tree_path)
+    table = SharedSessionTable(table_path)
+    host, port = listener.getsockname()[:2]
+    server = make_server(host, port, create_worker_app(tree, table, writer_port),
+                         threaded=True, fd=listener.fileno())
+    server.serve_forever()
+
+
+def serve(host: str = '0.0.0.0', port: int = 5000, workers: Optional[int] = None,
+          shared_dir: Optional[str] = None, slots: int = 10000):
+    """
+    Run the API with one writer and several worker processes
+
+    The writer is api.app with api.game_manager, served on an internal
+    loopback port; workers share the public socket, answer questions from
+    the published tree and forward every other request to the writer.
+    Needs os.fork (Linux, macOS).
+
+    Args:
+        host: Public interface
+        port: Public port
+        workers: Worker processes (default: one per CPU)
+        shared_dir: Directory for the shared tree and session table (default: a new one in /dev/shm)
+        slots: Sessions the shared table holds
+    """
+    if not hasattr(os, 'fork'):
+        raise RuntimeError("--workers needs os.fork (Linux or macOS)")
+    workers = workers or os.cpu_count() or 1
+    owns_shared_dir = shared_dir is None
+    if owns_shared_dir:
+        shared_dir = tempfile.mkdtemp(prefix='pseudoqui-', dir='/dev/shm' if os.path.isdir('/dev/shm') else None)
+    os.makedirs(shared_dir, exist_ok=True)
+    tree_path = os.path.join(shared_dir, 'tree.bin')
+    table_path = os.path.join(shared_dir, 'sessions.bin')
+
+    manager = api.game_manager
+    publisher = TreePublisher(api.app, SharedTreeWriter(tree_path), lambda: manager.tree)
+    publisher.publish()
+    table = SharedSessionTable(table_path, slots=slots, create=True)
+    manager.sessions = SharedSessionRegistry(table, lambda: manager.tree)
+
+    # Bind everything before forking; the writer starts its threads afterwards
+    listener = socket.create_server((host, port), backlog=4096)
+    listener.set_inheritable(True)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    internal = make_server('127.0.0.1', 0, publisher, threaded=True)
+
+    children: List[int] = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            internal.socket.close()
+            try:
+                run_worker(listener, tree_path, table_path, internal.server_port)
+            finally:
+                os._exit(0)
+        children.append(pid)
+    listener.close()
+
+    def stop(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in children:
+            os.waitpid(pid, 0)
+        if owns_shared_dir:
+            shutil.rmtree(shared_dir, ignore_errors=True)
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    internal.serve_forever()
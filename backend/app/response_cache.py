@@ -0,0 +1,91 @@
+"""
+Version-Keyed Response Cache
+Keeps encoded response bodies of read endpoints until the data they were built from changes
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+
+class ResponseCache:
+    """
+    LRU cache of encoded response bodies.
+
+    A key names the endpoint, its arguments and the versions of the data
+    the body is built from (tree epoch and version, history version, stats
+    time bucket). Entries are never invalidated explicitly: a learn, a
+    finished game or a guess result moves a version, so later requests use
+    a new key and the old entry ages out. The ETag is derived from the key
+    alone, so a request whose If-None-Match matches is answered without
+    building or even looking up the body.
+
+    Callers read the versions for the key before building the body, so an
+    entry may hold data newer than its key but never older.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: Optional[int] = 32 * 1024 * 1024):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Bodies kept at most
+            max_bytes: Total size of the kept bodies (None for no cap)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Hashable, bytes]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def etag(key: Hashable) -> str:
+        """Entity tag of the body cached under key"""
+        return hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:20]
+
+    def get(self, key: Hashable, build: Callable[[], bytes]) -> bytes:
+        """
+        Get a cached body, building and storing it on a miss
+
+        Args:
+            key: Endpoint, arguments and data versions
+            build: Returns the encoded body (called without the lock held)
+
+        Returns:
+            The body
+        """
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return body
+            self.misses += 1
+
+        body = build()
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = body
+                self._bytes += len(body)
+                self._evict()
+        return body
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _evict(self):
+        """Drop least recently used entries over the limits (caller holds the lock)"""
+        while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)):
+            _, body = self._entries.popitem(last=False)
+            self._bytes -= len(body)
@@ -0,0 +1,213 @@
+"""
+Compact Game Session Storage
+Epoch-millisecond times and a columnar container (with interned animal names) for bulk history
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from datetime import datetime
+from itertools import compress
+from threading import Lock
+from typing import Optional, Dict, Any, List, Iterable, Iterator
+
+
+def to_epoch_ms(moment: datetime) -> int:
+    """Convert a (naive, local) datetime to integer epoch milliseconds"""
+    return round(moment.timestamp() * 1000)
+
+
+def from_epoch_ms(milliseconds: int) -> datetime:
+    """Convert integer epoch milliseconds back to a naive local datetime"""
+    return datetime.fromtimestamp(milliseconds / 1000)
+
+
+class NameTable:
+    """
+    Interned animal names: each distinct name is stored once and referred to by ID.
+
+    ID 0 is the empty string, so a session with no animal costs nothing extra.
+    Known names are looked up without locking; adding one takes a lock.
+    """
+    __slots__ = ('_ids', '_names', '_lock')
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {"": 0}
+        self._names: List[str] = [""]
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def intern(self, name: Optional[str]) -> int:
+        """Return the ID of a name, adding it if new"""
+        name = name or ""
+        name_id = self._ids.get(name)
+        if name_id is None:
+            with self._lock:
+                name_id = self._ids.get(name)
+                if name_id is None:
+                    self._names.append(name)  # Before the ID is visible to lock-free readers
+                    name_id = self._ids[name] = len(self._names) - 1
+        return name_id
+
+    def name(self, name_id: int) -> str:
+        """Return the name with an ID"""
+        return self._names[name_id]
+
+
+_CORRECT = 1
+_LEARNED = 2
+
+
+class SessionColumns:
+    """
+    Finished games stored column by column in typed arrays.
+
+    One game costs 8 + 8 + 4 + 4 + 4 + 1 bytes (start, end, questions,
+    guessed and actual animal IDs, flags) instead of a GameSession object.
+    Rows are kept in the order they were added, which for the history log
+    is end-time order, so time ranges are found by binary search. Animal
+    names are interned in the container's own table, which is released
+    with it.
+    """
+
+    def __init__(self, names: Optional[NameTable] = None):
+        """
+        Initialize an empty container
+
+        Args:
+            names: Table the animal IDs refer to (default: a new one)
+        """
+        self.names = names if names is not None else NameTable()
+        self.start_ms = array('q')
+        self.end_ms = array('q')  # -1 for a game that never ended
+        self.questions = array('I')
+        self.guessed = array('I')
+        self.actual = array('I')
+        self.flags = bytearray()  # Bit 0: guessed correctly, bit 1: learned a new animal
+        self.open_rows = 0  # Rows with end_ms -1, which break the end-time order
+
+    def __len__(self) -> int:
+        return len(self.flags)
+
+    def __iter__(self) -> Iterator[Any]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def __getitem__(self, index: int):
+        """Rebuild the GameSession of one row"""
+        from .game_manager import GameSession
+
+        session = GameSession()
+        session._start_ms = self.start_ms[index]
+        end = self.end_ms[index]
+        session._end_ms = end if end >= 0 else None
+        session.questions_asked = self.questions[index]
+        session.animal_guessed = self.names.name(self.guessed[index])
+        session.animal_actual = self.names.name(self.actual[index])
+        session.guessed_correctly = bool(self.flags[index] & _CORRECT)
+        session.learned_new_animal = bool(self.flags[index] & _LEARNED)
+        return session
+
+    def append(self, session: Any):
+        """
+        Add a GameSession
+
+        Args:
+            session: Finished GameSession
+        """
+        self.start_ms.append(session._start_ms)
+        self.end_ms.append(session._end_ms if session._end_ms is not None else -1)
+        self.open_rows += session._end_ms is None
+        self.questions.append(session.questions_asked)
+        self.guessed.append(self.names.intern(session.animal_guessed))
+        self.actual.append(self.names.intern(session.animal_actual))
+        self.flags.append((_CORRECT if session.guessed_correctly else 0)
+                          | (_LEARNED if session.learned_new_animal else 0))
+
+    def extend_records(self, records: Iterable[Dict[str, Any]]):
+        """
+        Add stored game dictionaries (GameSession.to_dict shape) without building sessions
+
+        Args:
+            records: Game dictionaries, e.g. from HistoryLog.iter_records
+        """
+        intern = self.names.intern
+        for item in records:
+            self.start_ms.append(to_epoch_ms(datetime.fromisoformat(item['start_time'])))
+            end = item.get('end_time')
+            self.end_ms.append(to_epoch_ms(datetime.fromisoformat(end)) if end else -1)
+            self.open_rows += not end
+            self.questions.append(item['questions_asked'])
+            self.guessed.append(intern(item['animal_guessed']))
+            self.actual.append(intern(item['animal_actual']))
+            self.flags.append((_CORRECT if item['guessed_correctly'] else 0)
+                              | (_LEARNED if item['learned_new_animal'] else 0))
+
+    def between(self, since: Optional[datetime] = None,
+                until: Optional[datetime] = None) -> 'SessionColumns':
+        """
+        Rows that ended in a time range (finished rows must be in end-time order)
+
+        Games that never ended are left out. Without them the range is found
+        by binary search; otherwise the end times are scanned.
+
+        Args:
+            since: Only games that ended at or after this time
+            until: Only games that ended at or before this time
+
+        Returns:
+            A new container with copies of those rows
+        """
+        part = SessionColumns(self.names)
+        columns = ('start_ms', 'end_ms', 'questions', 'guessed', 'actual', 'flags')
+        if not self.open_rows:
+            low = bisect_left(self.end_ms, to_epoch_ms(since)) if since is not None else 0
+            high = bisect_right(self.end_ms, to_epoch_ms(until)) if until is not None else len(self)
+            for column in columns:
+                setattr(part, column, getattr(self, column)[low:high])
+            return part
+
+        low_ms = to_epoch_ms(since) if since is not None else 0
+        high_ms = to_epoch_ms(until) if until is not None else float('inf')
+        rows = [index for index, end in enumerate(self.end_ms) if end >= 0 and low_ms <= end <= high_ms]
+        for column in columns:
+            values = getattr(self, column)
+            picked = [values[index] for index in rows]
+            setattr(part, column, bytearray(picked) if column == 'flags' else array(values.typecode, picked))
+        return part
+
+    def totals(self) -> Dict[str, int]:
+        """
+        Count games, correct guesses, questions and learned animals
+
+        Returns:
+            Dictionary with games, correct, questions and learned
+        """
+        flag_counts = Counter(self.flags)
+        return {
+            'games': len(self),
+            'correct': flag_counts[_CORRECT] + flag_counts[_CORRECT | _LEARNED],
+            'questions': sum(self.questions),
+            'learned': flag_counts[_LEARNED] + flag_counts[_CORRECT | _LEARNED]
+        }
+
+    def animal_counts(self) -> Dict[str, int]:
+        """
+        Count games per player's animal (the guess when right, the answer otherwise)
+
+        Returns:
+            Dictionary of animal name -> number of games
+        """
+        correct = [flag & _CORRECT for flag in self.flags]
+        counts = Counter(compress(self.guessed, correct))
+        counts.update(compress(self.actual, [not flag for flag in correct]))
+        counts.pop(0, None)
+        return {self.names.name(name_id): count for name_id, count in counts.items()}
+
+    def nbytes(self) -> int:
+        """Bytes used by the column buffers"""
+        return sum(column.itemsize * len(column)
+                   for column in (self.start_ms, self.end_ms, self.questions, self.guessed, self.actual)
+                   ) + len(self.flags)
@@ -0,0 +1,171 @@
+"""
+Session Registry for Concurrent Games
+Keeps one tree cursor and GameSession per player, with TTL and LRU eviction
+"""
+
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional, Any, Callable, Iterator
+
+from .tree import TreeCursor
+
+
+_ANSWER_BYTES = sys.getsizeof(("", True))
+
+
+class SessionRecord:
+    """
+    Per-player game state: position in the tree and the GameSession being scored
+
+    GameManager holds lock while it advances or ends the game, so two
+    requests for the same player run one after the other.
+    """
+    __slots__ = ('session_id', 'cursor', 'game', 'last_access', 'size', 'lock')
+
+    def __init__(self, session_id: str, cursor: TreeCursor, game: Any, now: float):
+        self.session_id = session_id
+        self.cursor = cursor
+        self.game = game
+        self.last_access = now
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def estimate_size(self) -> int:
+        """Approximate bytes held by this record"""
+        game = self.game
+        game_size = sys.getsizeof(game) + (sys.getsizeof(game.__dict__) if hasattr(game, '__dict__') else 0)
+        history = self.cursor.history
+        return (sys.getsizeof(self) + sys.getsizeof(self.cursor) + game_size
+                + sys.getsizeof(history) + len(history) * _ANSWER_BYTES)
+
+
+class SessionRegistry:
+    """
+    Bounded map of session ID -> SessionRecord.
+
+    Records are kept in access order, so the least recently used session is
+    always first: expired sessions are dropped from the front on every
+    insert, then the oldest ones go until both the session limit and the
+    memory cap hold. Sizes are estimates refreshed whenever a record is read.
+    All methods may be called from several threads.
+    """
+
+    def __init__(self, ttl: float = 1800, max_sessions: int = 10000,
+                 max_bytes: Optional[int] = 64 * 1024 * 1024,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the registry
+
+        Args:
+            ttl: Seconds of inactivity before a session expires
+            max_sessions: Maximum number of live sessions
+            max_bytes: Approximate memory cap for all records (None for no cap)
+            clock: Time source in seconds
+        """
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self._records: 'OrderedDict[str, SessionRecord]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()  # Guards the records and the byte count
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def __iter__(self) -> Iterator[SessionRecord]:
+        with self._lock:
+            return iter(list(self._records.values()))
+
+    def create(self, cursor: TreeCursor, game: Any) -> SessionRecord:
+        """
+        Register a new session under a fresh random ID
+
+        Args:
+            cursor: Tree cursor of the new game
+            game: GameSession to score the game
+
+        Returns:
+            The new record
+        """
+        record = SessionRecord(self._new_id(), cursor, game, self.clock())
+        record.size = record.estimate_size()
+        with self._lock:
+            self._records[record.session_id] = record
+            self._bytes += record.size
+            self._evict()
+        return record
+
+    def get(self, session_id: Optional[str]) -> Optional[SessionRecord]:
+        """
+        Look up a live session and mark it as recently used
+
+        Args:
+            session_id: ID returned by create
+
+        Returns:
+            The record, or None if unknown or expired
+        """
+        with self._lock:
+            record = self._records.get(session_id)
+            if record is None:
+                return None
+            now = self.clock()
+            self._refresh(record)
+            if now - record.last_access > self.ttl:
+                self.remove(session_id)
+                return None
+
+            record.last_access = now
+            self._records.move_to_end(session_id)
+            size = record.estimate_size()
+            self._bytes += size - record.size
+            record.size = size
+            return record
+
+    def remove(self, session_id: str) -> bool:
+        """Drop a session; returns False if it was not registered"""
+        with self._lock:
+            record = self._records.pop(session_id, None)
+            if record is None:
+                return False
+            self._bytes -= record.size
+            return True
+
+    def _new_id(self) -> str:
+        """ID for a new session"""
+        return uuid.uuid4().hex
+
+    def _refresh(self, record: SessionRecord) -> bool:
+        """
+        Update a record from state kept outside the registry (caller holds the lock)
+
+        Returns:
+            True if the record was used more recently than last_access said
+        """
+        return False
+
+    def memory_usage(self) -> int:
+        """Approximate bytes held by all records"""
+        return self._bytes
+
+    def _evict(self):
+        """Drop expired sessions, then least recently used ones over the limits (caller holds the lock)"""
+        now = self.clock()
+        records = self._records
+        while len(records) > 1:  # The newest record always stays
+            oldest = next(iter(records.values()))
+            if self._refresh(oldest):
+                records.move_to_end(oldest.session_id)
+                continue
+            over_limit = (len(records) > self.max_sessions
+                          or (self.max_bytes is not None and self._bytes > self.max_bytes))
+            if not over_limit and now - oldest.last_access <= self.ttl:
+                break
+            self.remove(oldest.session_id)
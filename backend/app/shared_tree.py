@@ -0,0 +1,334 @@
+"""
+Shared-Memory Tree and Session Table for Multi-Process Serving
+Publishes the tree as memory-mapped CompactTree arrays, versioned by a shared generation counter
+"""
+
+import mmap
+import os
+import struct
+import uuid
+from typing import Optional, NamedTuple, Tuple, List, Dict
+
+from .node import Node
+from .compact_tree import CompactTree, NO_NODE
+
+
+MAGIC = b'PQSM'
+FORMAT_VERSION = 1
+
+# magic, format version, flags, generation, nodes, strings, string blob bytes, root index
+_HEADER = struct.Struct('<4sHHQIIIi')
+_COUNTER = struct.Struct('<Q')
+
+
+def _padded(data: bytes) -> bytes:
+    """Pad a section to a multiple of 4 bytes so the next one stays aligned"""
+    return data + bytes(-len(data) % 4)
+
+
+def encode_tree(root: Node, generation: int) -> bytes:
+    """
+    Lay out a tree as flat arrays (see SharedTreeVersion)
+
+    Args:
+        root: Root of the tree version to publish
+        generation: Generation number stored in the header
+
+    Returns:
+        The file contents
+    """
+    compact = CompactTree(root)
+    nodes = len(compact.text)
+    return b''.join((
+        _HEADER.pack(MAGIC, FORMAT_VERSION, 0, generation, nodes, len(compact.string_offsets) - 1,
+                     len(compact.string_blob), compact.root),
+        compact.left.tobytes(),
+        compact.right.tobytes(),
+        compact.text.tobytes(),
+        compact.string_offsets.tobytes(),
+        _padded(bytes(compact.leaf_bits[:(nodes + 7) // 8])),
+        bytes(compact.string_blob)
+    ))
+
+
+class SharedTreeVersion:
+    """
+    One published tree, read in place from a read-only memory map.
+
+    Layout after the header: left and right child indexes, string index per
+    node (int32 each), string offsets (uint32, strings + 1), leaf bitmap,
+    UTF-8 string blob. Navigation reads the arrays through memoryviews, so
+    every process mapping the file shares one copy of the tree.
+    """
+
+    def __init__(self, path: str):
+        """
+        Map a tree file
+
+        Args:
+            path: File written by SharedTreeWriter
+
+        Raises:
+            ValueError: If the file is not a shared tree
+        """
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.generation, nodes, strings, blob, self.root = _HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a shared tree (format {version})")
+        self.node_count = nodes
+        view = memoryview(self._map)
+        offset = _HEADER.size
+        sections = []
+        for length in (nodes, nodes, nodes, strings + 1):
+            sections.append(view[offset:offset + 4 * length].cast('i' if len(sections) < 3 else 'I'))
+            offset += 4 * length
+        self.left, self.right, self.text, self.string_offsets = sections
+        leaf_bytes = (nodes + 7) // 8
+        self.leaf_bits = view[offset:offset + leaf_bytes]
+        offset += leaf_bytes + (-leaf_bytes % 4)
+        self.string_blob = view[offset:offset + blob]
+
+    def is_leaf(self, index: int) -> bool:
+        """Whether a node is an animal"""
+        return bool(self.leaf_bits[index >> 3] >> (index & 7) & 1)
+
+    def get_data(self, index: int) -> str:
+        """Question or animal name of a node ("" for NO_NODE)"""
+        if index == NO_NODE:
+            return ""
+        string_id = self.text[index]
+        start, end = self.string_offsets[string_id], self.string_offsets[string_id + 1]
+        return bytes(self.string_blob[start:end]).decode('utf-8')
+
+    def child(self, index: int, answer: bool) -> int:
+        """The "Yes" (left) or "No" (right) child of a node"""
+        return self.left[index] if answer else self.right[index]
+
+    def resolve_path_code(self, path_code: int, depth: int) -> int:
+        """
+        Find the node reached by a path code (see BinaryTree.resolve_path_code)
+
+        Returns:
+            Node index, or NO_NODE if the path leaves the tree
+        """
+        index = self.root
+        for level in range(depth):
+            if index == NO_NODE or self.is_leaf(index):
+                return NO_NODE
+            index = self.child(index, bool(path_code >> level & 1))
+        return index
+
+    def decode_path_code(self, path_code: int, depth: int) -> List[Dict[str, str]]:
+        """
+        Questions and answers a path code stands for (see BinaryTree.decode_path_code)
+
+        Raises:
+            ValueError: If the path leaves the tree
+        """
+        path = []
+        index = self.root
+        for level in range(depth):
+            if index == NO_NODE or self.is_leaf(index):
+                raise ValueError(f"Path code {path_code:#x} leaves the tree at depth {level}")
+            answer = bool(path_code >> level & 1)
+            path.append({'question': self.get_data(index), 'answer': 'Yes' if answer else 'No'})
+            index = self.child(index, answer)
+        return path
+
+
+class SharedTreeWriter:
+    """
+    Publishes tree versions for SharedTreeReader processes.
+
+    Each version is written to a temporary file and renamed over the tree
+    file; only then is the generation counter (an 8-byte memory-mapped file
+    next to it) incremented. Readers that still map an older file keep it
+    until they refresh.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open the counter, creating it if needed
+
+        Args:
+            path: Tree file (the counter is path + '.gen')
+        """
+        self.path = path
+        counter_path = path + '.gen'
+        if not os.path.exists(counter_path):
+            with open(counter_path, 'wb') as f:
+                f.write(_COUNTER.pack(0))
+        with open(counter_path, 'r+b') as f:
+            self._counter = mmap.mmap(f.fileno(), _COUNTER.size)
+        self.generation = _COUNTER.unpack_from(self._counter)[0]
+
+    def publish(self, root: Node) -> int:
+        """
+        Publish a tree version
+
+        Args:
+            root: Root of the version
+
+        Returns:
+            Its generation number
+        """
+        generation = self.generation + 1
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(encode_tree(root, generation))
+        os.replace(temp_path, self.path)
+        _COUNTER.pack_into(self._counter, 0, generation)
+        self.generation = generation
+        return generation
+
+
+class SharedTreeReader:
+    """
+    Read side of a published tree: maps the latest version on demand
+    """
+
+    def __init__(self, path: str):
+        """
+        Map the counter and the current version
+
+        Args:
+            path: Tree file written by SharedTreeWriter
+        """
+        self.path = path
+        with open(path + '.gen', 'rb') as f:
+            self._counter = mmap.mmap(f.fileno(), _COUNTER.size, access=mmap.ACCESS_READ)
+        self.version = SharedTreeVersion(path)
+
+    def refresh(self) -> SharedTreeVersion:
+        """
+        The current version, re-mapped only if the generation counter moved
+
+        Returns:
+            A version to use for the whole request (it stays valid after later publishes)
+        """
+        if _COUNTER.unpack_from(self._counter)[0] != self.version.generation:
+            self.version = SharedTreeVersion(self.path)
+        return self.version
+
+
+class SlotState(NamedTuple):
+    """Navigation state of one game in the shared session table"""
+    generation: int  # Tree generation node refers to
+    node: int  # Node index in that generation (NO_NODE: resolve path_code instead)
+    questions: int  # Questions answered
+    depth: int  # Answers encoded in path_code
+    path_code: int  # Answer bitmask (bit i set for "Yes" at depth i)
+    last_access: float  # time.monotonic() of the last answer
+
+
+class SharedSessionTable:
+    """
+    Fixed-size table of game positions in a shared memory-mapped file.
+
+    Slot i belongs to session IDs of the form '{i:06x}{nonce}'; the 16-byte
+    nonce is stored in the slot so a reused slot never answers for an old
+    session. Only the writer process allocates and frees slots; any worker
+    can read and update a live one. A player's requests are expected one at
+    a time (the frontend waits for each answer), so slots are not locked.
+    """
+
+    def __init__(self, path: str, slots: int = 10000, max_depth: int = 256, create: bool = False):
+        """
+        Map the table
+
+        Args:
+            path: Table file
+            slots: Number of sessions it holds
+            max_depth: Longest game it can store (bits of path code per slot)
+            create: Create (or clear) the file
+        """
+        self.path = path
+        self.slots = slots
+        self.max_depth = max_depth
+        self._slot = struct.Struct(f'<16sQiIHxxd{(max_depth + 7) // 8}s')
+        if create:
+            with open(path, 'wb') as f:
+                f.truncate(self._slot.size * slots)
+        with open(path, 'r+b') as f:
+            self._map = mmap.mmap(f.fileno(), self._slot.size * slots)
+        self._next_free = 0
+
+    @staticmethod
+    def session_id(slot: int, nonce: bytes) -> str:
+        """Session ID for a slot and nonce"""
+        return f"{slot:06x}{nonce.hex()}"
+
+    @staticmethod
+    def parse_session_id(session_id: Optional[str]) -> Optional[Tuple[int, bytes]]:
+        """Slot and nonce of a session ID, or None if it is not one of ours"""
+        try:
+            return int(session_id[:6], 16), bytes.fromhex(session_id[6:])
+        except (TypeError, ValueError):
+            return None
+
+    def _nonce_at(self, slot: int) -> bytes:
+        offset = slot * self._slot.size
+        return bytes(self._map[offset:offset + 16])
+
+    def allocate(self, now: float) -> Optional[str]:
+        """
+        Claim a free slot for a new game at the root (writer process only)
+
+        Args:
+            now: Current time.monotonic()
+
+        Returns:
+            The new session ID, or None if every slot is taken
+        """
+        empty = bytes(16)
+        for step in range(self.slots):
+            slot = (self._next_free + step) % self.slots
+            if self._nonce_at(slot) == empty:
+                nonce = uuid.uuid4().bytes
+                self._next_free = slot + 1
+                self.write(slot, nonce, SlotState(0, NO_NODE, 0, 0, 0, now))
+                return self.session_id(slot, nonce)
+        return None
+
+    def free(self, session_id: str):
+        """Release the slot of a session (writer process only)"""
+        parsed = self.parse_session_id(session_id)
+        if parsed is not None and 0 <= parsed[0] < self.slots and self._nonce_at(parsed[0]) == parsed[1]:
+            offset = parsed[0] * self._slot.size
+            self._map[offset:offset + self._slot.size] = bytes(self._slot.size)
+
+    def read(self, session_id: Optional[str]) -> Optional[SlotState]:
+        """State of a live session, or None if the ID is unknown or its slot was reused"""
+        parsed = self.parse_session_id(session_id)
+        if parsed is None or not 0 <= parsed[0] < self.slots or len(parsed[1]) != 16:
+            return None
+        nonce, generation, node, questions, depth, last_access, path = \
+            self._slot.unpack_from(self._map, parsed[0] * self._slot.size)
+        if nonce != parsed[1] or nonce == bytes(16):
+            return None
+        return SlotState(generation, node, questions, depth, int.from_bytes(path, 'little'), last_access)
+
+    def update(self, session_id: str, state: SlotState) -> bool:
+        """
+        Store the state of a live session
+
+        Returns:
+            False if the session is unknown or its slot was reused
+
+        Raises:
+            ValueError: If the game is deeper than max_depth
+        """
+        parsed = self.parse_session_id(session_id)
+        if parsed is None or self.read(session_id) is None:
+            return False
+        self.write(parsed[0], parsed[1], state)
+        return True
+
+    def write(self, slot: int, nonce: bytes, state: SlotState):
+        """Overwrite a slot"""
+        if state.depth > self.max_depth:
+            raise ValueError(f"Game is deeper than the session table allows ({self.max_depth})")
+        path = state.path_code.to_bytes((self.max_depth + 7) // 8, 'little')
+        self._slot.pack_into(self._map, slot * self._slot.size, nonce, state.generation, state.node,
+                             state.questions, state.depth, state.last_access, path)
@@ -0,0 +1,326 @@
+"""
+Binary Tree Snapshots for PseudoQui
+Saves and loads the decision tree in a compact, checksummed binary format
+"""
+
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from itertools import chain
+from typing import Optional, Dict, List, Tuple
+
+from .node import Node
+from . import deep_json
+
+
+SNAPSHOT_MAGIC = b'PQTS'
+SNAPSHOT_VERSION = 2
+
+# magic, format version, flags
+_PREFIX = struct.Struct('<4sHH')
+# Per format version: node count, string count[, last journal sequence folded in]
+_COUNTS = {1: struct.Struct('<II'), 2: struct.Struct('<IIQ')}
+_CHECKSUM = struct.Struct('<I')
+
+# 2-bit structure codes, one per node in preorder (Yes branch first)
+LEAF = 0
+BOTH_CHILDREN = 1
+YES_ONLY = 2
+NO_ONLY = 3
+
+# Byte -> the four codes packed in it, lowest bits first
+_UNPACK = [tuple((byte >> shift) & 3 for shift in (0, 2, 4, 6)) for byte in range(256)]
+
+
+class SnapshotError(ValueError):
+    """Raised when a snapshot is truncated, corrupted or of an unknown version"""
+
+
+def _to_little_endian(values: array) -> bytes:
+    """Raw bytes of an array in little-endian order"""
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian(typecode: str, data: bytes) -> array:
+    """Array of typecode read from little-endian bytes"""
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def encode(root: Optional[Node], sequence: int = 0) -> bytes:
+    """
+    Encode a Node graph as a snapshot in one preorder pass
+
+    Layout (little-endian): header, string table (offsets + UTF-8 blob),
+    one string index and one node ID per node, the structure bitstream
+    (2 bits per node), then a CRC32 of everything before it.
+
+    Args:
+        root: Root of the tree (None for an empty tree)
+        sequence: Last journal record already applied to this tree
+
+    Returns:
+        Snapshot bytes
+
+    Raises:
+        ValueError: If a question node has no answers (it cannot be encoded)
+    """
+    strings: Dict[str, int] = {}
+    offsets = array('I', [0])
+    blob = bytearray()
+    texts = array('I')
+    ids = array('i')
+    codes = bytearray()
+
+    stack = [root] if root is not None else []
+    while stack:
+        node = stack.pop()
+        text = node.data
+        index = strings.get(text)
+        if index is None:
+            index = strings[text] = len(strings)
+            blob += text.encode('utf-8')
+            offsets.append(len(blob))
+        texts.append(index)
+        ids.append(node.node_id)
+
+        left, right = node.left_child, node.right_child
+        if node.is_leaf:
+            codes.append(LEAF)
+            continue
+        if left is not None and right is not None:
+            codes.append(BOTH_CHILDREN)
+            stack.append(right)
+            stack.append(left)
+        elif left is not None:
+            codes.append(YES_ONLY)
+            stack.append(left)
+        elif right is not None:
+            codes.append(NO_ONLY)
+            stack.append(right)
+        else:
+            raise ValueError(f"Question without answers cannot be saved: {text!r}")
+
+    codes += bytes(-len(codes) % 4)
+    structure = bytes(a | b << 2 | c << 4 | d << 6
+                      for a, b, c, d in zip(codes[0::4], codes[1::4], codes[2::4], codes[3::4]))
+
+    body = b''.join((
+        _PREFIX.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0),
+        _COUNTS[SNAPSHOT_VERSION].pack(len(texts), len(strings), sequence),
+        _to_little_endian(offsets),
+        bytes(blob),
+        _to_little_endian(texts),
+        _to_little_endian(ids),
+        structure
+    ))
+    return body + _CHECKSUM.pack(zlib.crc32(body))
+
+
+def _read_section(data: bytes, position: int, size: int) -> Tuple[bytes, int]:
+    """Slice size bytes at position, checking that the snapshot is long enough"""
+    end = position + size
+    if end > len(data) - _CHECKSUM.size:
+        raise SnapshotError("Snapshot is truncated")
+    return data[position:end], end
+
+
+def decode(data: bytes) -> Optional[Node]:
+    """
+    Decode snapshot bytes back into a Node graph in one pass
+
+    Args:
+        data: Bytes produced by encode
+
+    Returns:
+        Root node (None for an empty tree)
+
+    Raises:
+        SnapshotError: If the data is not a valid snapshot
+    """
+    return decode_checkpoint(data)[0]
+
+
+def decode_checkpoint(data: bytes) -> Tuple[Optional[Node], int]:
+    """
+    Decode snapshot bytes into a Node graph and its journal sequence
+
+    Args:
+        data: Bytes produced by encode (any supported format version)
+
+    Returns:
+        Tuple of (root node or None, last journal sequence folded in)
+
+    Raises:
+        SnapshotError: If the data is not a valid snapshot
+    """
+    if len(data) < _PREFIX.size + _CHECKSUM.size:
+        raise SnapshotError("Snapshot is truncated")
+    (checksum,) = _CHECKSUM.unpack_from(data, len(data) - _CHECKSUM.size)
+    if zlib.crc32(memoryview(data)[:len(data) - _CHECKSUM.size]) != checksum:
+        raise SnapshotError("Snapshot checksum mismatch")
+
+    magic, version, _flags = _PREFIX.unpack_from(data, 0)
+    if magic != SNAPSHOT_MAGIC:
+        raise SnapshotError("Not a tree snapshot")
+    if version not in _COUNTS:
+        raise SnapshotError(f"Unsupported snapshot version {version}")
+
+    raw, position = _read_section(data, _PREFIX.size, _COUNTS[version].size)
+    counts = _COUNTS[version].unpack(raw)
+    node_count, string_count = counts[:2]
+    sequence = counts[2] if len(counts) > 2 else 0
+    raw, position = _read_section(data, position, 4 * (string_count + 1))
+    offsets = _from_little_endian('I', raw)
+    blob, position = _read_section(data, position, offsets[-1])
+    strings = [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(string_count)]
+    raw, position = _read_section(data, position, 4 * node_count)
+    texts = _from_little_endian('I', raw)
+    raw, position = _read_section(data, position, 4 * node_count)
+    ids = _from_little_endian('i', raw)
+    structure, position = _read_section(data, position, (node_count + 3) // 4)
+    if position != len(data) - _CHECKSUM.size:
+        raise SnapshotError("Snapshot has trailing data")
+    if node_count == 0:
+        return None, sequence
+
+    root = None
+    pending: List[Tuple[Node, bool]] = []  # (parent, is Yes branch) still waiting for a child
+    codes = chain.from_iterable(map(_UNPACK.__getitem__, structure))
+    try:
+        for text, node_id, code in zip(texts, ids, codes):
+            node = Node(strings[text], is_leaf=code == LEAF, node_id=node_id)
+            if pending:
+                parent, is_yes = pending.pop()
+                node.parent = parent
+                if is_yes:
+                    parent.left_child = node
+                else:
+                    parent.right_child = node
+            elif root is None:
+                root = node
+            else:
+                raise SnapshotError("Snapshot structure is inconsistent")
+
+            if code == BOTH_CHILDREN:
+                pending.append((node, False))
+                pending.append((node, True))
+            elif code == YES_ONLY:
+                pending.append((node, True))
+            elif code == NO_ONLY:
+                pending.append((node, False))
+    except IndexError:
+        raise SnapshotError("Snapshot references a missing string") from None
+    if pending:
+        raise SnapshotError("Snapshot structure is inconsistent")
+    return root, sequence
+
+
+def is_snapshot(path: str) -> bool:
+    """Check whether a file starts with the snapshot magic bytes"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(SNAPSHOT_MAGIC)) == SNAPSHOT_MAGIC
+    except OSError:
+        return False
+
+
+def _write_atomic(path: str, data: bytes):
+    """Write data to a temporary file next to path, then rename it over path"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.snapshot')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def save(root: Optional[Node], path: str, sequence: int = 0):
+    """
+    Write a tree snapshot to a file
+
+    The file is replaced atomically, so a crash never leaves half a snapshot.
+
+    Args:
+        root: Root of the tree
+        path: Destination file
+        sequence: Last journal record already applied to this tree
+    """
+    _write_atomic(path, encode(root, sequence))
+
+
+def load(path: str) -> Optional[Node]:
+    """
+    Read a tree snapshot from a file
+
+    Args:
+        path: Snapshot file
+
+    Returns:
+        Root node (None for an empty tree)
+
+    Raises:
+        SnapshotError: If the file is not a valid snapshot
+    """
+    return load_checkpoint(path)[0]
+
+
+def load_checkpoint(path: str) -> Tuple[Optional[Node], int]:
+    """
+    Read a tree snapshot and the journal sequence it covers
+
+    Args:
+        path: Snapshot file
+
+    Returns:
+        Tuple of (root node or None, last journal sequence folded in)
+
+    Raises:
+        SnapshotError: If the file is not a valid snapshot
+    """
+    with open(path, 'rb') as f:
+        return decode_checkpoint(f.read())
+
+
+def export_json(snapshot_path: str, json_path: str):
+    """
+    Convert a snapshot file to the nested JSON format (with node IDs)
+
+    Args:
+        snapshot_path: Snapshot to read
+        json_path: JSON file to write
+    """
+    root = load(snapshot_path)
+    os.makedirs(os.path.dirname(json_path) or ".", exist_ok=True)
+    with open(json_path, 'w', encoding='utf-8') as f:
+        deep_json.dump(root.to_dict(include_ids=True) if root is not None else None,
+                       f, ensure_ascii=False, indent=2)
+
+
+def import_json(json_path: str, snapshot_path: str):
+    """
+    Convert a nested JSON tree file to a snapshot file
+
+    Args:
+        json_path: JSON file written by export_json or an older save_tree
+        snapshot_path: Snapshot file to write
+    """
+    with open(json_path, 'r', encoding='utf-8') as f:
+        root = Node.from_dict(deep_json.load(f))
+    save(root, snapshot_path)
@@ -0,0 +1,414 @@
+"""
+SQLite Storage Engine for PseudoQui
+Keeps the tree, game history and animal statistics as rows in one WAL-mode database
+"""
+
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Iterable, Iterator, Tuple
+
+from .node import Node
+from .animal_store import AnimalStore
+from .history_log import HistoryAggregates
+from .session_store import to_epoch_ms, from_epoch_ms
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS nodes (
+    id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL,
+    is_leaf INTEGER NOT NULL,
+    left_id INTEGER,
+    right_id INTEGER
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    start_ms INTEGER NOT NULL,
+    end_ms INTEGER,
+    questions INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    learned INTEGER NOT NULL,
+    animal_guessed TEXT NOT NULL,
+    animal_actual TEXT NOT NULL,
+    animal TEXT
+);
+CREATE INDEX IF NOT EXISTS sessions_end ON sessions (end_ms);
+CREATE INDEX IF NOT EXISTS sessions_animal ON sessions (animal);
+CREATE TABLE IF NOT EXISTS history_totals (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    games INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    questions INTEGER NOT NULL,
+    learned INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO history_totals VALUES (1, 0, 0, 0, 0);
+CREATE TABLE IF NOT EXISTS animal_games (
+    name TEXT PRIMARY KEY,
+    games INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS animals (
+    name TEXT PRIMARY KEY,
+    yes_percentage REAL NOT NULL
+);
+"""
+
+
+class SQLiteDatabase:
+    """
+    One SQLite connection shared by the tree, history and animal stores.
+
+    - nodes: one row per node of the current tree, linked by child IDs; a
+      learn rewrites the guessed leaf as the new question (it keeps its node
+      ID) and inserts the two leaves, so it touches three rows
+    - sessions: one row per finished game, indexed by end time and by the
+      player's animal; history_totals and animal_games hold running counters
+      updated in the same transaction
+    - animals: yes percentage per animal
+
+    The connection is used from request threads and the animal flusher, so
+    every call takes a lock.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open (and create if needed) the database
+
+        Args:
+            path: Database file
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.RLock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+
+    def _transaction(self, statements: Iterable[Tuple]) -> int:
+        """
+        Run statements in one transaction
+
+        Args:
+            statements: (sql, parameters) pairs; a list of parameter tuples runs
+                executemany. A third item is the number of rows the statement
+                must change, or the whole transaction is rolled back.
+
+        Returns:
+            Number of rows changed
+
+        Raises:
+            sqlite3.IntegrityError: If a statement changed an unexpected number of rows
+        """
+        with self._lock:
+            before = self.connection.total_changes
+            self.connection.execute('BEGIN IMMEDIATE')
+            try:
+                for sql, parameters, *expected in statements:
+                    if isinstance(parameters, list):
+                        cursor = self.connection.executemany(sql, parameters)
+                    else:
+                        cursor = self.connection.execute(sql, parameters)
+                    if expected and cursor.rowcount != expected[0]:
+                        raise sqlite3.IntegrityError(
+                            f"Expected {expected[0]} changed rows, got {cursor.rowcount}: {sql}")
+                self.connection.execute('COMMIT')
+            except BaseException:
+                self.connection.execute('ROLLBACK')
+                raise
+            return self.connection.total_changes - before
+
+    def _query(self, sql: str, parameters: Tuple = ()) -> List[Tuple]:
+        """Run a query and fetch every row"""
+        with self._lock:
+            return self.connection.execute(sql, parameters).fetchall()
+
+    def load_tree(self) -> Optional[Node]:
+        """
+        Rebuild the tree from its rows
+
+        Returns:
+            Root node, or None if no tree was saved
+        """
+        root_row = self._query("SELECT value FROM meta WHERE key = 'root_id'")
+        if not root_row:
+            return None
+        rows = self._query('SELECT id, data, is_leaf, left_id, right_id FROM nodes')
+        nodes = {row[0]: Node(row[1], is_leaf=bool(row[2]), node_id=row[0]) for row in rows}
+        for node_id, _, _, left_id, right_id in rows:
+            node = nodes[node_id]
+            if left_id is not None:
+                node.left_child = nodes[left_id]
+                node.left_child.parent = node
+            if right_id is not None:
+                node.right_child = nodes[right_id]
+                node.right_child.parent = node
+        return nodes.get(int(root_row[0][0]))
+
+    @staticmethod
+    def _node_rows(root: Node) -> List[Tuple]:
+        """Rows of every node under root, without recursion"""
+        rows = []
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            left, right = node.left_child, node.right_child
+            rows.append((node.node_id, node.data, int(node.is_leaf),
+                         left.node_id if left is not None else None,
+                         right.node_id if right is not None else None))
+            stack.extend(child for child in (left, right) if child is not None)
+        return rows
+
+    def save_tree(self, root: Node):
+        """
+        Replace the stored tree (nodes must have their IDs assigned)
+
+        Args:
+            root: Root of the tree
+        """
+        self._transaction([
+            ('DELETE FROM nodes', ()),
+            ('INSERT INTO nodes VALUES (?, ?, ?, ?, ?)', self._node_rows(root)),
+            ("INSERT OR REPLACE INTO meta VALUES ('root_id', ?)", (str(root.node_id),))
+        ])
+
+    def record_learn(self, question: Node) -> int:
+        """
+        Store a learned animal: the question that replaced a leaf and its two leaves
+
+        Args:
+            question: New question node (with the replaced leaf's node ID)
+
+        Returns:
+            Number of rows changed (3)
+
+        Raises:
+            sqlite3.IntegrityError: If the replaced leaf is not stored (nothing is written)
+        """
+        yes, no = question.left_child, question.right_child
+        return self._transaction([
+            ('UPDATE nodes SET data = ?, is_leaf = 0, left_id = ?, right_id = ? WHERE id = ?',
+             (question.data, yes.node_id, no.node_id, question.node_id), 1),
+            ('INSERT INTO nodes VALUES (?, ?, 1, NULL, NULL)', [(yes.node_id, yes.data), (no.node_id, no.data)])
+        ])
+
+    def insert_sessions(self, records: List[Dict[str, Any]]):
+        """
+        Add finished games and update the running counters, in one transaction
+
+        Args:
+            records: Games in the GameSession.to_dict shape, oldest first
+        """
+        rows = []
+        totals = HistoryAggregates()
+        for record in records:
+            animal = record['animal_guessed'] if record['guessed_correctly'] else record['animal_actual']
+            end = record.get('end_time')
+            rows.append((to_epoch_ms(datetime.fromisoformat(record['start_time'])),
+                         to_epoch_ms(datetime.fromisoformat(end)) if end else None,
+                         record['questions_asked'], int(record['guessed_correctly']),
+                         int(record['learned_new_animal']), record['animal_guessed'] or "",
+                         record['animal_actual'] or "", animal or None))
+            totals.add(record)
+        self._transaction([
+            ('INSERT INTO sessions (start_ms, end_ms, questions, correct, learned, animal_guessed, '
+             'animal_actual, animal) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows),
+            ('UPDATE history_totals SET games = games + ?, correct = correct + ?, '
+             'questions = questions + ?, learned = learned + ? WHERE id = 1',
+             (totals.games, totals.correct, totals.questions, totals.learned)),
+            ('INSERT INTO animal_games VALUES (?, ?) '
+             'ON CONFLICT (name) DO UPDATE SET games = games + excluded.games',
+             list(totals.animals.items()))
+        ])
+
+    def load_totals(self) -> HistoryAggregates:
+        """Read the running history counters"""
+        aggregates = HistoryAggregates()
+        games, correct, questions, learned = self._query(
+            'SELECT games, correct, questions, learned FROM history_totals WHERE id = 1')[0]
+        aggregates.games, aggregates.correct = games, correct
+        aggregates.questions, aggregates.learned = questions, learned
+        aggregates.animals = dict(self._query('SELECT name, games FROM animal_games'))
+        return aggregates
+
+    def iter_sessions(self, since: Optional[datetime] = None,
+                      until: Optional[datetime] = None, batch: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Stream stored games in a time range through the end-time index
+
+        Args:
+            since: Only games that ended at or after this time
+            until: Only games that ended at or before this time
+            batch: Rows fetched per round trip
+
+        Yields:
+            Games in the GameSession.to_dict shape, oldest first
+        """
+        columns = 'id, start_ms, end_ms, questions, correct, learned, animal_guessed, animal_actual'
+        if since is None and until is None:
+            sql = f'SELECT {columns} FROM sessions WHERE id > ? ORDER BY id LIMIT ?'
+            position: Tuple = (0,)
+        else:
+            # Keyset pagination over the (end_ms, id) order of the end-time index
+            sql = (f'SELECT {columns} FROM sessions WHERE end_ms BETWEEN ? AND ? '
+                   'AND (end_ms, id) > (?, ?) ORDER BY end_ms, id LIMIT ?')
+            low = to_epoch_ms(since) if since is not None else -2 ** 63
+            high = to_epoch_ms(until) if until is not None else 2 ** 63 - 1
+            position = (low, high, low, 0)
+        while True:
+            rows = self._query(sql, position + (batch,))
+            for row in rows:
+                yield {
+                    'questions_asked': row[3],
+                    'start_time': from_epoch_ms(row[1]).isoformat(),
+                    'end_time': from_epoch_ms(row[2]).isoformat() if row[2] is not None else None,
+                    'guessed_correctly': bool(row[4]),
+                    'animal_guessed': row[6],
+                    'animal_actual': row[7],
+                    'learned_new_animal': bool(row[5])
+                }
+            if len(rows) < batch:
+                return
+            last = rows[-1]
+            position = (last[0],) if len(position) == 1 else position[:2] + (last[2], last[0])
+
+    def clear_sessions(self):
+        """Delete every game and reset the counters"""
+        self._transaction([
+            ('DELETE FROM sessions', ()),
+            ('UPDATE history_totals SET games = 0, correct = 0, questions = 0, learned = 0', ()),
+            ('DELETE FROM animal_games', ())
+        ])
+
+    def load_animals(self) -> List[Dict[str, Any]]:
+        """Read the animal statistics"""
+        return [{'name': name, 'yes_percentage': yes_percentage}
+                for name, yes_percentage in self._query('SELECT name, yes_percentage FROM animals ORDER BY rowid')]
+
+    def upsert_animals(self, rows: List[Tuple[str, float]]):
+        """Write (name, yes_percentage) rows in one transaction"""
+        self._transaction([('INSERT OR REPLACE INTO animals VALUES (?, ?)', rows)])
+
+    def close(self):
+        """Close the connection"""
+        with self._lock:
+            self.connection.close()
+
+
+class SQLiteHistory:
+    """
+    Game history in the sessions table, with the same interface GameManager uses on HistoryLog
+    """
+
+    def __init__(self, database: SQLiteDatabase):
+        """
+        Read the running counters (games themselves are streamed on demand)
+
+        Args:
+            database: Open database
+        """
+        self.database = database
+        self.aggregates = database.load_totals()
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.iter_records()
+
+    def append(self, record: Dict[str, Any]):
+        """Store one finished game and update the counters"""
+        self.database.insert_sessions([record])
+        self.aggregates.add(record)
+
+    def iter_records(self, since: Optional[datetime] = None,
+                     until: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        """Stream games in a time range, oldest first"""
+        return self.database.iter_sessions(since, until)
+
+    def import_records(self, records: Iterable[Dict[str, Any]]):
+        """Store many games in one transaction"""
+        records = list(records)
+        self.database.insert_sessions(records)
+        for record in records:
+            self.aggregates.add(record)
+
+    def flush_aggregates(self):
+        """Counters are committed with every game; nothing to write"""
+
+    def segments(self) -> List[str]:
+        """The database has no log segments"""
+        return []
+
+    def clear(self):
+        """Delete every game"""
+        self.database.clear_sessions()
+        self.aggregates = HistoryAggregates()
+
+
+class SQLiteAnimalStore(AnimalStore):
+    """
+    AnimalStore kept in the animals table: flushes upsert only the changed rows
+    """
+
+    def __init__(self, database: SQLiteDatabase, flush_interval: float = 5.0,
+                 flush_threshold: int = 50):
+        """
+        Load the animal statistics
+
+        Args:
+            database: Open database
+            flush_interval: Seconds between background writes while dirty
+            flush_threshold: Animals with pending updates that trigger a write right away
+        """
+        self.database = database
+        super().__init__(database.path, flush_interval, flush_threshold)
+
+    def _load(self) -> Dict[str, Any]:
+        self._exists = True
+        return {'animals': self.database.load_animals()}
+
+    def _prepare(self, names: set) -> List[Tuple[str, float]]:
+        return [(name, self._index[name]['yes_percentage']) for name in names]
+
+    def _write(self, payload: List[Tuple[str, float]]):
+        self.database.upsert_animals(payload)
+
+
+def migrate_to_sqlite(database: SQLiteDatabase, root: Node,
+                      history_records: Iterable[Dict[str, Any]],
+                      animals: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Copy a tree, game history and animal statistics into an empty database
+
+    Args:
+        database: Database to fill
+        root: Root of the tree (with node IDs assigned)
+        history_records: Games in the GameSession.to_dict shape, oldest first
+        animals: Entries of animals.json
+
+    Returns:
+        Number of nodes, sessions and animals copied
+    """
+    if database.load_tree() is not None or database.load_totals().games:
+        raise ValueError(f"Database {database.path} already holds data")
+    database.save_tree(root)
+    sessions = 0
+    batch: List[Dict[str, Any]] = []
+    for record in history_records:
+        batch.append(record)
+        if len(batch) == 1000:
+            database.insert_sessions(batch)
+            sessions += len(batch)
+            batch = []
+    if batch:
+        database.insert_sessions(batch)
+        sessions += len(batch)
+    database.upsert_animals([(a['name'], a.get('yes_percentage', 50)) for a in animals])
+    return {
+        'nodes': len(database._query('SELECT id FROM nodes')),
+        'sessions': sessions,
+        'animals': len(animals)
+    }
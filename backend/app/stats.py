@@ -0,0 +1,157 @@
+"""
+Rolling Game Statistics
+Ring-buffer windows over recent games, updated in O(1) per finished game
+"""
+
+import threading
+import time
+from array import array
+from typing import Optional, Dict, Any, Callable, Iterable, Tuple
+
+
+class RollingWindow:
+    """
+    Games, correct guesses and questions over the last `span` seconds.
+
+    The span is split into a ring of fixed-width buckets. A bucket is reused
+    (and its counts subtracted from the running totals) once time moves a
+    full span past it, so recording and reading both cost O(1) amortized;
+    nothing is rescanned per request. Totals are exact to one bucket width.
+    """
+
+    def __init__(self, span: float, buckets: int = 60):
+        """
+        Initialize the window
+
+        Args:
+            span: Length of the window in seconds
+            buckets: Number of buckets in the ring
+        """
+        self.span = span
+        self.width = span / buckets
+        self.games = array('q', bytes(8 * buckets))
+        self.correct = array('q', bytes(8 * buckets))
+        self.questions = array('q', bytes(8 * buckets))
+        self.total_games = 0
+        self.total_correct = 0
+        self.total_questions = 0
+        self._current = None  # Index (time // width) of the newest bucket
+
+    def _advance(self, now: float) -> int:
+        """Expire buckets that fell out of the window; returns the current bucket index"""
+        index = int(now // self.width)
+        current = self._current
+        if current is None:
+            self._current = index
+            return index
+        if index <= current:
+            return current
+        size = len(self.games)
+        for expired in range(current + 1, min(index, current + size) + 1):
+            slot = expired % size
+            self.total_games -= self.games[slot]
+            self.total_correct -= self.correct[slot]
+            self.total_questions -= self.questions[slot]
+            self.games[slot] = self.correct[slot] = self.questions[slot] = 0
+        self._current = index
+        return index
+
+    def record(self, when: float, correct: bool, questions: int):
+        """
+        Count one finished game
+
+        Args:
+            when: End time of the game in seconds since the epoch
+            correct: Whether the guess was right
+            questions: Questions asked in the game
+        """
+        current = self._advance(when)
+        index = int(when // self.width)
+        if index <= current - len(self.games):
+            return  # Older than the window
+        slot = index % len(self.games)
+        self.games[slot] += 1
+        self.total_games += 1
+        if correct:
+            self.correct[slot] += 1
+            self.total_correct += 1
+        self.questions[slot] += questions
+        self.total_questions += questions
+
+    def summary(self, now: float) -> Dict[str, Any]:
+        """
+        Totals over the window ending at now
+
+        Returns:
+            Dictionary with games, correct_guesses, success_rate and average_questions_per_game
+        """
+        self._advance(now)
+        games = self.total_games
+        return {
+            'games': games,
+            'correct_guesses': self.total_correct,
+            'success_rate': round(self.total_correct / games * 100, 2) if games else 0,
+            'average_questions_per_game': round(self.total_questions / games, 2) if games else 0
+        }
+
+
+class GameStatistics:
+    """
+    Rolling windows over the last 5 minutes, hour and day
+
+    Reading moves the windows forward too, so recording and reading take a
+    lock of their own; it is held only for the in-memory update.
+    """
+
+    WINDOWS: Tuple[Tuple[str, float], ...] = (('5m', 5 * 60), ('1h', 3600), ('1d', 24 * 3600))
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        """
+        Initialize the windows
+
+        Args:
+            clock: Time source in seconds since the epoch
+        """
+        self.clock = clock
+        self.windows = {name: RollingWindow(span) for name, span in self.WINDOWS}
+        self._lock = threading.Lock()
+
+    @property
+    def longest_span(self) -> float:
+        """Span of the largest window, in seconds"""
+        return max(window.span for window in self.windows.values())
+
+    def record(self, correct: bool, questions: int, when: Optional[float] = None):
+        """
+        Count one finished game in every window
+
+        Args:
+            correct: Whether the guess was right
+            questions: Questions asked in the game
+            when: End time in seconds since the epoch (default: now)
+        """
+        if when is None:
+            when = self.clock()
+        with self._lock:
+            for window in self.windows.values():
+                window.record(when, correct, questions)
+
+    def record_all(self, games: Iterable[Tuple[float, bool, int]]):
+        """Count (end time, correct, questions) tuples, oldest first"""
+        for when, correct, questions in games:
+            self.record(correct, questions, when)
+
+    def bucket(self) -> int:
+        """
+        Index of the current bucket of the finest window
+
+        Every window's bucket width is a multiple of the finest one, so
+        summary() only changes when this moves or a game is recorded.
+        """
+        return int(self.clock() // min(window.width for window in self.windows.values()))
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Totals of every window, keyed by window name"""
+        now = self.clock()
+        with self._lock:
+            return {name: window.summary(now) for name, window in self.windows.items()}
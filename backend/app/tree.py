@@ -3,8 +3,29 @@ Binary Tree Data Structure and Game Logic for PseudoQui
 Implements the core decision tree for the guessing game with learning capabilities
 """
 
-from typing import Optional, Tuple, Dict, List, Any
+import os
+import uuid
+from collections import deque
+from itertools import islice
+from typing import Optional, Tuple, Dict, List, Any, Iterator
 from .node import Node
+from .animal_store import AnimalStore, get_default_store
+
+
+class TreeCursor:
+    """
+    Position of one game in the tree: the current node and the answers so far
+    
+    Navigation methods of BinaryTree take an optional cursor, so any number
+    of games can walk the same tree independently. root is the version the
+    game started on, which a persistent tree leaves untouched.
+    """
+    __slots__ = ('node', 'history', 'root')
+    
+    def __init__(self, root: Optional[Node] = None):
+        self.root = root
+        self.node = root
+        self.history: List[Tuple[str, bool]] = []  # (question, answer) pairs
 
 
 class BinaryTree:
@@ -14,22 +35,196 @@ class BinaryTree:
     The tree uses a simple convention:
     - Left child: response "Yes" to the parent's question
     - Right child: response "No" to the parent's question
+    
+    Size and depth statistics are kept as running aggregates, animals are
+    indexed by normalized name and every node carries its path code (the
+    answers leading to it as a bitmask), a stable ID and the node/leaf
+    counts of its subtree; learn_new_animal updates all of them in
+    O(depth), so reading them never walks the tree.
+    
+    In persistent mode nodes are never modified once published: learning
+    copies the path from the root to the guessed leaf (O(depth) new nodes)
+    and publishes the new root with a single assignment, so a reader that
+    took self.root keeps a consistent version. Every version stays
+    addressable by number for diffs and rollback. Shared subtrees keep the
+    parent links of the version that created them, so persistent trees
+    locate ancestors through path codes instead.
     """
     
-    def __init__(self, root: Optional[Node] = None):
+    # Cross-check the cached statistics against a full recount on every read
+    debug_statistics = os.environ.get('PSEUDOQUI_DEBUG_STATS', '') == '1'
+    
+    # Latest versions whose roots (rollback, diff_versions) and changes
+    # (changes_since) are kept; older roots are dropped
+    change_log_size = 1000
+    
+    def __init__(self, root: Optional[Node] = None, persistent: bool = False):
         """
         Initialize the tree with optional root node
         
         Args:
             root: Root node of the tree (if None, creates a basic tree)
+            persistent: Learn by path copying and keep every version
         """
         if root is None:
             self.root = self._create_default_tree()
         else:
             self.root = root
         
-        self.current_node = self.root
-        self.game_history = []  # Track questions asked in current game
+        self.persistent = persistent
+        self.version = 0
+        self.epoch = uuid.uuid4().hex[:12]  # Version numbers are only comparable within one epoch
+        self._versions: Dict[int, Node] = {0: self.root}  # Version number -> root, oldest first
+        self._head: Tuple[int, Node] = (0, self.root)  # Replaced as a whole, see head()
+        self._changes: deque = deque(maxlen=self.change_log_size)  # One entry per version, oldest first
+        self.cursor = TreeCursor(self.root)  # Used when no cursor is passed
+        self.animal_store: Optional[AnimalStore] = None  # None: the shared data/animals.json store
+        self._next_id = 0
+        self.rebuild_indexes()
+    
+    @property
+    def current_node(self) -> Optional[Node]:
+        """Current node of the default cursor"""
+        return self.cursor.node
+    
+    @current_node.setter
+    def current_node(self, node: Optional[Node]):
+        self.cursor.node = node
+    
+    @property
+    def game_history(self) -> List[Tuple[str, bool]]:
+        """Questions answered with the default cursor in the current game"""
+        return self.cursor.history
+    
+    @game_history.setter
+    def game_history(self, history: List[Tuple[str, bool]]):
+        self.cursor.history = history
+    
+    def new_cursor(self) -> TreeCursor:
+        """Create a cursor at the root of the current version for a new game"""
+        return TreeCursor(self.root)
+    
+    def rebuild_indexes(self):
+        """
+        Recompute the cached statistics, indexes, path codes and subtree counts
+        
+        Needed only if nodes are edited directly instead of through learn_new_animal.
+        Nodes keep their IDs; nodes without one (or with a duplicate) get new IDs.
+        """
+        self._node_count = 0
+        self._leaf_count = 0
+        self._leaf_depth_sum = 0
+        self._depth_histogram: List[int] = []  # Number of nodes at each depth
+        animal_index: Dict[str, Tuple[Node, ...]] = {}  # Normalized name -> leaves
+        self._nodes_by_id: Dict[int, Node] = {}  # Node ID -> node of the current version
+        
+        # Preorder, yes-branch first, so the index lists animals left to right
+        order = []
+        stack = [(self.root, 0, 0)] if self.root is not None else []
+        while stack:
+            node, depth, code = stack.pop()
+            order.append(node)
+            node.depth, node.path_code = depth, code
+            self._count_new_node(depth, node.is_leaf)
+            if node.is_leaf:
+                self._index_animal(animal_index, node)
+            if node.node_id >= 0 and node.node_id not in self._nodes_by_id:
+                self._nodes_by_id[node.node_id] = node
+            self._next_id = max(self._next_id, node.node_id + 1)
+            if node.right_child is not None:
+                stack.append((node.right_child, depth + 1, code))
+            if node.left_child is not None:
+                stack.append((node.left_child, depth + 1, code | (1 << depth)))
+        
+        self._animal_index = animal_index  # Published whole, like each learn's copy
+        
+        for node in order:
+            if self._nodes_by_id.get(node.node_id) is not node:
+                node.node_id = self._new_id()
+                self._nodes_by_id[node.node_id] = node
+        
+        # Children follow their parent in preorder, so a reverse pass sums subtrees
+        for node in reversed(order):
+            nodes, leaves = 1, int(node.is_leaf)
+            for child in (node.left_child, node.right_child):
+                if child is not None:
+                    nodes += child.subtree_nodes
+                    leaves += child.subtree_leaves
+            node.subtree_nodes, node.subtree_leaves = nodes, leaves
+        self._snapshot_statistics()
+    
+    def _new_id(self) -> int:
+        """Allocate a node ID"""
+        node_id = self._next_id
+        self._next_id += 1
+        return node_id
+    
+    @staticmethod
+    def normalize_name(name: str) -> str:
+        """Normalize an animal name for lookups (case and spacing insensitive)"""
+        return " ".join(name.split()).casefold()
+    
+    def _index_animal(self, index: Dict[str, Tuple[Node, ...]], leaf: Node):
+        """Add a leaf to an unpublished animal index"""
+        key = self.normalize_name(leaf.data)
+        index[key] = index.get(key, ()) + (leaf,)
+    
+    def _unindex_animal(self, index: Dict[str, Tuple[Node, ...]], leaf: Node):
+        """Remove a leaf from an unpublished animal index"""
+        key = self.normalize_name(leaf.data)
+        leaves = tuple(indexed for indexed in index.get(key, ()) if indexed is not leaf)
+        if leaves:
+            index[key] = leaves
+        else:
+            index.pop(key, None)
+    
+    def _count_new_node(self, depth: int, is_leaf: bool):
+        """Add one node at the given depth to the cached statistics"""
+        self._node_count += 1
+        while len(self._depth_histogram) <= depth:
+            self._depth_histogram.append(0)
+        self._depth_histogram[depth] += 1
+        if is_leaf:
+            self._leaf_count += 1
+            self._leaf_depth_sum += depth
+    
+    def _verify_statistics(self):
+        """
+        Compare the cached statistics, animal index and path codes with a full recount
+        
+        Raises:
+            AssertionError: If any cached aggregate has drifted
+        """
+        stack = [(self.root, 0, 0)] if self.root is not None else []
+        while stack:
+            node, depth, code = stack.pop()
+            if (node.depth, node.path_code) != (depth, code):
+                raise AssertionError(f"Stale path code on {node!r}")
+            if self._nodes_by_id.get(node.node_id) is not node:
+                raise AssertionError(f"Node ID index misses {node!r}")
+            children = [child for child in (node.left_child, node.right_child) if child is not None]
+            if (node.subtree_nodes, node.subtree_leaves) != (
+                    1 + sum(child.subtree_nodes for child in children),
+                    int(node.is_leaf) + sum(child.subtree_leaves for child in children)):
+                raise AssertionError(f"Stale subtree counts on {node!r}")
+            if node.left_child is not None:
+                stack.append((node.left_child, depth + 1, code | (1 << depth)))
+            if node.right_child is not None:
+                stack.append((node.right_child, depth + 1, code))
+        
+        animals = []
+        self._collect_animals(self.root, animals)
+        if sorted(animals) != sorted(self.get_all_animals()):
+            raise AssertionError("Animal index differs from the leaves of the tree")
+        
+        height, nodes, leaves, total_depth = self._collect_metrics(self.root)
+        cached = (len(self._depth_histogram) - 1, self._node_count,
+                  self._leaf_count, self._leaf_depth_sum)
+        if cached != (height, nodes, leaves, total_depth):
+            raise AssertionError(
+                f"Cached tree statistics {cached} differ from recount "
+                f"{(height, nodes, leaves, total_depth)} (height, nodes, leaves, depth sum)"
+            )
     
     @staticmethod
     def _create_default_tree() -> Node:
@@ -244,62 +439,268 @@ class BinaryTree:
         
         return root
     
-    def reset_game(self):
+    def replace_root(self, root: Node):
+        """
+        Swap in a restructured tree (e.g. from the optimizer)
+        
+        Args:
+            root: Root of the new Node graph
+        """
+        root.parent = None
+        self._publish(root)
+        self.reset_game()
+        self.rebuild_indexes()
+    
+    def _publish(self, root: Node, change: Optional[Dict[str, Any]] = None):
+        """
+        Make root the current tree under a new version number
+        
+        Args:
+            root: Root of the new version
+            change: What changed, for changes_since (None: the whole tree was replaced)
+        """
+        version = self.version + 1
+        if not self.persistent:
+            self._versions.clear()  # Old roots were edited in place
+        self._versions[version] = root
+        while len(self._versions) > self.change_log_size:
+            del self._versions[next(iter(self._versions))]
+        self._changes.append(dict(change or {'type': 'replace'}, version=version))
+        self._head = (version, root)
+        self.version = version
+        self.root = root
+    
+    def head(self) -> Tuple[int, Node]:
+        """
+        Get the current version number together with its root
+        
+        Reading self.version and self.root separately may pair a version
+        with the root of the next one while a learn is being published;
+        the pair is published as one tuple instead.
+        
+        Returns:
+            (version, root)
+        """
+        return self._head
+    
+    def changes_since(self, since: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        List the changes that turn version since into the current version
+        
+        Args:
+            since: Version the caller holds (same epoch)
+            
+        Returns:
+            One entry per version after since, oldest first (see learn_new_animal),
+            or None if the caller must fetch the whole tree again: since is
+            unknown or older than the kept log, or a later version replaced
+            the whole tree (rollback, optimization)
+        """
+        version = self.version
+        if since > version or since < 0:
+            return None
+        changes = [change for change in self._changes.copy() if since < change['version'] <= version]
+        if len(changes) != version - since or any(change['type'] != 'learn' for change in changes):
+            return None
+        return changes
+    
+    def get_version_root(self, version: int) -> Optional[Node]:
+        """
+        Get the root of a tree version
+        
+        Args:
+            version: Version number (see list_versions)
+            
+        Returns:
+            Root node of that version, or None if it is not kept
+        """
+        return self._versions.get(version)
+    
+    def list_versions(self) -> List[int]:
+        """Get the version numbers that are still addressable, oldest first"""
+        return sorted(self._versions.copy())  # A learn may drop the oldest meanwhile
+    
+    def rollback(self, version: int) -> int:
+        """
+        Make an old version current again
+        
+        The rollback is itself a new version, so the versions after the
+        restored one stay addressable.
+        
+        Args:
+            version: Version to restore
+            
+        Returns:
+            The new version number
+            
+        Raises:
+            ValueError: If the version is not kept
+        """
+        root = self.get_version_root(version)
+        if root is None:
+            raise ValueError(f"Unknown tree version {version}")
+        self._publish(root)
+        self.reset_game()
+        self.rebuild_indexes()
+        return self.version
+    
+    def diff_versions(self, old_version: int, new_version: int) -> List[Dict[str, Any]]:
+        """
+        List the nodes that differ between two versions
+        
+        Subtrees shared by both versions are skipped without being visited,
+        so diffing consecutive persistent versions costs O(depth).
+        
+        Args:
+            old_version: Version to compare from
+            new_version: Version to compare to
+            
+        Returns:
+            One entry per changed position, with its path code, depth and
+            the node before/after ({'data', 'is_leaf'} or None)
+            
+        Raises:
+            ValueError: If either version is not kept
+        """
+        roots = []
+        for version in (old_version, new_version):
+            root = self._versions.get(version)
+            if root is None:
+                raise ValueError(f"Unknown tree version {version}")
+            roots.append(root)
+        
+        def describe(node: Optional[Node]) -> Optional[Dict[str, Any]]:
+            return {'data': node.data, 'is_leaf': node.is_leaf} if node is not None else None
+        
+        changes = []
+        stack = [(roots[0], roots[1], 0, 0)]
+        while stack:
+            old, new, depth, code = stack.pop()
+            if old is new:
+                continue
+            if old is None or new is None or old.data != new.data or old.is_leaf != new.is_leaf:
+                changes.append({
+                    'path_code': format(code, 'x'),
+                    'depth': depth,
+                    'before': describe(old),
+                    'after': describe(new)
+                })
+                if old is None or new is None or old.is_leaf or new.is_leaf:
+                    continue
+            stack.append((old.right_child, new.right_child, depth + 1, code))
+            stack.append((old.left_child, new.left_child, depth + 1, code | (1 << depth)))
+        return changes
+    
+    def _copy_path(self, leaf: Node, replacement: Node) -> Optional[Node]:
+        """
+        Build a new root in which leaf is replaced, copying only its ancestors
+        
+        Args:
+            leaf: Node of the current version to replace
+            replacement: New subtree (depth and path codes already set)
+            
+        Returns:
+            The new root, or None if leaf is no longer in the current version
+        """
+        depth, code = leaf.depth, leaf.path_code
+        ancestors = []
+        node = self.root
+        for level in range(depth):
+            if node is None or node.is_leaf:
+                return None
+            ancestors.append(node)
+            node = node.left_child if code >> level & 1 else node.right_child
+        if node is not leaf:
+            return None
+        
+        added_nodes = replacement.subtree_nodes - leaf.subtree_nodes
+        added_leaves = replacement.subtree_leaves - leaf.subtree_leaves
+        child = replacement
+        for level in range(depth - 1, -1, -1):
+            original = ancestors[level]
+            # Children are attached after construction so shared nodes keep their parent link
+            copy = Node(original.data, is_leaf=False, node_id=original.node_id)
+            copy.depth, copy.path_code = original.depth, original.path_code
+            copy.subtree_nodes = original.subtree_nodes + added_nodes
+            copy.subtree_leaves = original.subtree_leaves + added_leaves
+            self._nodes_by_id[copy.node_id] = copy
+            if code >> level & 1:
+                copy.left_child, copy.right_child = child, original.right_child
+            else:
+                copy.left_child, copy.right_child = original.left_child, child
+            child.parent = copy
+            child = copy
+        child.parent = None
+        return child
+    
+    def reset_game(self, cursor: Optional[TreeCursor] = None):
         """Reset to root node for a new game"""
-        self.current_node = self.root
-        self.game_history = []
+        if cursor is None:
+            cursor = self.cursor
+        cursor.root = cursor.node = self.root
+        cursor.history = []
     
-    def answer_question(self, answer: bool) -> bool:
+    def answer_question(self, answer: bool, cursor: Optional[TreeCursor] = None) -> bool:
         """
         Navigate the tree based on the answer to current question
         
         Args:
             answer: True for "Yes", False for "No"
+            cursor: Game to move (default: the tree's own cursor)
             
         Returns:
             True if we've reached a leaf node (guessed the animal), False otherwise
         """
-        if self.current_node.is_leaf:
+        if cursor is None:
+            cursor = self.cursor
+        node = cursor.node
+        if node.is_leaf:
             return True
         
         # Record the question in history
-        self.game_history.append((self.current_node.data, answer))
+        cursor.history.append((node.data, answer))
         
         # Navigate: Yes (True) = left, No (False) = right
-        if answer:
-            self.current_node = self.current_node.left_child
-        else:
-            self.current_node = self.current_node.right_child
+        node = node.left_child if answer else node.right_child
+        cursor.node = node
         
-        return self.current_node.is_leaf if self.current_node else False
+        return node.is_leaf if node else False
     
-    def get_current_question(self) -> str:
+    def get_current_question(self, cursor: Optional[TreeCursor] = None) -> str:
         """
         Get the current question to ask the user
         
+        Args:
+            cursor: Game to read (default: the tree's own cursor)
+        
         Returns:
             Current question string
         """
-        if not self.current_node:
+        node = (cursor or self.cursor).node
+        if not node:
             return ""
-        return self.current_node.data
+        return node.data
     
-    def get_guess(self) -> str:
+    def get_guess(self, cursor: Optional[TreeCursor] = None) -> str:
         """
         Get the current guess (animal at leaf node)
         Always returns the animal at the current leaf - the tree structure is truth
         
+        Args:
+            cursor: Game to read (default: the tree's own cursor)
+        
         Returns:
             The animal name the tree guessed
         """
-        if not self.current_node or not self.current_node.is_leaf:
+        node = (cursor or self.cursor).node
+        if not node or not node.is_leaf:
             return ""
         
         # The tree path determines the guess - always use the leaf node's animal
-        return self.current_node.data
+        return node.data
     
     def learn_new_animal(self, new_animal: str, discriminating_question: str, 
-                        answer_for_new: bool) -> bool:
+                        answer_for_new: bool, cursor: Optional[TreeCursor] = None) -> bool:
         """
         Learn a new animal when the current guess was wrong
         
@@ -307,14 +708,21 @@ class BinaryTree:
             new_animal: The animal the user was thinking of
             discriminating_question: Question that differentiates new animal from guessed one
             answer_for_new: True if answer is "Yes" for the new animal, False for "No"
+            cursor: Game whose guess was wrong (default: the tree's own cursor)
             
         Returns:
             True if learning was successful
         """
-        if not self.current_node or not self.current_node.is_leaf:
+        if cursor is None:
+            cursor = self.cursor
+        leaf = cursor.node
+        if not leaf or not leaf.is_leaf:
             return False
         
-        old_animal = self.current_node.data
+        if self.persistent and self.resolve_path_code(leaf.path_code, leaf.depth) is not leaf:
+            return False  # The guess was replaced in a newer version
+        
+        old_animal = leaf.data
         
         # Create new nodes
         new_animal_node = Node(new_animal, is_leaf=True)
@@ -332,116 +740,84 @@ class BinaryTree:
         new_animal_node.parent = question_node
         old_animal_node.parent = question_node
         
+        # The question takes the old leaf's place (and ID) and two leaves hang below it
+        depth, code = leaf.depth, leaf.path_code
+        question_node.depth, question_node.path_code = depth, code
+        question_node.node_id = leaf.node_id
+        question_node.subtree_nodes, question_node.subtree_leaves = 3, 2
+        for animal_node in (new_animal_node, old_animal_node):
+            animal_node.node_id = self._new_id()
+            animal_node.subtree_leaves = 1
+            self._nodes_by_id[animal_node.node_id] = animal_node
+        self._nodes_by_id[question_node.node_id] = question_node
+        question_node.left_child.depth = question_node.right_child.depth = depth + 1
+        question_node.left_child.path_code = code | (1 << depth)
+        question_node.right_child.path_code = code
+        self._leaf_count -= 1
+        self._leaf_depth_sum -= depth
+        self._count_new_node(depth + 1, True)
+        self._count_new_node(depth + 1, True)
+        # Copy on write: lock-free readers keep iterating the published index
+        animal_index = dict(self._animal_index)
+        self._unindex_animal(animal_index, leaf)
+        self._index_animal(animal_index, old_animal_node)
+        self._index_animal(animal_index, new_animal_node)
+        self._animal_index = animal_index
+        
         # Replace the old leaf with the new question node
-        if self.current_node.parent:
-            if self.current_node.parent.left_child == self.current_node:
-                self.current_node.parent.left_child = question_node
+        change = {
+            'type': 'learn',
+            'path_code': format(code, 'x'),
+            'depth': depth,
+            'node_id': question_node.node_id,
+            'question': discriminating_question,
+            'yes': {'data': question_node.left_child.data, 'node_id': question_node.left_child.node_id},
+            'no': {'data': question_node.right_child.data, 'node_id': question_node.right_child.node_id}
+        }
+        if self.persistent:
+            self._publish(self._copy_path(leaf, question_node), change)
+        elif leaf.parent:
+            if leaf.parent.left_child is leaf:
+                leaf.parent.left_child = question_node
             else:
-                self.current_node.parent.right_child = question_node
-            question_node.parent = self.current_node.parent
+                leaf.parent.right_child = question_node
+            question_node.parent = leaf.parent
+            ancestor = leaf.parent
+            while ancestor is not None:
+                ancestor.subtree_nodes += 2
+                ancestor.subtree_leaves += 1
+                ancestor = ancestor.parent
+            self._publish(self.root, change)
         else:
             # The old guess was at the root
-            self.root = question_node
+            self._publish(question_node, change)
+        self._snapshot_statistics()
         
-        self.current_node = question_node
+        cursor.root, cursor.node = self.root, question_node
         
         # Update the animals database with this new animal
-        self._update_animal_in_database(new_animal)
+        self._update_animal_in_database(new_animal, cursor.history)
         
         return True
     
-    def update_animal_success(self, animal: str, was_correct: bool):
+    def update_animal_success(self, animal: str, was_correct: bool,
+                              cursor: Optional[TreeCursor] = None):
         """
         Update an animal's success rate in the database to improve future predictions
         
+        Only the in-memory store changes; it is written to disk in the background.
+        
         Args:
             animal: The animal that was guessed or corrected
             was_correct: Whether the guess was correct
+            cursor: Game that produced the guess (default: the tree's own cursor)
         """
-        import json
-        import os
-        
-        animals_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'animals.json')
-        
-        if not os.path.exists(animals_path):
-            return
-        
-        try:
-            with open(animals_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                animals = data.get('animals', [])
-            
-            # Calculate the yes percentage from this game
-            if self.game_history:
-                yes_count = sum(1 for _, answer in self.game_history if answer)
-                total = len(self.game_history)
-                path_percentage = (yes_count / total) * 100
-                
-                # Find and update the animal
-                found = False
-                for animal_data in animals:
-                    if animal_data.get('name') == animal:
-                        found = True
-                        # Adjust the percentage slightly toward the actual path if correct
-                        if was_correct:
-                            current_pct = animal_data.get('yes_percentage', 50)
-                            # Move 10% toward the actual percentage
-                            new_pct = current_pct * 0.9 + path_percentage * 0.1
-                            animal_data['yes_percentage'] = round(new_pct, 1)
-                        break
-                
-                # If animal not in database and guess was correct, add it
-                if not found and was_correct:
-                    animals.append({
-                        'name': animal,
-                        'yes_percentage': round(path_percentage, 1)
-                    })
-                
-                # Save back to file
-                data['animals'] = animals
-                with open(animals_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
-                    
-        except (json.JSONDecodeError, IOError) as e:
-            print(f"Error updating animal database: {e}")
-    
-    def _update_animal_in_database(self, animal: str):
+        game_history = (cursor or self.cursor).history
+        (self.animal_store or get_default_store()).record_success(animal, was_correct, game_history)
+    
+    def _update_animal_in_database(self, animal: str, game_history: List[Tuple[str, bool]]):
         """Add a newly learned animal to the database with current path percentage"""
-        if not self.game_history:
-            return
-        
-        yes_count = sum(1 for _, answer in self.game_history if answer)
-        total = len(self.game_history)
-        path_percentage = (yes_count / total) * 100
-        
-        import json
-        import os
-        
-        animals_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'animals.json')
-        
-        try:
-            if os.path.exists(animals_path):
-                with open(animals_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-            else:
-                data = {'animals': []}
-            
-            animals = data.get('animals', [])
-            
-            # Check if animal already exists
-            exists = any(a.get('name') == animal for a in animals)
-            if not exists:
-                animals.append({
-                    'name': animal,
-                    'yes_percentage': round(path_percentage, 1)
-                })
-                
-                data['animals'] = animals
-                with open(animals_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
-                    
-        except (json.JSONDecodeError, IOError) as e:
-            print(f"Error adding animal to database: {e}")
+        (self.animal_store or get_default_store()).add_learned(animal, game_history)
     
     def get_tree_height(self) -> int:
         """
@@ -450,12 +826,12 @@ class BinaryTree:
         Returns:
             Height of the tree (0 for single node, -1 for empty tree)
         """
-        return self._calculate_height(self.root)
+        return len(self._depth_histogram) - 1
     
     @staticmethod
     def _calculate_height(node: Optional[Node]) -> int:
         """
-        Recursively calculate height of subtree
+        Calculate height of subtree
         
         Args:
             node: Node to calculate height from
@@ -465,10 +841,17 @@ class BinaryTree:
         """
         if node is None:
             return -1
-        return 1 + max(
-            BinaryTree._calculate_height(node.left_child),
-            BinaryTree._calculate_height(node.right_child)
-        )
+        height = 0
+        stack = [(node, 0)]
+        while stack:
+            current, depth = stack.pop()
+            if depth > height:
+                height = depth
+            if current.left_child is not None:
+                stack.append((current.left_child, depth + 1))
+            if current.right_child is not None:
+                stack.append((current.right_child, depth + 1))
+        return height
     
     def get_node_count(self) -> int:
         """
@@ -477,14 +860,21 @@ class BinaryTree:
         Returns:
             Total number of nodes
         """
-        return self._count_nodes(self.root)
+        return self._node_count
     
     @staticmethod
     def _count_nodes(node: Optional[Node]) -> int:
-        """Recursively count nodes"""
-        if node is None:
-            return 0
-        return 1 + BinaryTree._count_nodes(node.left_child) + BinaryTree._count_nodes(node.right_child)
+        """Count nodes of a subtree"""
+        count = 0
+        stack = [node] if node is not None else []
+        while stack:
+            current = stack.pop()
+            count += 1
+            if current.left_child is not None:
+                stack.append(current.left_child)
+            if current.right_child is not None:
+                stack.append(current.right_child)
+        return count
     
     def get_leaf_count(self) -> int:
         """
@@ -493,16 +883,23 @@ class BinaryTree:
         Returns:
             Number of animals (leaves) in the tree
         """
-        return self._count_leaves(self.root)
+        return self._leaf_count
     
     @staticmethod
     def _count_leaves(node: Optional[Node]) -> int:
-        """Recursively count leaves"""
-        if node is None:
-            return 0
-        if node.is_leaf:
-            return 1
-        return BinaryTree._count_leaves(node.left_child) + BinaryTree._count_leaves(node.right_child)
+        """Count leaves of a subtree"""
+        count = 0
+        stack = [node] if node is not None else []
+        while stack:
+            current = stack.pop()
+            if current.is_leaf:
+                count += 1
+                continue
+            if current.left_child is not None:
+                stack.append(current.left_child)
+            if current.right_child is not None:
+                stack.append(current.right_child)
+        return count
     
     def get_average_depth(self) -> float:
         """
@@ -511,50 +908,101 @@ class BinaryTree:
         Returns:
             Average depth of leaves (lower is better)
         """
-        leaves = self._count_leaves(self.root)
-        if leaves == 0:
+        if self._leaf_count == 0:
             return 0
-        total_depth = self._sum_leaf_depths(self.root, 0)
-        return total_depth / leaves
+        return self._leaf_depth_sum / self._leaf_count
     
     @staticmethod
     def _sum_leaf_depths(node: Optional[Node], depth: int) -> int:
-        """Recursively sum depths of all leaves"""
-        if node is None:
-            return 0
-        if node.is_leaf:
-            return depth
-        return (BinaryTree._sum_leaf_depths(node.left_child, depth + 1) +
-                BinaryTree._sum_leaf_depths(node.right_child, depth + 1))
+        """Sum depths of all leaves, starting from the given depth"""
+        total = 0
+        stack = [(node, depth)] if node is not None else []
+        while stack:
+            current, current_depth = stack.pop()
+            if current.is_leaf:
+                total += current_depth
+                continue
+            if current.left_child is not None:
+                stack.append((current.left_child, current_depth + 1))
+            if current.right_child is not None:
+                stack.append((current.right_child, current_depth + 1))
+        return total
+    
+    @staticmethod
+    def _collect_metrics(node: Optional[Node]) -> Tuple[int, int, int, int]:
+        """
+        Gather height, node count, leaf count and summed leaf depth in one pass
+        
+        Args:
+            node: Root of the subtree to measure
+            
+        Returns:
+            Tuple (height, node_count, leaf_count, leaf_depth_sum)
+        """
+        height, nodes, leaves, total_depth = -1, 0, 0, 0
+        stack = [(node, 0)] if node is not None else []
+        while stack:
+            current, depth = stack.pop()
+            nodes += 1
+            if depth > height:
+                height = depth
+            if current.is_leaf:
+                leaves += 1
+                total_depth += depth
+                continue
+            if current.left_child is not None:
+                stack.append((current.left_child, depth + 1))
+            if current.right_child is not None:
+                stack.append((current.right_child, depth + 1))
+        return height, nodes, leaves, total_depth
     
     def get_statistics(self) -> Dict[str, Any]:
         """
         Get comprehensive statistics about the tree
         
+        Reads the snapshot taken when the current version was published, in
+        O(1) and without a lock: a concurrent learn updates the counters in
+        several steps but replaces the snapshot in one. With debug_statistics
+        enabled the counters are first cross-checked against a full recount.
+        
         Returns:
             Dictionary with tree statistics
         """
-        return {
-            'height': self.get_tree_height(),
-            'total_nodes': self.get_node_count(),
-            'leaf_count': self.get_leaf_count(),
+        if self.debug_statistics:
+            self._verify_statistics()
+        return dict(self._statistics)
+    
+    def _snapshot_statistics(self):
+        """Publish the cached aggregates for get_statistics (once a change has updated them all)"""
+        height = self.get_tree_height()
+        self._statistics = {
+            'height': height,
+            'total_nodes': self._node_count,
+            'leaf_count': self._leaf_count,
             'average_depth': round(self.get_average_depth(), 2),
-            'balance_factor': self._calculate_balance_factor()
+            'balance_factor': self._calculate_balance_factor(height, self._leaf_count)
         }
     
-    def _calculate_balance_factor(self) -> float:
+    def _calculate_balance_factor(self, height: Optional[int] = None,
+                                  leaves: Optional[int] = None) -> float:
         """
         Calculate balance factor of the tree (0 = perfectly balanced, 1 = completely unbalanced)
         
+        Args:
+            height: Precomputed tree height (computed if None)
+            leaves: Precomputed leaf count (computed if None)
+        
         Returns:
             Balance factor between 0 and 1
         """
-        height = self.get_tree_height()
+        if height is None:
+            height = self.get_tree_height()
         if height <= 0:
             return 0
         
         # Compare actual height with optimal height for perfect tree
-        leaves = self.get_leaf_count()
+        if leaves is None:
+            leaves = self.get_leaf_count()
         if leaves <= 1:
             return 0
         
@@ -563,95 +1011,289 @@ class BinaryTree:
         balance = (height - optimal_height) / height if height > 0 else 0
         return max(0, min(1, balance))  # Clamp between 0 and 1
     
+    @staticmethod
+    def get_path_code(node: Node) -> Tuple[int, int]:
+        """
+        Get the path code of a node
+        
+        Returns:
+            Tuple (path_code, depth); bit i of path_code is set when the
+            question at depth i is answered "Yes" on the way to the node
+        """
+        return node.path_code, node.depth
+    
+    def resolve_path_code(self, path_code: int, depth: int, root: Optional[Node] = None) -> Optional[Node]:
+        """
+        Find the node reached by a path code, in O(depth) without comparing strings
+        
+        Args:
+            path_code: Answer bitmask (bit i set for "Yes" at depth i)
+            depth: Number of answers encoded in path_code
+            root: Root of the tree version to search (default: current)
+            
+        Returns:
+            The node at the end of the path, or None if the path leaves the tree
+        """
+        node = root if root is not None else self.root
+        for level in range(depth):
+            if node is None or node.is_leaf:
+                return None
+            node = node.left_child if path_code >> level & 1 else node.right_child
+        return node
+    
+    def decode_path_code(self, path_code: int, depth: int,
+                         root: Optional[Node] = None) -> List[Dict[str, str]]:
+        """
+        Turn a path code into the questions and answers it stands for
+        
+        Args:
+            path_code: Answer bitmask (bit i set for "Yes" at depth i)
+            depth: Number of answers encoded in path_code
+            root: Root of the tree version to decode against (default: current)
+            
+        Returns:
+            List of {'question', 'answer'} dicts from the root down
+            
+        Raises:
+            ValueError: If the path leaves the tree
+        """
+        path = []
+        node = root if root is not None else self.root
+        for level in range(depth):
+            if node is None or node.is_leaf:
+                raise ValueError(f"Path code {path_code:#x} leaves the tree at depth {level}")
+            answer = bool(path_code >> level & 1)
+            path.append({'question': node.data, 'answer': 'Yes' if answer else 'No'})
+            node = node.left_child if answer else node.right_child
+        if node is None:
+            raise ValueError(f"Path code {path_code:#x} leaves the tree at depth {depth}")
+        return path
+    
+    def get_animal_paths(self, animal: str) -> List[Dict[str, Any]]:
+        """
+        Explain which answers lead to an animal
+        
+        Args:
+            animal: Animal name (case-insensitive)
+            
+        Returns:
+            One entry per leaf holding the animal, with its path code and questions
+        """
+        return [{
+            'animal': leaf.data,
+            'path_code': format(leaf.path_code, 'x'),
+            'depth': leaf.depth,
+            'path': self.decode_path_code(leaf.path_code, leaf.depth)
+        } for leaf in self.find_animal_leaves(animal)]
+    
+    def find_node(self, node_id: int) -> Optional[Node]:
+        """
+        Find a node of the current version by its stable ID
+        
+        Args:
+            node_id: ID assigned by the tree (see Node.node_id)
+            
+        Returns:
+            The node, or None if no node of the current version has that ID
+        """
+        return self._nodes_by_id.get(node_id)
+    
+    def get_subtree(self, node_id: Optional[int] = None, depth: int = 2) -> Optional[Dict[str, Any]]:
+        """
+        Describe a node and a limited number of levels below it
+        
+        Every entry carries the node and leaf counts of its subtree; questions
+        at the depth limit are marked collapsed instead of listing children,
+        so the cost follows the size of the answer, not of the tree.
+        
+        Args:
+            node_id: Node to start from (default: root)
+            depth: Levels of children to include
+            
+        Returns:
+            Nested dictionary ('id', 'data', 'is_leaf', 'node_count',
+            'leaf_count', 'left'/'right' or 'collapsed'), or None if the
+            node does not exist
+        """
+        node = self.root if node_id is None else self.find_node(node_id)
+        if node is None:
+            return None
+        
+        def describe(node: Node) -> Dict[str, Any]:
+            return {
+                'id': node.node_id,
+                'data': node.data,
+                'is_leaf': node.is_leaf,
+                'node_count': node.subtree_nodes,
+                'leaf_count': node.subtree_leaves
+            }
+        
+        result = describe(node)
+        stack = [(node, result, 0)]
+        while stack:
+            node, node_dict, level = stack.pop()
+            if node.is_leaf:
+                continue
+            if level >= depth:
+                node_dict['collapsed'] = True
+                continue
+            for key, child in (('left', node.left_child), ('right', node.right_child)):
+                node_dict[key] = describe(child) if child is not None else None
+                if child is not None:
+                    stack.append((child, node_dict[key], level + 1))
+        return result
+    
     def get_all_animals(self) -> List[str]:
         """
         Get list of all known animals in the tree
         
+        Read from the animal index, one entry per leaf. A learn publishes a
+        new index instead of editing the current one, so this needs no lock
+        and sees the animals just before or just after a concurrent learn.
+        
         Returns:
             List of animal names (leaf nodes)
         """
-        animals = []
-        self._collect_animals(self.root, animals)
-        return animals
+        return [leaf.data for leaves in self._animal_index.values() for leaf in leaves]
+    
+    def get_animal_leaves(self) -> List[Node]:
+        """Get every animal leaf, read from the animal index"""
+        return [leaf for leaves in self._animal_index.values() for leaf in leaves]
+    
+    def find_animal_leaves(self, animal: str) -> List[Node]:
+        """
+        Find every leaf holding an animal, ignoring case and extra spaces
+        
+        Args:
+            animal: Animal name to look up
+            
+        Returns:
+            Matching leaf nodes (empty if the animal is unknown)
+        """
+        return list(self._animal_index.get(self.normalize_name(animal), []))
+    
+    def find_animal(self, animal: str) -> Optional[Node]:
+        """Find the first leaf holding an animal, or None if it is unknown"""
+        leaves = self._animal_index.get(self.normalize_name(animal))
+        return leaves[0] if leaves else None
+    
+    def has_animal(self, animal: str) -> bool:
+        """Check whether the tree already knows an animal"""
+        return self.normalize_name(animal) in self._animal_index
     
     @staticmethod
     def _collect_animals(node: Optional[Node], animals: List[str]):
-        """Recursively collect all animals from the tree"""
-        if node is None:
-            return
-        if node.is_leaf:
-            animals.append(node.data)
-        else:
-            BinaryTree._collect_animals(node.left_child, animals)
-            BinaryTree._collect_animals(node.right_child, animals)
+        """Collect all animals from a subtree, left to right"""
+        stack = [node] if node is not None else []
+        while stack:
+            current = stack.pop()
+            if current.is_leaf:
+                animals.append(current.data)
+                continue
+            if current.right_child is not None:
+                stack.append(current.right_child)
+            if current.left_child is not None:
+                stack.append(current.left_child)
     
-    def display_tree(self, node: Optional[Node] = None, prefix: str = "", 
-                     is_left: Optional[bool] = None) -> str:
+    def display_tree(self, node: Optional[Node] = None, max_depth: Optional[int] = None,
+                     offset: int = 0, limit: Optional[int] = None) -> str:
         """
         Display tree structure in a readable format with proper ASCII art
         
         Args:
             node: Node to display (default: root)
-            prefix: Prefix for indentation
-            is_left: Whether this is a left child
+            max_depth: Levels to show below node before collapsing (None for all)
+            offset: Number of lines to skip
+            limit: Maximum number of lines to return (None for all)
             
         Returns:
             String representation of tree
         """
-        if node is None:
-            node = self.root
+        lines = self.iter_display_lines(node, max_depth)
+        return "\n".join(islice(lines, offset, None if limit is None else offset + limit))
+    
+    def iter_display_lines(self, node: Optional[Node] = None,
+                           max_depth: Optional[int] = None) -> Iterator[str]:
+        """
+        Render the tree display one line at a time
         
+        Questions at max_depth are shown with a collapsed marker instead of
+        their subtrees, so the cost follows the lines actually consumed.
+        
+        Args:
+            node: Node to start from (default: root)
+            max_depth: Levels to show below node before collapsing (None for all)
+            
+        Yields:
+            Lines of the display, yes-branches first
+        """
         if node is None:
-            return "Empty tree"
+            node = self.root
         
-        result = []
-        self._display_tree_recursive(node, "", None, result)
-        return "\n".join(result)
-    
-    @staticmethod
-    def _display_tree_recursive(node: Node, prefix: str, is_left: Optional[bool], 
-                               result: List[str]):
-        """Recursively build tree display with proper formatting"""
         if node is None:
+            yield "Empty tree"
             return
         
-        # Format the node display
-        node_label = node.data
-        if node.is_leaf:
-            node_display = f"🐾 {node_label}"
-        else:
-            node_display = f"❓ {node_label}"
-        
-        # Add the node with appropriate connector
-        if is_left is None:  # Root node
-            result.append(node_display)
-            new_prefix = ""
-        else:
-            # Determine the connector and extension
-            if is_left:
-                connector = "├─ YES  ↙"
-                extension = "│       "
+        # Stack entries: (node, parent prefix, True/False for yes/no child or None, level).
+        # Prefixes are linked (parent prefix, extension) pairs joined only when a
+        # line is emitted, so a pending branch costs O(1) whatever its depth
+        stack = [(node, None, None, 0)]
+        while stack:
+            node, prefix_link, is_left, level = stack.pop()
+            
+            # Format the node display
+            if node.is_leaf:
+                node_display = f"🐾 {node.data}"
             else:
-                connector = "└─ NO   ↘"
-                extension = "        "
+                node_display = f"❓ {node.data}"
             
-            result.append(prefix + connector)
-            result.append(prefix + extension + node_display)
-            new_prefix = prefix + extension
-        
-        # Recursively add children
-        if not node.is_leaf:
-            if node.left_child:
-                BinaryTree._display_tree_recursive(node.left_child, new_prefix, True, result)
+            # Add the node with appropriate connector
+            if is_left is None:  # Start node
+                yield node_display
+                new_prefix, new_link = "", None
+            else:
+                # Determine the connector and extension
+                if is_left:
+                    connector = "├─ YES  ↙"
+                    extension = "│       "
+                else:
+                    connector = "└─ NO   ↘"
+                    extension = "        "
+                
+                prefix = self._join_prefix(prefix_link)
+                yield prefix + connector
+                new_prefix = prefix + extension
+                yield new_prefix + node_display
+                new_link = (prefix_link, extension)
+            
+            if node.is_leaf:
+                continue
+            if max_depth is not None and level >= max_depth:
+                yield new_prefix + "└─ ⋯ (collapsed)"
+                continue
+            
+            # Push children, right first so the yes-branch is rendered first
             if node.right_child:
-                BinaryTree._display_tree_recursive(node.right_child, new_prefix, False, result)
+                stack.append((node.right_child, new_link, False, level + 1))
+            if node.left_child:
+                stack.append((node.left_child, new_link, True, level + 1))
+    
+    @staticmethod
+    def _join_prefix(prefix_link: Optional[Tuple[Any, str]]) -> str:
+        """Materialize a linked display prefix"""
+        parts = []
+        while prefix_link is not None:
+            prefix_link, extension = prefix_link
+            parts.append(extension)
+        return "".join(reversed(parts))
     
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert entire tree to dictionary"""
-        return self.root.to_dict() if self.root else None
+    def to_dict(self, include_ids: bool = False) -> Dict[str, Any]:
+        """Convert entire tree to dictionary (with node IDs under 'id' if include_ids)"""
+        root = self.root  # Read once: a persistent tree may publish a new root meanwhile
+        return root.to_dict(include_ids) if root else None
     
     @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> 'BinaryTree':
+    def from_dict(cls, data: Dict[str, Any], persistent: bool = False) -> 'BinaryTree':
         """Create tree from dictionary"""
         root = Node.from_dict(data)
-        return cls(root)
+        return cls(root, persistent=persistent)
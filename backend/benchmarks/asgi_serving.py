@@ -0,0 +1,137 @@
+"""
+Flask Dev Server vs ASGI Benchmark
+Starts each server in a subprocess on temporary data, opens idle player connections,
+then measures request latency and the server's threads and memory
+
+Usage: python benchmarks/asgi_serving.py [idle_connections] [requests]
+(needs uvicorn for the ASGI side)
+"""
+
+import sys
+import os
+import io
+import json
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+import http.client
+from contextlib import redirect_stdout
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def serve(kind, port, data_dir):
+    """Server side: run the API on temporary data with the Flask dev server or uvicorn"""
+    import logging
+    from app import api
+    from app.animal_store import AnimalStore
+    from app.game_manager import GameManager
+
+    with redirect_stdout(io.StringIO()):
+        api.game_manager = GameManager(
+            data_file=os.path.join(data_dir, 'tree_data.snapshot'),
+            history_file=os.path.join(data_dir, 'game_history.jsonl')
+        )
+    api.game_manager.tree.animal_store = AnimalStore(os.path.join(data_dir, 'animals.json'))
+    sys.stdout = io.StringIO()  # The game code prints debug lines
+    if kind == 'flask':
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        api.app.run(host='127.0.0.1', port=port, threaded=True)
+    else:
+        import uvicorn
+        from app.asgi import app
+        uvicorn.run(app, host='127.0.0.1', port=port, log_level='error',
+                    backlog=4096, timeout_keep_alive=75)
+
+
+def free_port():
+    """An unused local TCP port"""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(port):
+    """Poll the health endpoint until the server answers"""
+    for _ in range(200):
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/api/health')
+            connection.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("server did not start")
+
+
+def process_status(pid):
+    """Threads and resident memory (MiB) of a process, from /proc"""
+    values = {}
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            values[key] = value.strip()
+    return int(values['Threads']), int(values['VmRSS'].split()[0]) / 1024
+
+
+def play_games(port, games):
+    """Play short games over one keep-alive connection; returns per-request latencies"""
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    latencies = []
+
+    def call(method, path, body=None):
+        started = time.perf_counter()
+        connection.request(method, path, json.dumps(body) if body is not None else None,
+                           {'Content-Type': 'application/json'})
+        reply = json.loads(connection.getresponse().read())
+        latencies.append(time.perf_counter() - started)
+        return reply
+
+    for _ in range(games):
+        session_id = call('POST', '/api/game/start', {})['session_id']
+        while not call('POST', '/api/game/answer', {'session_id': session_id, 'answer': 'no'})['reached_guess']:
+            pass
+        call('POST', '/api/game/guess-result', {'session_id': session_id, 'was_correct': True})
+        call('POST', '/api/game/end', {'session_id': session_id})
+        call('GET', '/api/animals/Dog')
+    connection.close()
+    return latencies
+
+
+def run(kind, idle, games):
+    """Benchmark one server"""
+    data_dir = tempfile.mkdtemp()
+    port = free_port()
+    server = subprocess.Popen([sys.executable, __file__, 'serve', kind, str(port), data_dir])
+    sockets = []
+    try:
+        wait_until_up(port)
+        # Idle players: connected, between two answers
+        for _ in range(idle):
+            sockets.append(socket.create_connection(('127.0.0.1', port)))
+        time.sleep(1)
+        threads, rss = process_status(server.pid)
+        latencies = sorted(play_games(port, games))
+        print(f"{kind:6s} {idle:6d} idle connections: {threads:6d} threads  {rss:7.1f} MiB  "
+              f"p50 {latencies[len(latencies) // 2] * 1000:6.2f} ms  "
+              f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:6.2f} ms")
+    finally:
+        for s in sockets:
+            s.close()
+        server.terminate()
+        server.wait()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        serve(sys.argv[2], int(sys.argv[3]), sys.argv[4])
+    else:
+        idle = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+        games = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+        for kind in ('flask', 'asgi'):
+            run(kind, 0, games)
+            run(kind, idle, games)
@@ -0,0 +1,134 @@
+"""
+Concurrent Clients Benchmark
+Plays full games against the threaded Flask server from many client threads at once,
+then checks that the tree, history and journal are still consistent
+
+Usage: python benchmarks/concurrency.py [clients] [games_per_client]
+"""
+
+import sys
+import os
+import io
+import json
+import logging
+import shutil
+import tempfile
+import threading
+import time
+import http.client
+from contextlib import redirect_stdout
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from werkzeug.serving import make_server
+
+from app import api
+from app.animal_store import AnimalStore
+from app.game_manager import GameManager
+
+
+def open_manager(data_dir):
+    """A manager on temporary files, not touching data/animals.json"""
+    manager = GameManager(
+        data_file=os.path.join(data_dir, 'tree_data.snapshot'),
+        history_file=os.path.join(data_dir, 'game_history.jsonl')
+    )
+    manager.tree.animal_store = AnimalStore(os.path.join(data_dir, 'animals.json'))
+    return manager
+
+
+class Client:
+    """One player: a keep-alive-less HTTP client that records request latencies"""
+
+    def __init__(self, port, latencies):
+        self.port = port
+        self.latencies = latencies
+
+    def call(self, method, path, body=None):
+        """Send one request and decode the JSON reply"""
+        started = time.perf_counter()
+        connection = http.client.HTTPConnection('127.0.0.1', self.port)
+        connection.request(method, path, json.dumps(body) if body is not None else None,
+                           {'Content-Type': 'application/json'})
+        reply = json.loads(connection.getresponse().read())
+        connection.close()
+        self.latencies.append(time.perf_counter() - started)
+        return reply
+
+    def play(self, number, games, learned):
+        """Play games: answer by a fixed pattern, teach an animal every fifth game"""
+        session_id = None
+        for game in range(games):
+            reply = self.call('POST', '/api/game/start', {'session_id': session_id})
+            session_id = reply['session_id']
+            pattern = format(number * games + game, '016b')
+            for answer in pattern:
+                reply = self.call('POST', '/api/game/answer',
+                                  {'session_id': session_id, 'answer': 'yes' if answer == '1' else 'no'})
+                if reply['reached_guess']:
+                    break
+            if game % 5 == 0:
+                animal = f"Creature {number}-{game}"
+                self.call('POST', '/api/game/guess-result',
+                          {'session_id': session_id, 'was_correct': False, 'actual_animal': animal})
+                reply = self.call('POST', '/api/game/learn',
+                                  {'session_id': session_id, 'new_animal': animal,
+                                   'question': f"Is it creature {number}-{game}?", 'answer_for_new': 'yes'})
+                if reply['success']:
+                    learned.append(animal)
+                else:
+                    self.call('POST', '/api/game/end', {'session_id': session_id})
+            else:
+                self.call('POST', '/api/game/guess-result', {'session_id': session_id, 'was_correct': True})
+                self.call('POST', '/api/game/end', {'session_id': session_id})
+            self.call('GET', '/api/stats')
+
+
+def run(clients, games):
+    """Serve a fresh manager, play clients x games, and report throughput and consistency"""
+    data_dir = tempfile.mkdtemp()
+    try:
+        api.game_manager = manager = open_manager(data_dir)
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)  # No per-request log lines
+        server = make_server('127.0.0.1', 0, api.app, threaded=True)
+        server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+        server_thread.start()
+
+        latencies, learned = [], []
+        threads = [threading.Thread(target=Client(server.server_port, latencies).play,
+                                    args=(number, games, learned))
+                   for number in range(clients)]
+        with redirect_stdout(io.StringIO()):  # The game code prints debug lines
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+        server.shutdown()
+
+        # Consistency: counters, animal index and the files written under load
+        manager.tree._verify_statistics()
+        total_games = manager.get_statistics()['games']['total']
+        missing = [animal for animal in learned if not manager.tree.has_animal(animal)]
+        with redirect_stdout(io.StringIO()):
+            reopened = open_manager(data_dir)
+        replayed = reopened.tree.to_dict(include_ids=True) == manager.tree.to_dict(include_ids=True)
+
+        latencies.sort()
+        print(f"{clients:3d} clients: {len(latencies) / elapsed:8.0f} requests/s  "
+              f"{clients * games / elapsed:6.0f} games/s  "
+              f"p50 {latencies[len(latencies) // 2] * 1000:5.1f} ms  "
+              f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:5.1f} ms  "
+              f"learned {len(learned)}, games {total_games}/{clients * games}, "
+              f"missing {len(missing)}, journal replay {'ok' if replayed else 'MISMATCH'}")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    games = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    run(1, games)
+    run(clients, games)
@@ -0,0 +1,136 @@
+"""
+Pre-Forked Workers Benchmark
+Serves temporary data with the single-process Flask server and with 1, 2 and 4 forked
+workers, then measures answer throughput from several client processes and checks
+that an animal learned through one worker is guessed through the others
+
+Usage: python benchmarks/prefork_answers.py [client_processes] [games_per_client]
+"""
+
+import sys
+import os
+import io
+import json
+import shutil
+import subprocess
+import tempfile
+import time
+import http.client
+import multiprocessing
+from contextlib import redirect_stdout
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from asgi_serving import free_port, wait_until_up
+
+
+def serve(workers, port, data_dir):
+    """Server side: run the API on temporary data, forked into workers if workers > 0"""
+    import logging
+    from app import api, prefork
+    from app.animal_store import AnimalStore
+    from app.game_manager import GameManager
+
+    with redirect_stdout(io.StringIO()):
+        api.game_manager = GameManager(
+            data_file=os.path.join(data_dir, 'tree_data.snapshot'),
+            history_file=os.path.join(data_dir, 'game_history.jsonl')
+        )
+    api.game_manager.tree.animal_store = AnimalStore(os.path.join(data_dir, 'animals.json'))
+    sys.stdout = io.StringIO()  # The game code prints debug lines
+    if workers:
+        prefork.serve(host='127.0.0.1', port=port, workers=workers,
+                      shared_dir=os.path.join(data_dir, 'shared'))
+    else:
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        api.app.run(host='127.0.0.1', port=port, threaded=True)
+
+
+def call(connection, method, path, body=None):
+    """Send one request over a keep-alive connection and decode the JSON reply"""
+    connection.request(method, path, json.dumps(body) if body is not None else None,
+                       {'Content-Type': 'application/json'})
+    return json.loads(connection.getresponse().read())
+
+
+def play(arguments):
+    """Client process: play games answering by a fixed pattern; returns the answer latencies"""
+    port, number, games = arguments
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    latencies = []
+    for game in range(games):
+        session_id = call(connection, 'POST', '/api/game/start', {})['session_id']
+        pattern = format(number * games + game, '016b')
+        for answer in pattern:
+            started = time.perf_counter()
+            reply = call(connection, 'POST', '/api/game/answer',
+                         {'session_id': session_id, 'answer': 'yes' if answer == '1' else 'no'})
+            latencies.append(time.perf_counter() - started)
+            if reply['reached_guess']:
+                break
+        call(connection, 'POST', '/api/game/end', {'session_id': session_id})
+    connection.close()
+    return latencies
+
+
+def learned_everywhere(port, attempts=8):
+    """Teach an animal through one connection, then look for it from fresh connections"""
+    def game(connection, answers):
+        session_id = call(connection, 'POST', '/api/game/start', {})['session_id']
+        for answer in answers:
+            reply = call(connection, 'POST', '/api/game/answer', {'session_id': session_id, 'answer': answer})
+            if reply['reached_guess']:
+                return session_id, reply
+        return session_id, reply
+
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    session_id, reply = game(connection, ['no'] * 64)
+    call(connection, 'POST', '/api/game/guess-result',
+         {'session_id': session_id, 'was_correct': False, 'actual_animal': 'Okapi'})
+    call(connection, 'POST', '/api/game/learn',
+         {'session_id': session_id, 'new_animal': 'Okapi',
+          'question': 'Is it a forest giraffe?', 'answer_for_new': 'yes'})
+    connection.close()
+    path = ['no'] * reply['questions_asked'] + ['yes']  # The guessed leaf is now the new question
+
+    seen = 0
+    for _ in range(attempts):  # New connections land on any worker
+        connection = http.client.HTTPConnection('127.0.0.1', port)
+        _, found = game(connection, path)
+        seen += found.get('guess') == 'Okapi'
+        connection.close()
+    return seen == attempts
+
+
+def run(workers, clients, games):
+    """Benchmark one server configuration"""
+    data_dir = tempfile.mkdtemp()
+    port = free_port()
+    server = subprocess.Popen([sys.executable, __file__, 'serve', str(workers), str(port), data_dir])
+    try:
+        wait_until_up(port)
+        with multiprocessing.Pool(clients) as pool:
+            started = time.perf_counter()
+            latencies = sorted(sum(pool.map(play, [(port, number, games) for number in range(clients)]), []))
+            elapsed = time.perf_counter() - started
+        consistent = learned_everywhere(port)
+        label = f"{workers} workers" if workers else "1 process"
+        print(f"{label:10s}: {len(latencies) / elapsed:7.0f} answers/s (games included)  "
+              f"answer p50 {latencies[len(latencies) // 2] * 1000:5.2f} ms  "
+              f"learned animal seen by every connection: {'yes' if consistent else 'NO'}")
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        serve(int(sys.argv[2]), int(sys.argv[3]), sys.argv[4])
+    else:
+        clients = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+        games = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+        print(f"{os.cpu_count()} CPUs, {clients} client processes")
+        for workers in (0, 1, 2, 4):
+            run(workers, clients, games)
@@ -0,0 +1,83 @@
+"""
+Memory per Game Session Benchmark
+Compares the old dict-backed GameSession with the slotted one and with SessionColumns
+
+Usage: python benchmarks/session_memory.py [number_of_sessions]
+"""
+
+import sys
+import os
+import tracemalloc
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.game_manager import GameSession
+from app.session_store import SessionColumns
+
+
+ANIMALS = ["Dog", "Cat", "Eagle", "Dolphin", "Snake", "Frog", "Shark", "Penguin", "Horse", "Owl"]
+
+
+class DictGameSession:
+    """GameSession as it was before: a plain object with a __dict__"""
+
+    def __init__(self):
+        self.questions_asked = 0
+        self.start_time = datetime.now()
+        self.end_time = None
+        self.guessed_correctly = False
+        self.animal_guessed = ""
+        self.animal_actual = ""
+        self.learned_new_animal = False
+
+
+def fill(session, number, start):
+    """Give a session realistic values (names come from user input, so they are new strings)"""
+    session.questions_asked = number % 20
+    session.start_time = start + timedelta(seconds=number)
+    session.end_time = start + timedelta(seconds=number, milliseconds=1500)
+    session.guessed_correctly = number % 3 != 0
+    session.animal_guessed = "".join(ANIMALS[number % len(ANIMALS)])
+    session.animal_actual = "".join(ANIMALS[(number * 7) % len(ANIMALS)]) if number % 3 == 0 else ""
+    return session
+
+
+def measure(build, count):
+    """Bytes allocated by build(count) and still alive"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build(count)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def main(count):
+    start = datetime(2024, 1, 1)
+
+    def dict_sessions(n):
+        return [fill(DictGameSession(), i, start) for i in range(n)]
+
+    def slotted_sessions(n):
+        return [fill(GameSession(), i, start) for i in range(n)]
+
+    def columns(n):
+        container = SessionColumns()
+        for i in range(n):
+            container.append(fill(GameSession(), i, start))
+        return container
+
+    print(f"{count:,} sessions")
+    for label, build in (("dict GameSession (before)", dict_sessions),
+                         ("slotted GameSession", slotted_sessions),
+                         ("SessionColumns", columns)):
+        used = measure(build, count)
+        print(f"  {label:28s} {used / count:8.1f} bytes/session  "
+              f"{used / count * 1_000_000 / 2**20:8.1f} MiB per million")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -2,7 +2,10 @@
 Main entry point for running PseudoQui backend server
 """
 
+import argparse
+import json
 import os
+import signal
 import sys
 from pathlib import Path
 
@@ -10,30 +13,135 @@ from pathlib import Path
 backend_dir = Path(__file__).parent
 sys.path.insert(0, str(backend_dir))
 
-from app.api import app
+from app.api import app, game_manager
+from app.animal_store import DEFAULT_ANIMALS_PATH
+from app.sqlite_store import SQLiteDatabase, migrate_to_sqlite
+
+
+def optimize_tree(dry_run: bool):
+    """Run the offline tree optimizer on the saved tree and print its report"""
+    report = game_manager.optimize_tree(dry_run=dry_run)
+    print(json.dumps(report, indent=2))
+
+
+def convert_tree(export_path: str = None, import_path: str = None):
+    """Export the saved tree to JSON, or import a JSON tree as the saved snapshot"""
+    if import_path:
+        game_manager.import_tree_json(import_path)
+        print(f"✓ Imported {import_path} into {game_manager.data_file}")
+    if export_path:
+        game_manager.export_tree_json(export_path)
+        print(f"✓ Exported {game_manager.data_file} to {export_path}")
+
+
+def migrate_sqlite(database_path: str):
+    """Copy the saved tree, game history and animals.json into a new SQLite database"""
+    if game_manager.database is not None:
+        print("Already running on a database (unset PSEUDOQUI_DATABASE to migrate from the data files)")
+        sys.exit(1)
+    animals = []
+    if os.path.exists(DEFAULT_ANIMALS_PATH):
+        with open(DEFAULT_ANIMALS_PATH, 'r', encoding='utf-8') as f:
+            animals = json.load(f).get('animals', [])
+    database = SQLiteDatabase(database_path)
+    try:
+        counts = migrate_to_sqlite(database, game_manager.tree.root,
+                                   game_manager.history_log.iter_records(), animals)
+    except ValueError as e:
+        print(f"Error migrating: {e}")
+        sys.exit(1)
+    finally:
+        database.close()
+    print(f"✓ Migrated {counts['nodes']} nodes, {counts['sessions']} games and "
+          f"{counts['animals']} animals to {database_path}")
+    print(f"  Run with PSEUDOQUI_DATABASE={database_path} to use it")
+
+
+def serve_asgi(port: int):
+    """Serve the ASGI entry point with uvicorn (optional dependency)"""
+    try:
+        import uvicorn
+    except ImportError:
+        print("--asgi needs uvicorn: pip install uvicorn")
+        sys.exit(1)
+    from app.asgi import app as asgi_app
+    
+    # Keep idle player connections open between answers instead of reconnecting
+    uvicorn.run(asgi_app, host='0.0.0.0', port=port, log_level='warning',
+                backlog=4096, timeout_keep_alive=75)
+
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="PseudoQui backend server")
+    parser.add_argument('--optimize-tree', action='store_true',
+                        help="shorten games by pruning repeated questions and merging duplicate "
+                             "animals in the saved tree (questions are not reordered), then exit")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="with --optimize-tree, only report the expected gain")
+    parser.add_argument('--export-json', metavar='PATH',
+                        help="write the saved tree as JSON, then exit")
+    parser.add_argument('--import-json', metavar='PATH',
+                        help="replace the saved tree with a JSON tree, then exit")
+    parser.add_argument('--migrate-sqlite', metavar='PATH',
+                        help="copy the tree, history and animal data files into an SQLite database, then exit")
+    parser.add_argument('--asgi', action='store_true',
+                        help="serve the API with uvicorn (asyncio) instead of the Flask server")
+    parser.add_argument('--workers', type=int, metavar='N',
+                        help="answer questions in N forked worker processes sharing the tree (Linux/macOS)")
+    args = parser.parse_args()
+    
+    if args.optimize_tree:
+        optimize_tree(args.dry_run)
+        sys.exit(0)
+    
+    if args.export_json or args.import_json:
+        convert_tree(args.export_json, args.import_json)
+        sys.exit(0)
+    
+    if args.migrate_sqlite:
+        migrate_sqlite(args.migrate_sqlite)
+        sys.exit(0)
+    
     # Create data directory with absolute path
     data_dir = os.path.join(backend_dir, 'data')
     os.makedirs(data_dir, exist_ok=True)
     
-    # Delete old tree data to force fresh start (for deployment and local)
-    tree_file = os.path.join(data_dir, 'tree_data.json')
-    if os.path.exists(tree_file):
-        os.remove(tree_file)
+    # Delete old tree data to force fresh start (for deployment and local);
+    # a database is kept, since persisting across restarts is why it is used
+    tree_files = [os.path.join(data_dir, name) for name in ('tree_data.snapshot', 'tree_data.journal', 'tree_data.json')]
+    if game_manager.database is None and any(os.path.exists(tree_file) for tree_file in tree_files):
+        for tree_file in tree_files:
+            if os.path.exists(tree_file):
+                os.remove(tree_file)
         print("✓ Cleared old tree data - starting fresh")
     
     history_file = os.path.join(data_dir, 'game_history.json')
-    if os.path.exists(history_file):
-        os.remove(history_file)
+    if game_manager.database is None and (os.path.exists(history_file) or game_manager.history_log.segments()):
+        if os.path.exists(history_file):
+            os.remove(history_file)
+        game_manager.clear_history()
         print("✓ Cleared game history")
     
     # Get port from environment variable (for Render/Heroku) or default to 5000
     port = int(os.environ.get('PORT', 5000))
     
-    # Run the Flask app
     print("Starting PseudoQui Backend Server...")
     print(f"API available at: http://0.0.0.0:{port}")
     print("Press Ctrl+C to stop the server\n")
     
+    if args.asgi:
+        # uvicorn handles SIGTERM itself and runs the ASGI shutdown hook
+        serve_asgi(port)
+        sys.exit(0)
+    
+    if args.workers:
+        # The writer stops its workers and exits normally on SIGTERM
+        from app import prefork
+        prefork.serve(port=port, workers=args.workers)
+        sys.exit(0)
+    
+    # Exit normally on SIGTERM so atexit handlers flush pending writes
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    
+    # Run the Flask app
     app.run(debug=False, host='0.0.0.0', port=port)
@@ -0,0 +1,103 @@
+"""
+Unit Tests for the Write-Behind Animal Store
+"""
+
+import unittest
+import sys
+import os
+import json
+import shutil
+import tempfile
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.animal_store import AnimalStore
+from app.tree import BinaryTree
+
+
+class TestAnimalStore(unittest.TestCase):
+    """Test in-memory updates and background flushing"""
+
+    def setUp(self):
+        """Write a small animals database to a temporary directory"""
+        self.data_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.data_dir, 'animals.json')
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'animals': [{'name': 'Dog', 'yes_percentage': 50.0}]}, f)
+
+    def tearDown(self):
+        """Remove the temporary directory"""
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def read_file(self):
+        """Animals as saved on disk, by name"""
+        with open(self.path, encoding='utf-8') as f:
+            return {a['name']: a['yes_percentage'] for a in json.load(f)['animals']}
+
+    def test_updates_stay_in_memory_until_flush(self):
+        """Test updates do not touch the file until flushed"""
+        store = AnimalStore(self.path, flush_interval=60)
+        store.record_success('Dog', True, [('Q1', True), ('Q2', True)])
+        store.add_learned('Orca', [('Q1', True), ('Q2', False)])
+
+        self.assertEqual(store.get('Dog')['yes_percentage'], 55.0)
+        self.assertEqual(self.read_file(), {'Dog': 50.0})
+        self.assertTrue(store.flush())
+        self.assertEqual(self.read_file(), {'Dog': 55.0, 'Orca': 50.0})
+
+    def test_wrong_guess_leaves_known_animal(self):
+        """Test a wrong guess does not move a known animal and adds no unknown one"""
+        store = AnimalStore(self.path)
+        store.record_success('Dog', False, [('Q1', True)])
+        store.record_success('Cat', False, [('Q1', True)])
+        self.assertEqual(store.get('Dog')['yes_percentage'], 50.0)
+        self.assertIsNone(store.get('Cat'))
+
+    def test_threshold_wakes_background_flusher(self):
+        """Test enough pending animals are written without waiting for the interval"""
+        store = AnimalStore(self.path, flush_interval=60, flush_threshold=3)
+        store.start()
+        try:
+            store.record_success('Dog', True, [('Q1', False)])
+            store.add_learned('Orca', [('Q1', True)])
+            store.add_learned('Eel', [('Q1', False)])
+            deadline = time.time() + 5
+            while len(self.read_file()) < 3 and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(self.read_file(), {'Dog': 45.0, 'Orca': 100.0, 'Eel': 0.0})
+        finally:
+            store.close()
+
+    def test_close_flushes_pending_updates(self):
+        """Test shutting down writes what is still pending"""
+        store = AnimalStore(self.path, flush_interval=60)
+        store.start()
+        store.add_learned('Orca', [('Q1', True)])
+        store.close()
+        self.assertEqual(self.read_file()['Orca'], 100.0)
+
+    def test_missing_file_is_created_only_by_learning(self):
+        """Test guess feedback alone never creates the database"""
+        os.remove(self.path)
+        store = AnimalStore(self.path)
+        store.record_success('Dog', True, [('Q1', True)])
+        store.flush()
+        self.assertFalse(os.path.exists(self.path))
+        store.add_learned('Orca', [('Q1', True)])
+        store.flush()
+        self.assertEqual(self.read_file(), {'Orca': 100.0})
+
+    def test_tree_uses_its_store(self):
+        """Test BinaryTree sends guess feedback to its animal store"""
+        tree = BinaryTree()
+        tree.animal_store = AnimalStore(self.path)
+        tree.answer_question(True)
+        tree.update_animal_success('Dog', True)
+        self.assertEqual(tree.animal_store.get('Dog')['yes_percentage'], 55.0)
+        self.assertEqual(self.read_file(), {'Dog': 50.0})
+
+
+if __name__ == '__main__':
+    unittest.main()
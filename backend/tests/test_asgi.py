@@ -0,0 +1,200 @@
+"""
+Unit Tests for the ASGI Entry Point
+"""
+
+import unittest
+import sys
+import os
+import io
+import json
+import asyncio
+import shutil
+import tempfile
+import threading
+from contextlib import redirect_stdout
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import api
+from app.animal_store import AnimalStore
+from app.asgi import ASGIApp
+from app.game_manager import GameManager
+
+
+async def call(app, method, path, body=None, query=b''):
+    """Send one request through an ASGI app; returns status, headers and body messages"""
+    payload = json.dumps(body).encode() if body is not None else b''
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query,
+             'headers': [(b'content-type', b'application/json')], 'http_version': '1.1'}
+    received = [{'type': 'http.request', 'body': payload, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return received.pop(0) if received else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return sent[0]['status'], dict(sent[0]['headers']), sent[1:]
+
+
+def body_of(messages):
+    """Join the body messages of a response"""
+    return b''.join(message['body'] for message in messages)
+
+
+class TestASGIApp(unittest.TestCase):
+    """Test the routes, inline/thread-pool split and streaming"""
+
+    def setUp(self):
+        """Serve a manager on temporary files"""
+        self.data_dir = tempfile.mkdtemp()
+        self.saved_manager = api.game_manager
+        with redirect_stdout(io.StringIO()):
+            api.game_manager = GameManager(
+                data_file=os.path.join(self.data_dir, 'tree_data.snapshot'),
+                history_file=os.path.join(self.data_dir, 'game_history.jsonl')
+            )
+        api.game_manager.tree.animal_store = AnimalStore(os.path.join(self.data_dir, 'animals.json'))
+        self.app = ASGIApp(max_workers=4)
+
+    def tearDown(self):
+        """Restore the API's manager and remove the temporary directory"""
+        if self.app.executor is not None:
+            self.app.executor.shutdown(wait=True)
+        api.game_manager = self.saved_manager
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def run_async(self, coroutine):
+        """Run a coroutine with the game's debug output silenced"""
+        with redirect_stdout(io.StringIO()):
+            return asyncio.run(coroutine)
+
+    def test_full_game(self):
+        """Test a game played through the ASGI app"""
+        async def play():
+            status, _, messages = await call(self.app, 'POST', '/api/game/start', {})
+            self.assertEqual(status, 200)
+            session_id = json.loads(body_of(messages))['session_id']
+            reply = {'reached_guess': False}
+            while not reply['reached_guess']:
+                _, _, messages = await call(self.app, 'POST', '/api/game/answer',
+                                            {'session_id': session_id, 'answer': 'no'})
+                reply = json.loads(body_of(messages))
+            await call(self.app, 'POST', '/api/game/guess-result',
+                       {'session_id': session_id, 'was_correct': True})
+            status, _, _ = await call(self.app, 'POST', '/api/game/end', {'session_id': session_id})
+            self.assertEqual(status, 200)
+            _, _, messages = await call(self.app, 'GET', '/api/stats')
+            return json.loads(body_of(messages))
+
+        stats = self.run_async(play())
+        self.assertEqual(stats['statistics']['games']['total'], 1)
+
+    def test_inline_and_pooled_routes(self):
+        """Test read-only routes run on the loop and game routes in the pool"""
+        environ = ASGIApp.build_environ
+        scope = {'type': 'http', 'method': 'GET', 'path': '/api/health', 'headers': []}
+        self.assertTrue(self.app.runs_inline(environ(scope, b'')))
+        self.assertFalse(self.app.runs_inline(environ(dict(scope, path='/index.html'), b'')))
+        self.assertFalse(self.app.runs_inline(environ(dict(scope, path='/api/stats'), b'')))
+        self.assertFalse(self.app.runs_inline(environ(dict(scope, path='/api/tree/bundle'), b'')))
+        self.assertFalse(self.app.runs_inline(environ(dict(scope, method='POST', path='/api/game/end'), b'')))
+
+    def test_loop_not_blocked_by_slow_writes(self):
+        """Test inline requests are answered while a pooled request waits"""
+        release = threading.Event()
+        end_current_game = api.game_manager.end_current_game
+
+        def slow_end(session_id=None):
+            release.wait(5)
+            return end_current_game(session_id)
+
+        api.game_manager.end_current_game = slow_end
+
+        async def scenario():
+            _, _, messages = await call(self.app, 'POST', '/api/game/start', {})
+            session_id = json.loads(body_of(messages))['session_id']
+            ending = asyncio.ensure_future(call(self.app, 'POST', '/api/game/end', {'session_id': session_id}))
+            await asyncio.sleep(0.05)
+            status, _, _ = await call(self.app, 'GET', '/api/health')
+            finished_first = not ending.done()
+            release.set()
+            ended, _, _ = await ending
+            return status, finished_first, ended
+
+        status, finished_first, ended = self.run_async(scenario())
+        self.assertEqual(status, 200)
+        self.assertTrue(finished_first)
+        self.assertEqual(ended, 200)
+
+    def test_streamed_response_in_chunks(self):
+        """Test a streamed response is sent as several body messages"""
+        self.app.chunk_size = 64
+        status, headers, messages = self.run_async(
+            call(self.app, 'GET', '/api/tree/display', query=b'stream=1'))
+        self.assertEqual(status, 200)
+        self.assertTrue(headers[b'content-type'].startswith(b'text/plain'))
+        self.assertGreater(len(messages), 1)
+        self.assertFalse(messages[-1]['more_body'])
+        expected = "\n".join(api.game_manager.tree.iter_display_lines(api.game_manager.tree.root, None)) + "\n"
+        self.assertEqual(body_of(messages).decode(), expected)
+
+    def test_tree_changes_after_learn(self):
+        """Test a client holding /api/tree/data gets only the learned animal as a change"""
+        async def scenario():
+            _, _, messages = await call(self.app, 'GET', '/api/tree/data')
+            data = json.loads(body_of(messages))
+            _, _, messages = await call(self.app, 'POST', '/api/game/start', {})
+            session_id = json.loads(body_of(messages))['session_id']
+            reply = {'reached_guess': False}
+            while not reply['reached_guess']:
+                _, _, messages = await call(self.app, 'POST', '/api/game/answer',
+                                            {'session_id': session_id, 'answer': 'no'})
+                reply = json.loads(body_of(messages))
+            await call(self.app, 'POST', '/api/game/learn',
+                       {'session_id': session_id, 'new_animal': 'Axolotl',
+                        'question': 'Does it keep its gills?', 'answer_for_new': 'yes'})
+            query = f"since={data['version']}&epoch={data['epoch']}".encode()
+            _, _, messages = await call(self.app, 'GET', '/api/tree/changes', query=query)
+            changes = json.loads(body_of(messages))
+            _, _, messages = await call(self.app, 'GET', '/api/tree/changes',
+                                        query=f"since={data['version']}&epoch=other".encode())
+            return data, changes, json.loads(body_of(messages))
+
+        data, changes, other_epoch = self.run_async(scenario())
+        self.assertFalse(changes['resync'])
+        self.assertEqual(changes['version'], data['version'] + 1)
+        self.assertEqual([(change['question'], change['yes']['data']) for change in changes['changes']],
+                         [('Does it keep its gills?', 'Axolotl')])
+        self.assertTrue(other_epoch['resync'])
+
+    def test_body_too_large(self):
+        """Test oversized bodies are refused"""
+        self.app.max_body = 10
+        status, _, _ = self.run_async(call(self.app, 'POST', '/api/game/start', {'session_id': 'x' * 20}))
+        self.assertEqual(status, 413)
+
+    def test_lifespan_runs_shutdown_hook(self):
+        """Test the shutdown hook runs and the pool stops"""
+        calls = []
+        app = ASGIApp(on_shutdown=lambda: calls.append('shutdown'))
+        messages = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(app({'type': 'lifespan'}, receive, send))
+        self.assertEqual(calls, ['shutdown'])
+        self.assertEqual(sent, ['lifespan.startup.complete', 'lifespan.shutdown.complete'])
+        self.assertIsNone(app.executor)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+Unit Tests for the Compact Array-Backed Tree
+"""
+
+import unittest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.tree import BinaryTree
+from app.compact_tree import CompactTree, NO_NODE
+
+
+class TestCompactTree(unittest.TestCase):
+    """Test CompactTree against the Node-based BinaryTree"""
+
+    def setUp(self):
+        """Create matching compact and node-based trees"""
+        self.binary = BinaryTree()
+        self.tree = CompactTree()
+
+    def test_matches_default_tree(self):
+        """Test the compact tree holds the same structure as BinaryTree"""
+        self.assertEqual(self.tree.to_dict(), self.binary.to_dict())
+        self.assertEqual(self.tree.get_statistics(), self.binary.get_statistics())
+        self.assertEqual(sorted(self.tree.get_all_animals()), sorted(self.binary.get_all_animals()))
+
+    def test_navigation(self):
+        """Test answering questions down to a guess"""
+        self.assertEqual(self.tree.get_current_question(), "Is it a mammal?")
+        self.assertFalse(self.tree.answer_question(True))
+        self.assertFalse(self.tree.answer_question(True))
+        self.assertTrue(self.tree.answer_question(True))
+        self.assertEqual(self.tree.get_guess(), "Whale")
+        self.assertEqual(len(self.tree.game_history), 3)
+
+    def test_learn_new_animal(self):
+        """Test learning appends two leaves and keeps stats in sync"""
+        for answer in (True, True, True):
+            self.tree.answer_question(answer)
+            self.binary.answer_question(answer)
+        self.binary.game_history = []  # keep the animals database untouched
+
+        self.assertTrue(self.tree.learn_new_animal("Orca", "Is it black and white?", True))
+        self.binary.learn_new_animal("Orca", "Is it black and white?", True)
+
+        self.assertEqual(self.tree.to_dict(), self.binary.to_dict())
+        self.assertEqual(self.tree.get_statistics(), self.binary.get_statistics())
+        self.assertFalse(self.tree.learn_new_animal("Shark", "Is it a fish?", True))
+
+    def test_dict_round_trip(self):
+        """Test from_dict and to_node conversions"""
+        restored = CompactTree.from_dict(self.binary.to_dict())
+        self.assertEqual(restored.to_dict(), self.binary.to_dict())
+        self.assertEqual(restored.to_node().to_dict(), self.binary.to_dict())
+        self.assertEqual(CompactTree.from_dict(None).root, NO_NODE)
+
+    def test_memory_usage(self):
+        """Test node storage stays a few bytes per node"""
+        per_node = self.tree.memory_usage() / self.tree.get_node_count()
+        self.assertLess(per_node, 40)
+
+
+    def test_bundle_navigation(self):
+        """Test walking the client bundle reaches every animal like the tree does"""
+        bundle = self.tree.to_bundle()
+        nodes, strings = bundle['nodes'], bundle['strings']
+        self.assertEqual(len(nodes), 3 * self.tree.get_node_count())
+        self.assertEqual(len(strings), len(set(strings)))
+
+        def walk(node, answers):
+            if nodes[3 * node + 1] == NO_NODE and nodes[3 * node + 2] == NO_NODE:
+                self.binary.reset_game()
+                for answer in answers:
+                    self.binary.answer_question(answer)
+                self.assertEqual(self.binary.get_guess(), strings[nodes[3 * node]])
+                return 1
+            return (walk(nodes[3 * node + 1], answers + [True])
+                    + walk(nodes[3 * node + 2], answers + [False]))
+
+        self.assertEqual(walk(bundle['root'], []), self.binary.get_leaf_count())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,207 @@
+"""
+Unit Tests for Concurrent Use of one GameManager
+"""
+
+import unittest
+import sys
+import os
+import io
+import shutil
+import random
+import tempfile
+import threading
+from contextlib import redirect_stdout
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.animal_store import AnimalStore
+from app.game_manager import GameManager
+from app.session_store import NameTable
+
+
+class TestConcurrentGames(unittest.TestCase):
+    """Test many threads playing and learning on one manager"""
+
+    THREADS = 16
+    GAMES = 8
+
+    def setUp(self):
+        """Create a manager in a temporary directory with its own animal store"""
+        self.data_dir = tempfile.mkdtemp()
+        self.manager = self.open_manager()
+
+    def tearDown(self):
+        """Remove the temporary data directory"""
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def open_manager(self):
+        """A manager on the temporary files, not touching data/animals.json"""
+        manager = GameManager(
+            data_file=os.path.join(self.data_dir, 'tree_data.snapshot'),
+            history_file=os.path.join(self.data_dir, 'game_history.jsonl'),
+            checkpoint_every=7
+        )
+        manager.tree.animal_store = AnimalStore(os.path.join(self.data_dir, 'animals.json'))
+        return manager
+
+    def run_threads(self, target):
+        """Run target(thread_number) on THREADS threads and re-raise the first error"""
+        errors = []
+
+        def run(number):
+            try:
+                target(number)
+            except Exception as e:  # Reported in the main thread
+                errors.append(e)
+
+        threads = [threading.Thread(target=run, args=(n,)) for n in range(self.THREADS)]
+        with redirect_stdout(io.StringIO()):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        if errors:
+            raise errors[0]
+
+    def test_learning_from_many_threads(self):
+        """Test concurrent learns all land, in the same order in memory and on disk"""
+        learned = []
+        leaves = self.manager.get_statistics()['tree']['leaf_count']
+
+        def player(number):
+            session_id = self.manager.start_new_game(new_session=True)
+            for game in range(self.GAMES):
+                self.manager.start_new_game(session_id)
+                answers = format(number * self.GAMES + game, '08b')
+                for answer in answers:
+                    if self.manager.process_answer('yes' if answer == '1' else 'no', session_id)['reached_leaf']:
+                        break
+                animal = f"Creature {number}-{game}"
+                self.manager.submit_guess_result(False, animal, session_id)
+                if self.manager.teach_new_animal(animal, f"Is it creature {number}-{game}?", 'yes',
+                                                 session_id=session_id):
+                    learned.append(animal)
+                self.manager.end_current_game(session_id)
+
+        self.run_threads(player)
+
+        self.assertTrue(learned)
+        tree = self.manager.tree
+        for animal in learned:
+            self.assertTrue(tree.has_animal(animal), animal)
+        tree._verify_statistics()
+        self.assertEqual(self.manager.get_statistics()['games']['total'], self.THREADS * self.GAMES)
+        self.assertEqual(self.manager.get_statistics()['tree']['leaf_count'],
+                         leaves + len(learned))
+
+        # Journal and snapshot replay to the same tree
+        reopened = self.open_manager()
+        self.assertEqual(reopened.tree.to_dict(include_ids=True), tree.to_dict(include_ids=True))
+
+    def test_same_session_requests_run_in_order(self):
+        """Test answers sent concurrently for one game are all counted"""
+        session_id = self.manager.start_new_game(new_session=True)
+
+        def answer(number):
+            for _ in range(50):
+                self.manager.process_answer('no', session_id)
+
+        self.run_threads(answer)
+        self.assertEqual(self.manager.get_session(session_id).game.questions_asked, self.THREADS * 50)
+
+    def test_animal_list_while_learning(self):
+        """Test lock-free animal lists see whole learns while another thread learns"""
+        tree = self.manager.tree
+        done = threading.Event()
+        errors = []
+
+        def learn():
+            chooser = random.Random(7)
+            try:
+                for number in range(2000):
+                    cursor = tree.new_cursor()
+                    while not tree.answer_question(chooser.random() < 0.5, cursor):
+                        pass
+                    tree.learn_new_animal(f"Creature {number}", f"Is it creature {number}?", True, cursor)
+            finally:
+                done.set()
+
+        def read(number):
+            seen = set()
+            while not done.is_set():
+                animals = set(self.manager.get_all_animals())
+                if not seen <= animals:
+                    errors.append(seen - animals)  # An animal went missing mid-learn
+                seen = animals
+
+        writer = threading.Thread(target=learn)
+        writer.start()
+        self.run_threads(read)
+        writer.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.manager.get_all_animals()), tree.get_leaf_count())
+
+    def test_statistics_do_not_wait_for_writers(self):
+        """Test statistics are read while another thread holds the writer lock"""
+        held = threading.Event()
+        release = threading.Event()
+
+        def writer():
+            with self.manager._write_lock:
+                held.set()
+                release.wait(10)
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        held.wait(10)
+        result = []
+        reader = threading.Thread(target=lambda: result.append(self.manager.get_statistics()))
+        reader.start()
+        reader.join(5)
+        release.set()
+        thread.join()
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0]['tree']['leaf_count'], self.manager.tree.get_leaf_count())
+
+    def test_registry_under_contention(self):
+        """Test the registry keeps its count and size consistent"""
+        sessions = self.manager.sessions
+
+        def churn(number):
+            for _ in range(100):
+                session_id = self.manager.start_new_game(new_session=True)
+                self.assertIsNotNone(sessions.get(session_id))
+                sessions.remove(session_id)
+
+        self.run_threads(churn)
+        self.assertEqual(len(sessions), 0)
+        self.assertEqual(sessions.memory_usage(), 0)
+
+
+class TestNameTable(unittest.TestCase):
+    """Test interning from several threads"""
+
+    def test_concurrent_intern(self):
+        """Test every name gets exactly one ID"""
+        names = NameTable()
+        results = [dict() for _ in range(8)]
+
+        def intern_all(number):
+            for value in range(500):
+                results[number][value] = names.intern(f"Animal {value}")
+
+        threads = [threading.Thread(target=intern_all, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(names), 501)
+        for result in results:
+            self.assertEqual(result, results[0])
+        for value, name_id in results[0].items():
+            self.assertEqual(names.name(name_id), f"Animal {value}")
+
+
+if __name__ == '__main__':
+    unittest.main()
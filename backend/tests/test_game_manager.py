@@ -0,0 +1,176 @@
+"""
+Unit Tests for PseudoQui Game Manager
+"""
+
+import unittest
+import sys
+import os
+import json
+import shutil
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.game_manager import GameManager
+
+
+class TestGameManager(unittest.TestCase):
+    """Test GameManager game flow and persistence"""
+    
+    def setUp(self):
+        """Create a game manager backed by a temporary data directory"""
+        self.data_dir = tempfile.mkdtemp()
+        self.manager = GameManager(
+            data_file=os.path.join(self.data_dir, 'tree_data.snapshot'),
+            history_file=os.path.join(self.data_dir, 'game_history.jsonl')
+        )
+    
+    def tearDown(self):
+        """Remove the temporary data directory"""
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+    
+    def play_to_guess(self, answers):
+        """Answer questions until the tree makes a guess"""
+        self.manager.start_new_game()
+        for answer in answers:
+            if self.manager.process_answer(answer)['reached_leaf']:
+                break
+        self.manager.tree.game_history = []  # keep the animals database untouched
+    
+    def test_teach_rejects_known_animal(self):
+        """Test teaching an animal that already has a leaf is rejected"""
+        self.play_to_guess(['yes', 'yes', 'yes'])
+        leaves = self.manager.tree.get_leaf_count()
+        
+        self.assertFalse(self.manager.teach_new_animal("dolphin", "Is it playful?", "yes"))
+        self.assertEqual(self.manager.tree.get_leaf_count(), leaves)
+        
+        self.assertTrue(self.manager.teach_new_animal("Dolphin", "Is it playful?", "yes",
+                                                      allow_duplicate=True))
+        self.assertEqual(len(self.manager.tree.find_animal_leaves("dolphin")), 2)
+    
+    def test_teach_new_animal_is_saved(self):
+        """Test a learned animal survives a reload"""
+        self.play_to_guess(['yes', 'yes', 'yes'])
+        self.assertTrue(self.manager.teach_new_animal("Orca", "Is it black and white?", "yes"))
+        
+        reloaded = GameManager(data_file=self.manager.data_file,
+                               history_file=self.manager.history_file)
+        self.assertTrue(reloaded.tree.has_animal("Orca"))
+    
+    def test_legacy_json_tree_is_imported(self):
+        """Test a tree_data.json from before snapshots is loaded and converted"""
+        self.play_to_guess(['yes', 'yes', 'yes'])
+        self.assertTrue(self.manager.teach_new_animal("Orca", "Is it black and white?", "yes"))
+        legacy_file = os.path.join(self.data_dir, 'tree_data.json')
+        self.manager.export_tree_json(legacy_file)
+        os.remove(self.manager.data_file)
+        
+        reloaded = GameManager(data_file=self.manager.data_file,
+                               history_file=self.manager.history_file)
+        self.assertTrue(reloaded.tree.has_animal("Orca"))
+        with open(reloaded.data_file, 'rb') as f:
+            self.assertEqual(f.read(4), b'PQTS')
+    
+    def test_sessions_play_independently(self):
+        """Test concurrent sessions keep their own position, score and tree version"""
+        first = self.manager.start_new_game(new_session=True)
+        second = self.manager.start_new_game(new_session=True)
+        for answer in ('yes', 'yes', 'yes'):
+            self.manager.process_answer(answer, first)
+        self.manager.process_answer('no', second)
+        self.manager.get_session(first).cursor.history = []  # keep the animals database untouched
+        
+        self.assertTrue(self.manager.teach_new_animal("Orca", "Is it black and white?", "yes",
+                                                      session_id=first))
+        self.assertEqual(self.manager.get_session(first).game.questions_asked, 3)
+        self.assertEqual(self.manager.get_session(second).game.questions_asked, 1)
+        self.assertEqual(self.manager.tree.get_current_question(self.manager.get_session(second).cursor),
+                         "Does it have feathers?")
+        
+        game = self.manager.end_current_game(first)
+        self.assertTrue(game.learned_new_animal)
+        self.assertFalse(self.manager.get_session(second).game.learned_new_animal)
+        with self.assertRaises(KeyError):
+            self.manager.process_answer('yes', 'no-such-session')
+    
+    def test_batch_answers_match_single_answers(self):
+        """Test a batch of answers leaves the session as the same answers sent one by one"""
+        answers = ['no', 'yes', 'no', 'no', 'yes', 'no', 'no']
+        single = self.manager.start_new_game(new_session=True)
+        for answer in answers:
+            result = self.manager.process_answer(answer, single)
+        batch = self.manager.start_new_game(new_session=True)
+        batch_result = self.manager.process_answers(answers, batch)
+        
+        for key in ('reached_leaf', 'current_question', 'animal_guessed', 'questions_asked'):
+            self.assertEqual(batch_result[key], result[key])
+        single_cursor = self.manager.get_session(single).cursor
+        batch_cursor = self.manager.get_session(batch).cursor
+        self.assertIs(batch_cursor.node, single_cursor.node)
+        self.assertEqual(batch_cursor.history, single_cursor.history)
+        self.assertEqual([(step['question'], step['answer'] == 'Yes') for step in batch_result['path']],
+                         single_cursor.history)
+        
+        partial = self.manager.start_new_game(new_session=True)
+        self.manager.process_answers(answers[:2], partial)
+        resumed = self.manager.process_answers(answers[2:], partial)
+        self.assertEqual(resumed['questions_asked'], len(answers))
+        self.assertEqual(resumed['path'], batch_result['path'])
+    
+    def test_tree_bundle_is_versioned_and_compact(self):
+        """Test the client bundle changes version only when the tree does, and beats to_dict in size"""
+        bundle = self.manager.get_tree_bundle()
+        self.assertIs(self.manager.get_tree_bundle(), bundle)
+        
+        for number in range(200):
+            self.play_to_guess(format(number, '016b').replace('1', 'y').replace('0', 'n'))
+            self.manager.teach_new_animal(f"Creature {number}", f"Is it creature number {number}?", "yes")
+        learned = self.manager.get_tree_bundle()
+        self.assertNotEqual(learned['version'], bundle['version'])
+        self.assertIn("Creature 199", learned['strings'])
+        
+        reloaded = GameManager(data_file=self.manager.data_file, history_file=self.manager.history_file)
+        self.assertEqual(reloaded.get_tree_bundle()['version'], learned['version'])
+        
+        bundle_size = len(json.dumps(learned, separators=(',', ':')))
+        nested_size = len(json.dumps(self.manager.tree.to_dict(), separators=(',', ':')))
+        self.assertLess(bundle_size, nested_size / 2)
+    
+    def test_clear_history_resets_statistics(self):
+        """Test clearing the history empties the counters and rolling windows"""
+        self.play_to_guess(['yes', 'yes', 'yes'])
+        self.manager.submit_guess_result(True)
+        self.manager.end_current_game()
+        self.assertEqual(self.manager.get_statistics()['recent']['1d']['games'], 1)
+        version = self.manager.history_version
+        
+        self.manager.clear_history()
+        statistics = self.manager.get_statistics()
+        self.assertEqual(statistics['games']['total'], 0)
+        self.assertEqual(statistics['recent']['1d']['games'], 0)
+        self.assertGreater(self.manager.history_version, version)
+        self.assertEqual(self.manager.history_log.segments(), [])
+    
+    def test_optimize_tree_merges_duplicate(self):
+        """Test optimizing removes a duplicate only when not a dry run, and saves it"""
+        self.play_to_guess(['yes', 'yes', 'yes'])
+        self.manager.teach_new_animal("Dolphin", "Is it playful?", "yes", allow_duplicate=True)
+        nodes = self.manager.tree.get_node_count()
+        
+        report = self.manager.optimize_tree(dry_run=True)
+        self.assertTrue(report['improved'])
+        self.assertEqual(self.manager.tree.get_node_count(), nodes)
+        
+        report = self.manager.optimize_tree(dry_run=False)
+        self.assertTrue(report['applied'])
+        self.assertEqual(len(self.manager.tree.find_animal_leaves("Dolphin")), 1)
+        
+        reloaded = GameManager(data_file=self.manager.data_file,
+                               history_file=self.manager.history_file)
+        self.assertEqual(reloaded.tree.get_node_count(), nodes - 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
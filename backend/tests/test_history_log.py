@@ -0,0 +1,195 @@
+"""
+Unit Tests for the Append-Only Game History Log
+"""
+
+import unittest
+import sys
+import os
+import json
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.history_log import HistoryLog
+from app.game_manager import GameManager, GameSession
+
+
+class FakeClock:
+    """Manually advanced time source"""
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestHistoryLog(unittest.TestCase):
+    """Test appending, rotation and reading across segments"""
+
+    def setUp(self):
+        """Create a temporary data directory"""
+        self.data_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.data_dir, 'game_history.jsonl')
+
+    def tearDown(self):
+        """Remove the temporary data directory"""
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def game(self, number, end_time=None):
+        """Stored dictionary of a finished game"""
+        session = GameSession()
+        session.questions_asked = number
+        session.end_time = end_time or session.start_time
+        return session.to_dict()
+
+    def test_rotates_by_size_and_reads_in_order(self):
+        """Test full segments are rotated and games come back oldest first"""
+        log = HistoryLog(self.path, max_bytes=400, max_age=None)
+        for number in range(20):
+            log.append(self.game(number))
+
+        segments = log.segments()
+        self.assertGreater(len(segments), 2)
+        self.assertEqual(segments[-1], self.path)
+        self.assertEqual([record['questions_asked'] for record in log], list(range(20)))
+
+        reopened = HistoryLog(self.path, max_bytes=400, max_age=None)
+        reopened.append(self.game(20))
+        self.assertEqual([record['questions_asked'] for record in reopened], list(range(21)))
+
+    def test_rotates_by_age(self):
+        """Test a segment whose first game is too old is rotated"""
+        clock = FakeClock()
+        log = HistoryLog(self.path, max_bytes=None, max_age=60, clock=clock)
+        log.append(self.game(1))
+        clock.now += 30
+        log.append(self.game(2))
+        self.assertEqual(len(log.segments()), 1)
+        clock.now += 31
+        log.append(self.game(3))
+        self.assertEqual(len(log.segments()), 2)
+        with open(self.path, encoding='utf-8') as f:
+            self.assertEqual([json.loads(line)['questions_asked'] for line in f], [3])
+
+    def test_torn_line_is_skipped(self):
+        """Test a half-written last game does not break reading"""
+        log = HistoryLog(self.path)
+        log.append(self.game(1))
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('{"questions_asked": 2')
+        self.assertEqual([record['questions_asked'] for record in log], [1])
+
+
+    def test_time_range_skips_segments(self):
+        """Test iter_records filters by end time and skips segments outside the range"""
+        log = HistoryLog(self.path, max_bytes=400, max_age=None)
+        start = datetime(2024, 1, 1)
+        for number in range(20):
+            log.append(self.game(number, start + timedelta(hours=number)))
+
+        records = log.iter_records(since=start + timedelta(hours=5), until=start + timedelta(hours=9))
+        self.assertEqual([record['questions_asked'] for record in records], [5, 6, 7, 8, 9])
+
+        first_segment = log.segments()[0]
+        with open(first_segment, 'a', encoding='utf-8') as f:
+            f.write('not json but never read\n')
+        records = log.iter_records(since=start + timedelta(hours=18))
+        self.assertEqual([record['questions_asked'] for record in records], [18, 19])
+
+    def test_aggregates_survive_restart_without_scan(self):
+        """Test counters come from the sidecar plus the games appended after it"""
+        log = HistoryLog(self.path, max_bytes=400, max_age=None, aggregate_every=3)
+        for number in range(10):
+            log.append(self.game(number))
+        self.assertEqual(log.aggregates.games, 10)
+
+        reopened = HistoryLog(self.path, max_bytes=400, max_age=None)
+        self.assertEqual(reopened.aggregates.games, 10)
+        self.assertEqual(reopened.aggregates.questions, sum(range(10)))
+
+    def test_aggregates_catch_up_after_rotation(self):
+        """Test games in a segment rotated after the last sidecar write are counted"""
+        log = HistoryLog(self.path, max_bytes=300, max_age=None, aggregate_every=1000)
+        log.flush_aggregates()
+        for number in range(12):
+            log.append(self.game(number))
+        self.assertGreater(len(log.segments()), 2)
+
+        reopened = HistoryLog(self.path, max_bytes=300, max_age=None)
+        self.assertEqual(reopened.aggregates.games, 12)
+
+    def test_torn_tail_is_cut_before_appending(self):
+        """Test a new game after a torn line is still readable"""
+        log = HistoryLog(self.path)
+        log.append(self.game(1))
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('{"questions_asked": 2')
+        reopened = HistoryLog(self.path)
+        reopened.append(self.game(3))
+        self.assertEqual([record['questions_asked'] for record in reopened], [1, 3])
+        self.assertEqual(reopened.aggregates.games, 2)
+
+
+class TestHistoryPersistence(unittest.TestCase):
+    """Test GameManager history loading in both formats"""
+
+    def setUp(self):
+        """Create a temporary data directory"""
+        self.data_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the temporary data directory"""
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def manager(self, history_name='game_history.jsonl'):
+        """Game manager on the temporary directory"""
+        return GameManager(data_file=os.path.join(self.data_dir, 'tree_data.snapshot'),
+                           history_file=os.path.join(self.data_dir, history_name))
+
+    def play(self, manager):
+        """Play and end one game"""
+        manager.start_new_game()
+        manager.process_answer('yes')
+        return manager.end_current_game()
+
+    def test_finished_games_are_appended(self):
+        """Test each finished game adds one line and is loaded back"""
+        manager = self.manager()
+        self.play(manager)
+        self.play(manager)
+        with open(manager.history_file, encoding='utf-8') as f:
+            self.assertEqual(len(f.readlines()), 2)
+        self.assertEqual(len(list(self.manager().iter_sessions())), 2)
+
+    def test_legacy_array_is_imported(self):
+        """Test a game_history.json array is moved into the log"""
+        legacy = [GameSession().to_dict() for _ in range(3)]
+        legacy_path = os.path.join(self.data_dir, 'game_history.json')
+        with open(legacy_path, 'w', encoding='utf-8') as f:
+            json.dump(legacy, f, indent=2)
+
+        manager = self.manager()
+        self.assertEqual(manager.get_statistics()['games']['total'], 3)
+        self.assertFalse(os.path.exists(legacy_path))
+        self.play(manager)
+        self.assertEqual(len(list(self.manager().iter_sessions())), 4)
+
+    def test_legacy_array_at_log_path(self):
+        """Test a history_file that still holds the old array is converted in place"""
+        path = os.path.join(self.data_dir, 'game_history.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump([GameSession().to_dict()], f)
+
+        manager = self.manager('game_history.json')
+        self.play(manager)
+        reloaded = self.manager('game_history.json')
+        self.assertEqual(len(list(reloaded.iter_sessions())), 2)
+        self.assertEqual(reloaded.get_statistics()['games']['total'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+Unit Tests for the Learned-Animal Journal
+"""
+
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.game_manager import GameManager
+from app import snapshot
+
+
+class TestTreeJournal(unittest.TestCase):
+    """Test journaled learning, replay and checkpoints"""
+
+    def setUp(self):
+        """Create a game manager backed by a temporary data directory"""
+        self.data_dir = tempfile.mkdtemp()
+        self.manager = self.reload()
+
+    def tearDown(self):
+        """Remove the temporary data directory"""
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def reload(self, checkpoint_every=100):
+        """Start a game manager on the data directory, as after a restart"""
+        return GameManager(data_file=os.path.join(self.data_dir, 'tree_data.snapshot'),
+                           history_file=os.path.join(self.data_dir, 'game_history.jsonl'),
+                           checkpoint_every=checkpoint_every)
+
+    def learn(self, manager, answers, animal, question):
+        """Play to a guess and teach an animal"""
+        manager.start_new_game()
+        for answer in answers:
+            if manager.process_answer(answer)['reached_leaf']:
+                break
+        manager.tree.game_history = []  # keep the animals database untouched
+        self.assertTrue(manager.teach_new_animal(animal, question, "yes"))
+
+    def test_learning_appends_instead_of_rewriting(self):
+        """Test a learn leaves the snapshot alone and is replayed on restart"""
+        with open(self.manager.data_file, 'rb') as f:
+            before = f.read()
+        self.learn(self.manager, ['yes', 'yes', 'yes'], "Orca", "Is it black and white?")
+        self.learn(self.manager, ['yes', 'yes', 'yes', 'yes'], "Narwhal", "Does it have a tusk?")
+
+        with open(self.manager.data_file, 'rb') as f:
+            self.assertEqual(f.read(), before)
+        self.assertEqual(len(list(self.manager.journal)), 2)
+
+        reloaded = self.reload()
+        self.assertTrue(reloaded.tree.has_animal("Orca"))
+        self.assertTrue(reloaded.tree.has_animal("Narwhal"))
+        self.assertEqual(reloaded.tree.to_dict(include_ids=True),
+                         self.manager.tree.to_dict(include_ids=True))
+
+    def test_checkpoint_folds_journal(self):
+        """Test the journal is emptied into a snapshot every checkpoint_every learns"""
+        manager = self.reload(checkpoint_every=2)
+        self.learn(manager, ['yes', 'yes', 'yes'], "Orca", "Is it black and white?")
+        self.assertEqual(len(list(manager.journal)), 1)
+        self.learn(manager, ['yes', 'yes', 'yes', 'yes'], "Narwhal", "Does it have a tusk?")
+        self.assertEqual(list(manager.journal), [])
+
+        root, sequence = snapshot.load_checkpoint(manager.data_file)
+        self.assertEqual(sequence, 2)
+        self.assertEqual(root.to_dict(include_ids=True), manager.tree.to_dict(include_ids=True))
+
+    def test_records_in_snapshot_are_not_replayed_twice(self):
+        """Test a crash between writing the snapshot and emptying the journal is harmless"""
+        self.learn(self.manager, ['yes', 'yes', 'yes'], "Orca", "Is it black and white?")
+        snapshot.save(self.manager.tree.root, self.manager.data_file, self.manager._journal_seq)
+
+        reloaded = self.reload()
+        self.assertEqual(len(reloaded.tree.find_animal_leaves("Orca")), 1)
+        self.assertEqual(reloaded.tree.to_dict(include_ids=True),
+                         self.manager.tree.to_dict(include_ids=True))
+
+    def test_torn_record_is_ignored(self):
+        """Test a half-written last record is dropped on replay"""
+        self.learn(self.manager, ['yes', 'yes', 'yes'], "Orca", "Is it black and white?")
+        with open(self.manager.journal.path, 'a', encoding='utf-8') as f:
+            f.write('{"seq": 2, "path": "1')
+
+        reloaded = self.reload()
+        self.assertTrue(reloaded.tree.has_animal("Orca"))
+        self.assertEqual(reloaded._journal_seq, 1)
+
+    def test_ids_match_after_replay_of_rollback(self):
+        """Test node IDs stay stable when learning follows a rollback"""
+        self.learn(self.manager, ['yes', 'yes', 'yes'], "Orca", "Is it black and white?")
+        self.manager.rollback_tree(self.manager.tree.version - 1)
+        self.learn(self.manager, ['yes', 'yes', 'yes'], "Narwhal", "Does it have a tusk?")
+
+        reloaded = self.reload()
+        self.assertFalse(reloaded.tree.has_animal("Orca"))
+        self.assertEqual(reloaded.tree.to_dict(include_ids=True),
+                         self.manager.tree.to_dict(include_ids=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+"""
+Unit Tests for the Offline Tree Optimizer
+"""
+
+import unittest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.node import Node
+from app.tree import BinaryTree
+from app.optimizer import TreeOptimizer
+
+
+def question(text, yes, no):
+    """Build a question node with its Yes/No children"""
+    node = Node(text, is_leaf=False)
+    node.left_child, node.right_child = yes, no
+    yes.parent = no.parent = node
+    return node
+
+
+def animal(name):
+    """Build an animal leaf"""
+    return Node(name, is_leaf=True)
+
+
+class TestTreeOptimizer(unittest.TestCase):
+    """Test TreeOptimizer restructuring and reporting"""
+
+    def build_repeated_question_tree(self, dead_animal="Bat"):
+        """Tree that asks "Does it fly?" again after it was answered Yes"""
+        root = question("Does it fly?",
+                        question("Is it big?",
+                                 animal("Eagle"),
+                                 question("Does it fly?", animal("Sparrow"), animal(dead_animal))),
+                        question("Is it a mammal?", animal("Bat"), animal("Snake")))
+        return BinaryTree(root)
+
+    def test_removes_repeated_question(self):
+        """Test a re-asked question is replaced by its live branch"""
+        tree = self.build_repeated_question_tree()
+        report = TreeOptimizer(tree).optimize(dry_run=False)
+
+        self.assertTrue(report['applied'])
+        self.assertEqual(report['removed_questions'], 1)
+        self.assertEqual(report['before']['total_nodes'], 9)
+        self.assertEqual(report['after']['total_nodes'], 7)
+        self.assertLess(report['after']['average_depth'], report['before']['average_depth'])
+        self.assertEqual(tree.find_animal("Sparrow").depth, 2)
+        self.assertEqual(sorted(tree.get_all_animals()), ["Bat", "Eagle", "Snake", "Sparrow"])
+
+    def test_keeps_only_copy_of_animal(self):
+        """Test a dead branch holding the only leaf of an animal is kept"""
+        tree = self.build_repeated_question_tree(dead_animal="Penguin")
+        before = tree.to_dict()
+        report = TreeOptimizer(tree).optimize(dry_run=False)
+
+        self.assertFalse(report['improved'])
+        self.assertEqual(tree.to_dict(), before)
+
+    def test_merges_duplicates_by_frequency(self):
+        """Test the kept copy of a duplicated animal depends on play frequency"""
+        def build():
+            return BinaryTree(question("Is it a mammal?",
+                                       animal("Dog"),
+                                       question("Does it swim?", animal("Fish"), animal("dog"))))
+
+        tree = build()
+        report = TreeOptimizer(tree).optimize(dry_run=False)
+        self.assertEqual(report['merged_duplicates'], 1)
+        self.assertEqual(tree.to_dict()['right']['data'], "Fish")
+        self.assertEqual(tree.get_tree_height(), 1)
+
+        tree = build()
+        report = TreeOptimizer(tree, {'Dog': 1}, smoothing=0).optimize(dry_run=False)
+        self.assertEqual(len(tree.find_animal_leaves("Dog")), 1)
+        self.assertEqual(report['after']['weighted_average_depth'], 1)
+
+    def test_merges_use_depths_after_earlier_merges(self):
+        """Test a merge sees the depths left by the merge of the previous animal"""
+        tree = BinaryTree(question("Is it big?",
+                                   question("Does it fly?",
+                                            question("Does it swim?", animal("Dog"), animal("Cat")),
+                                            animal("Owl")),
+                                   question("Does it bark?", animal("Dog"), animal("Cat"))))
+        report = TreeOptimizer(tree, {'Dog': 3, 'Owl': 2}).optimize(dry_run=False)
+
+        # Merging Dog lifts the first Cat to depth 2, level with the other copy;
+        # keeping that one lets the frequent Dog move up to depth 1
+        self.assertEqual(report['merged_duplicates'], 2)
+        self.assertEqual(report['after']['weighted_average_depth'], 1.5)
+        self.assertEqual(tree.find_animal("Dog").depth, 1)
+
+    def test_merge_removes_question_left_without_answers(self):
+        """Test removing the only answer of a question removes the question, not just the leaf"""
+        barks = Node("Does it bark?", is_leaf=False)
+        barks.left_child = animal("dog")
+        barks.left_child.parent = barks
+        tree = BinaryTree(question("Is it a mammal?",
+                                   animal("Dog"),
+                                   question("Does it swim?", barks, animal("Fish"))))
+        report = TreeOptimizer(tree).optimize(dry_run=False)
+
+        self.assertEqual(report['merged_duplicates'], 1)
+        self.assertEqual(tree.to_dict(), BinaryTree(question("Is it a mammal?", animal("Dog"),
+                                                             animal("Fish"))).to_dict())
+
+    def test_dry_run_leaves_tree_unchanged(self):
+        """Test dry runs only report"""
+        tree = self.build_repeated_question_tree()
+        before = tree.to_dict()
+        report = TreeOptimizer(tree).optimize()
+
+        self.assertTrue(report['dry_run'])
+        self.assertTrue(report['improved'])
+        self.assertFalse(report['applied'])
+        self.assertEqual(tree.to_dict(), before)
+        self.assertEqual(tree.get_node_count(), 9)
+
+    def test_default_tree_is_already_minimal(self):
+        """Test the default tree has nothing to remove"""
+        tree = BinaryTree()
+        report = TreeOptimizer(tree).optimize(dry_run=False)
+
+        self.assertFalse(report['improved'])
+        self.assertEqual(report['before'], report['after'])
+
+    def test_frequencies_from_history(self):
+        """Test game history is counted by the player's actual animal"""
+        class Session:
+            def __init__(self, guessed, correct, actual=""):
+                self.animal_guessed, self.guessed_correctly, self.animal_actual = guessed, correct, actual
+
+        sessions = [Session("Dog", True), Session("Dog", False, "Cat"), Session("Dog", True)]
+        self.assertEqual(TreeOptimizer.frequencies_from_history(sessions), {'Dog': 2, 'Cat': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,259 @@
+"""
+Unit Tests for the Shared Tree and the Pre-Forked Server
+"""
+
+import unittest
+import sys
+import os
+import io
+import json
+import shutil
+import tempfile
+import threading
+from contextlib import redirect_stdout
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from werkzeug.serving import make_server
+
+from app import api
+from app.animal_store import AnimalStore
+from app.compact_tree import NO_NODE
+from app.game_manager import GameManager
+from app.prefork import SharedSessionRegistry, TreePublisher, create_worker_app
+from app.shared_tree import SharedTreeWriter, SharedTreeReader, SharedSessionTable, SlotState
+from app.tree import BinaryTree
+
+
+class TestSharedTree(unittest.TestCase):
+    """Test publishing and reading the memory-mapped tree"""
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.data_dir, 'tree.bin')
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def test_navigation_matches_tree(self):
+        """Test every animal is reached by the same path code as in the tree"""
+        tree = BinaryTree()
+        SharedTreeWriter(self.path).publish(tree.root)
+        version = SharedTreeReader(self.path).refresh()
+        self.assertEqual(version.node_count, tree.get_node_count())
+        self.assertEqual(version.get_data(version.root), tree.root.data)
+        for node in leaves(tree):
+            index = version.resolve_path_code(node.path_code, node.depth)
+            self.assertTrue(version.is_leaf(index))
+            self.assertEqual(version.get_data(index), node.data)
+        self.assertEqual(version.resolve_path_code(0, 200), NO_NODE)
+
+    def test_reader_follows_generation(self):
+        """Test a reader picks up a new version and old versions stay readable"""
+        tree = BinaryTree(persistent=True)
+        writer = SharedTreeWriter(self.path)
+        self.assertEqual(writer.publish(tree.root), 1)
+        reader = SharedTreeReader(self.path)
+        old = reader.refresh()
+
+        tree.cursor.node = leaves(tree)[0]
+        guessed = tree.cursor.node
+        tree.learn_new_animal("Axolotl", "Does it live in a Mexican lake?", True)
+        self.assertEqual(writer.publish(tree.root), 2)
+
+        new = reader.refresh()
+        self.assertEqual(new.generation, 2)
+        index = new.resolve_path_code(guessed.path_code | 1 << guessed.depth, guessed.depth + 1)
+        self.assertEqual(new.get_data(index), "Axolotl")
+        self.assertEqual(old.get_data(old.resolve_path_code(guessed.path_code, guessed.depth)), guessed.data)
+        self.assertIs(reader.refresh(), new)
+        self.assertEqual(SharedTreeWriter(self.path).generation, 2)
+
+
+class TestSharedSessionTable(unittest.TestCase):
+    """Test slots of the shared session table"""
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.table = SharedSessionTable(os.path.join(self.data_dir, 'sessions.bin'), slots=4, create=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def test_round_trip_and_reuse(self):
+        """Test a slot is shared between mappings and a reused slot rejects the old ID"""
+        session_id = self.table.allocate(1.0)
+        other = SharedSessionTable(self.table.path, slots=4)
+        state = SlotState(3, 7, 5, 200, (1 << 199) | 5, 2.5)
+        self.assertTrue(other.update(session_id, state))
+        self.assertEqual(self.table.read(session_id), state)
+
+        self.table.free(session_id)
+        self.assertIsNone(other.read(session_id))
+        self.assertFalse(other.update(session_id, state))
+        self.assertIsNone(self.table.read('not a session'))
+
+    def test_full_and_too_deep(self):
+        """Test allocation fails when every slot is used and deep games are refused"""
+        ids = [self.table.allocate(0.0) for _ in range(4)]
+        self.assertEqual(len(set(ids)), 4)
+        self.assertIsNone(self.table.allocate(0.0))
+        with self.assertRaises(ValueError):
+            self.table.update(ids[0], SlotState(0, 0, 0, 257, 0, 0.0))
+
+
+class TestSharedSessionRegistry(unittest.TestCase):
+    """Test the writer's registry stays in step with answers given to workers"""
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.tree = BinaryTree(persistent=True)
+        self.table = SharedSessionTable(os.path.join(self.data_dir, 'sessions.bin'), slots=8, create=True)
+        self.now = [0.0]
+        self.registry = SharedSessionRegistry(self.table, lambda: self.tree, ttl=10,
+                                              clock=lambda: self.now[0])
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def test_get_syncs_cursor(self):
+        """Test a looked-up cursor is at the node a worker moved the game to"""
+        from app.game_manager import GameSession
+        record = self.registry.create(self.tree.new_cursor(), GameSession())
+        self.table.update(record.session_id, SlotState(1, NO_NODE, 2, 2, 0b01, 0.0))
+
+        cursor = self.registry.get(record.session_id).cursor
+        expected = self.tree.resolve_path_code(0b01, 2)
+        self.assertIs(cursor.node, expected)
+        self.assertEqual([answer for _, answer in cursor.history], [True, False])
+        self.assertEqual(cursor.history[0][0], self.tree.root.data)
+        self.assertEqual(record.game.questions_asked, 2)
+
+    def test_worker_activity_keeps_session_alive(self):
+        """Test answers recorded in the slot count as activity, and removal frees the slot"""
+        from app.game_manager import GameSession
+        record = self.registry.create(self.tree.new_cursor(), GameSession())
+        self.now[0] = 8.0
+        self.table.update(record.session_id, SlotState(1, NO_NODE, 1, 1, 1, 8.0))
+        self.now[0] = 15.0
+        self.assertIsNotNone(self.registry.get(record.session_id))
+
+        self.assertTrue(self.registry.remove(record.session_id))
+        self.assertIsNone(self.table.read(record.session_id))
+
+
+class TestWorkerApp(unittest.TestCase):
+    """Test a worker app in front of a writer server (in one process)"""
+
+    def setUp(self):
+        """Serve a manager on temporary files as the writer"""
+        self.data_dir = tempfile.mkdtemp()
+        self.saved_manager = api.game_manager
+        with redirect_stdout(io.StringIO()):
+            api.game_manager = manager = GameManager(
+                data_file=os.path.join(self.data_dir, 'tree_data.snapshot'),
+                history_file=os.path.join(self.data_dir, 'game_history.jsonl')
+            )
+        manager.tree.animal_store = AnimalStore(os.path.join(self.data_dir, 'animals.json'))
+        tree_path = os.path.join(self.data_dir, 'tree.bin')
+        publisher = TreePublisher(api.app, SharedTreeWriter(tree_path), lambda: manager.tree)
+        publisher.publish()
+        table = SharedSessionTable(os.path.join(self.data_dir, 'sessions.bin'), slots=16, create=True)
+        manager.sessions = SharedSessionRegistry(table, lambda: manager.tree)
+
+        self.server = make_server('127.0.0.1', 0, publisher, threaded=True)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = create_worker_app(SharedTreeReader(tree_path), table,
+                                        self.server.server_port).test_client()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        api.game_manager = self.saved_manager
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def post(self, path, body):
+        with redirect_stdout(io.StringIO()):
+            reply = self.client.post(path, data=json.dumps(body), content_type='application/json')
+        return reply.status_code, reply.get_json()
+
+    def play(self, answers):
+        """Start a game and answer until a guess; returns the session and the last reply"""
+        _, reply = self.post('/api/game/start', {})
+        session_id = reply['session_id']
+        for answer in answers:
+            _, reply = self.post('/api/game/answer', {'session_id': session_id, 'answer': answer})
+            if reply['reached_guess']:
+                break
+        return session_id, reply
+
+    def test_learned_animal_reaches_workers(self):
+        """Test a game taught through the writer is guessed by the next game on a worker"""
+        answers = ['no'] * 30
+        session_id, reply = self.play(answers)
+        self.assertTrue(reply['reached_guess'])
+        status, _ = self.post('/api/game/guess-result',
+                              {'session_id': session_id, 'was_correct': False, 'actual_animal': 'Quokka'})
+        self.assertEqual(status, 200)
+        status, reply = self.post('/api/game/learn', {
+            'session_id': session_id, 'new_animal': 'Quokka',
+            'question': 'Does it smile for selfies?', 'answer_for_new': 'yes'})
+        self.assertEqual(status, 200, reply)
+        self.assertTrue(api.game_manager.tree.has_animal('Quokka'))
+
+        quokka = next(node for node in leaves(api.game_manager.tree) if node.data == 'Quokka')
+        _, reply = self.play(['yes' if quokka.path_code >> level & 1 else 'no' for level in range(quokka.depth)])
+        self.assertEqual(reply.get('guess'), 'Quokka')
+
+    def test_answers_match_single_process(self):
+        """Test the worker's replies match the API's own for the same answers"""
+        session_id, reply = self.play(['yes', 'no', 'yes'])
+        with redirect_stdout(io.StringIO()):
+            manager = api.game_manager
+            expected = manager.tree.resolve_path_code(0b101, 3)
+        if expected.is_leaf:
+            self.assertEqual(reply['guess'], expected.data)
+        else:
+            self.assertEqual(reply['question'], expected.data)
+        self.assertEqual(reply['questions_asked'], 3)
+
+        status, reply = self.post('/api/game/answer', {'session_id': 'ffffff' + '0' * 32, 'answer': 'yes'})
+        self.assertEqual(status, 404)
+        self.assertTrue(reply['expired'])
+        status, _ = self.post('/api/game/answer', {'session_id': session_id, 'answer': 'maybe'})
+        self.assertEqual(status, 400)
+
+    def test_batch_answers_match_single_answers(self):
+        """Test a batch sent to a worker ends where the same answers sent one by one do"""
+        _, single = self.play(['no', 'yes', 'no', 'yes', 'yes', 'no'])
+        answers = 'nynyyn'[:single['questions_asked']]
+        _, reply = self.post('/api/game/start', {})
+        status, batch = self.post('/api/game/answers', {'session_id': reply['session_id'], 'answers': answers})
+        self.assertEqual(status, 200)
+        for key in ('questions_asked', 'reached_guess', 'guess', 'question'):
+            self.assertEqual(batch.get(key), single.get(key))
+
+        with redirect_stdout(io.StringIO()):
+            record = api.game_manager.get_session(reply['session_id'])
+        self.assertEqual([(step['question'], step['answer'] == 'Yes') for step in batch['path']],
+                         record.cursor.history)
+        self.assertEqual(record.game.questions_asked, batch['questions_asked'])
+        status, _ = self.post('/api/game/answers', {'session_id': reply['session_id'], 'answers': 'ynx'})
+        self.assertEqual(status, 400)
+
+
+def leaves(tree):
+    """Animal nodes of a tree, in preorder"""
+    found, stack = [], [tree.root]
+    while stack:
+        node = stack.pop()
+        if node.is_leaf:
+            found.append(node)
+        else:
+            stack.extend(child for child in (node.right_child, node.left_child) if child is not None)
+    return found
+
+
+if __name__ == '__main__':
+    unittest.main()
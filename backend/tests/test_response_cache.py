@@ -0,0 +1,154 @@
+"""
+Unit Tests for the Response Cache and the Cached Read Endpoints
+"""
+
+import unittest
+import sys
+import os
+import io
+import json
+import shutil
+import tempfile
+from contextlib import redirect_stdout
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import api
+from app.animal_store import AnimalStore
+from app.game_manager import GameManager
+from app.response_cache import ResponseCache
+
+
+class TestResponseCache(unittest.TestCase):
+    """Test the LRU cache of encoded bodies"""
+
+    def test_builds_once_per_key(self):
+        """Test a body is built on the first request for a key only"""
+        cache = ResponseCache()
+        calls = []
+
+        def build():
+            calls.append(1)
+            return b'body'
+        self.assertEqual(cache.get(('a', 1), build), b'body')
+        self.assertEqual(cache.get(('a', 1), build), b'body')
+        self.assertEqual(len(calls), 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        cache.get(('a', 2), build)
+        self.assertEqual(len(calls), 2)
+        self.assertNotEqual(ResponseCache.etag(('a', 1)), ResponseCache.etag(('a', 2)))
+
+    def test_evicts_least_recently_used(self):
+        """Test the entry and byte limits drop the least recently used bodies"""
+        cache = ResponseCache(max_entries=2, max_bytes=10)
+        cache.get('a', lambda: b'1234')
+        cache.get('b', lambda: b'1234')
+        cache.get('a', lambda: b'')  # Hit: 'b' becomes the oldest
+        cache.get('c', lambda: b'1234')
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get('a', lambda: b'rebuilt'), b'1234')
+        self.assertEqual(cache.get('b', lambda: b'rebuilt'), b'rebuilt')
+
+        cache.get('big', lambda: b'x' * 20)  # Over max_bytes on its own: kept alone
+        self.assertEqual(len(cache), 1)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+
+class TestCachedEndpoints(unittest.TestCase):
+    """Test ETags, 304 replies and invalidation of the read endpoints"""
+
+    PATHS = ('/api/tree/data', '/api/tree/display', '/api/stats', '/api/animals')
+
+    def setUp(self):
+        """Serve a manager on temporary files"""
+        self.data_dir = tempfile.mkdtemp()
+        self.saved_manager = api.game_manager
+        with redirect_stdout(io.StringIO()):
+            api.game_manager = GameManager(
+                data_file=os.path.join(self.data_dir, 'tree_data.snapshot'),
+                history_file=os.path.join(self.data_dir, 'game_history.jsonl')
+            )
+        api.game_manager.tree.animal_store = AnimalStore(os.path.join(self.data_dir, 'animals.json'))
+        api.response_cache.clear()
+        self.client = api.app.test_client()
+
+    def tearDown(self):
+        api.game_manager = self.saved_manager
+        api.response_cache.clear()
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def post(self, path, body):
+        with redirect_stdout(io.StringIO()):
+            reply = self.client.post(path, data=json.dumps(body), content_type='application/json')
+        return reply.get_json()
+
+    def etags(self):
+        return {path: self.client.get(path).headers['ETag'] for path in self.PATHS}
+
+    def test_not_modified(self):
+        """Test a matching If-None-Match gets an empty 304 and a stale one the body"""
+        for path in self.PATHS:
+            first = self.client.get(path)
+            self.assertEqual(first.status_code, 200, path)
+            self.assertTrue(first.get_json()['success'])
+            again = self.client.get(path, headers={'If-None-Match': first.headers['ETag']})
+            self.assertEqual(again.status_code, 304, path)
+            self.assertEqual(again.data, b'')
+            self.assertEqual(again.headers['ETag'], first.headers['ETag'])
+            other = self.client.get(path, headers={'If-None-Match': '"stale"'})
+            self.assertEqual(other.data, first.data)
+
+    def test_display_arguments_are_part_of_the_key(self):
+        """Test different display windows get different bodies and tags"""
+        full = self.client.get('/api/tree/display')
+        window = self.client.get('/api/tree/display?offset=1&limit=2')
+        self.assertNotEqual(full.headers['ETag'], window.headers['ETag'])
+        self.assertEqual(window.get_json()['tree'].split('\n'),
+                         full.get_json()['tree'].split('\n')[1:3])
+
+    def test_writes_invalidate(self):
+        """Test guess results, learns (which end the game) and finished games move the affected tags"""
+        session_id = self.post('/api/game/start', {})['session_id']
+        reply = {'reached_guess': False}
+        while not reply['reached_guess']:
+            reply = self.post('/api/game/answer', {'session_id': session_id, 'answer': 'no'})
+        before = self.etags()
+
+        self.post('/api/game/guess-result',
+                  {'session_id': session_id, 'was_correct': False, 'actual_animal': 'Tapir'})
+        after_guess = self.etags()
+        self.assertNotEqual(after_guess['/api/stats'], before['/api/stats'])
+        self.assertEqual(after_guess['/api/animals'], before['/api/animals'])
+
+        self.post('/api/game/learn', {'session_id': session_id, 'new_animal': 'Tapir',
+                                      'question': 'Does it have a short trunk?', 'answer_for_new': 'yes'})
+        after_learn = self.etags()
+        for path in self.PATHS:
+            self.assertNotEqual(after_learn[path], after_guess[path], path)
+        self.assertIn('Tapir', self.client.get('/api/animals').get_json()['animals'])
+        self.assertEqual(self.client.get('/api/stats').get_json()['statistics']['games']['total'], 1)
+
+        session_id = self.post('/api/game/start', {})['session_id']
+        self.post('/api/game/answer', {'session_id': session_id, 'answer': 'yes'})
+        self.post('/api/game/end', {'session_id': session_id})
+        after_end = self.etags()
+        self.assertNotEqual(after_end['/api/stats'], after_learn['/api/stats'])
+        self.assertEqual(after_end['/api/tree/data'], after_learn['/api/tree/data'])
+        self.assertEqual(self.client.get('/api/stats').get_json()['statistics']['games']['total'], 2)
+
+    def test_stats_follow_the_window_bucket(self):
+        """Test the stats tag moves when the rolling windows reach their next bucket"""
+        now = [1000.0]
+        stats = api.game_manager.recent_stats
+        stats.clock = lambda: now[0]
+        tag = self.client.get('/api/stats').headers['ETag']
+        now[0] += 1
+        self.assertEqual(self.client.get('/api/stats').headers['ETag'], tag)
+        now[0] += 10
+        self.assertNotEqual(self.client.get('/api/stats').headers['ETag'], tag)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Unit Tests for Compact Game Session Storage
+"""
+
+import unittest
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.game_manager import GameSession
+from app.history_log import HistoryAggregates
+from app.session_store import SessionColumns, NameTable
+
+
+def stored_game(number, start=datetime(2024, 1, 1, 12, 0)):
+    """Stored dictionary of a finished game"""
+    return {
+        'questions_asked': number % 7,
+        'start_time': (start + timedelta(minutes=number)).isoformat(),
+        'end_time': (start + timedelta(minutes=number, seconds=30, milliseconds=250)).isoformat(),
+        'guessed_correctly': number % 3 != 0,
+        'animal_guessed': ["Dog", "Cat", "Owl"][number % 3],
+        'animal_actual': "Frog" if number % 3 == 0 else "",
+        'learned_new_animal': number % 6 == 0
+    }
+
+
+class TestGameSession(unittest.TestCase):
+    """Test the slotted GameSession"""
+
+    def test_dict_round_trip(self):
+        """Test from_dict/to_dict keep the stored JSON shape"""
+        item = stored_game(3)
+        self.assertEqual(GameSession.from_dict(item).to_dict(), item)
+
+    def test_no_instance_dict(self):
+        """Test sessions are slotted and missing names read as empty strings"""
+        session = GameSession()
+        self.assertFalse(hasattr(session, '__dict__'))
+        session.animal_guessed = "Narwhal"
+        session.animal_actual = None
+        self.assertEqual((session.animal_guessed, session.animal_actual), ("Narwhal", ""))
+
+    def test_running_game_has_no_end(self):
+        """Test a new session has no end time and empty animals"""
+        session = GameSession()
+        self.assertIsNone(session.end_time)
+        self.assertEqual(session.animal_actual, "")
+        self.assertIsNone(session.to_dict()['end_time'])
+
+
+class TestSessionColumns(unittest.TestCase):
+    """Test the columnar history container"""
+
+    def setUp(self):
+        """Fill a container with stored games"""
+        self.items = [stored_game(number) for number in range(30)]
+        self.columns = SessionColumns()
+        self.columns.extend_records(self.items)
+
+    def test_rows_rebuild_sessions(self):
+        """Test each row turns back into the same game"""
+        self.assertEqual(len(self.columns), 30)
+        self.assertEqual([session.to_dict() for session in self.columns], self.items)
+
+    def test_aggregates_match_history_counters(self):
+        """Test totals and animal counts agree with HistoryAggregates"""
+        aggregates = HistoryAggregates()
+        for item in self.items:
+            aggregates.add(item)
+        totals = self.columns.totals()
+        self.assertEqual(totals, {'games': aggregates.games, 'correct': aggregates.correct,
+                                  'questions': aggregates.questions, 'learned': aggregates.learned})
+        self.assertEqual(self.columns.animal_counts(), aggregates.animals)
+
+    def test_between_uses_end_time(self):
+        """Test time ranges select rows by end time"""
+        start = datetime(2024, 1, 1, 12, 0)
+        part = self.columns.between(since=start + timedelta(minutes=10),
+                                    until=start + timedelta(minutes=14, seconds=31))
+        self.assertEqual([session.to_dict() for session in part], self.items[10:15])
+
+    def test_between_skips_open_games(self):
+        """Test games that never ended neither hide nor join finished rows in a range"""
+        start = datetime(2024, 1, 1, 12, 0)
+        columns = SessionColumns()
+        items = []
+        for number in range(12):
+            item = stored_game(number)
+            if number % 4 == 1:
+                item['end_time'] = None
+            items.append(item)
+        columns.extend_records(items)
+        self.assertEqual(columns.open_rows, 3)
+
+        part = columns.between(since=start + timedelta(minutes=4),
+                               until=start + timedelta(minutes=9, seconds=31))
+        self.assertEqual([session.to_dict() for session in part],
+                         [item for item in items[4:10] if item['end_time']])
+        self.assertEqual(len(columns.between()), 9)
+        self.assertEqual(part.open_rows, 0)
+
+    def test_append_session(self):
+        """Test appending GameSession objects"""
+        columns = SessionColumns(NameTable())
+        session = GameSession.from_dict(stored_game(4))
+        columns.append(session)
+        self.assertEqual(columns[0].to_dict(), session.to_dict())
+        self.assertEqual(columns.nbytes(), 29)
+
+    def test_names_belong_to_the_container(self):
+        """Test names are interned per container, not process-wide"""
+        columns = SessionColumns()
+        columns.extend_records([dict(stored_game(0), animal_actual="Frogg")])
+        self.assertEqual(len(columns.names), 3)  # "", "Dog" and "Frogg"
+        self.assertNotIn("Frogg", self.columns.names._ids)
+        self.assertIs(self.columns.between().names, self.columns.names)
+
+
+if __name__ == '__main__':
+    unittest.main()
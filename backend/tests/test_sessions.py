@@ -0,0 +1,87 @@
+"""
+Unit Tests for the Game Session Registry
+"""
+
+import unittest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.tree import BinaryTree
+from app.game_manager import GameSession
+from app.sessions import SessionRegistry
+
+
+class FakeClock:
+    """Manually advanced time source"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestSessionRegistry(unittest.TestCase):
+    """Test TTL, LRU and memory-cap eviction"""
+    
+    def setUp(self):
+        """Create a tree and a registry with a fake clock"""
+        self.tree = BinaryTree()
+        self.clock = FakeClock()
+    
+    def create(self, registry):
+        """Register a fresh game"""
+        return registry.create(self.tree.new_cursor(), GameSession())
+    
+    def test_sessions_have_independent_cursors(self):
+        """Test two sessions walk the tree separately"""
+        registry = SessionRegistry(clock=self.clock)
+        first, second = self.create(registry), self.create(registry)
+        self.assertNotEqual(first.session_id, second.session_id)
+        
+        self.tree.answer_question(True, first.cursor)
+        self.tree.answer_question(False, second.cursor)
+        self.assertEqual(self.tree.get_current_question(first.cursor), "Does it live in water?")
+        self.assertEqual(self.tree.get_current_question(second.cursor), "Does it have feathers?")
+        self.assertEqual(len(first.cursor.history), 1)
+        self.assertIs(registry.get(first.session_id), first)
+    
+    def test_idle_sessions_expire(self):
+        """Test sessions are dropped after the TTL"""
+        registry = SessionRegistry(ttl=60, clock=self.clock)
+        idle = self.create(registry)
+        self.clock.now = 30
+        active = self.create(registry)
+        
+        self.clock.now = 80
+        self.assertIsNone(registry.get(idle.session_id))
+        self.assertIs(registry.get(active.session_id), active)
+        self.assertEqual(len(registry), 1)
+    
+    def test_least_recently_used_is_evicted(self):
+        """Test the session limit evicts the least recently used session"""
+        registry = SessionRegistry(max_sessions=2, clock=self.clock)
+        first, second = self.create(registry), self.create(registry)
+        registry.get(first.session_id)
+        third = self.create(registry)
+        
+        self.assertIn(first.session_id, registry)
+        self.assertNotIn(second.session_id, registry)
+        self.assertIn(third.session_id, registry)
+    
+    def test_memory_cap(self):
+        """Test the memory cap bounds the estimated size of all sessions"""
+        record_size = self.create(SessionRegistry(clock=self.clock)).size
+        registry = SessionRegistry(max_bytes=record_size * 3, clock=self.clock)
+        for _ in range(10):
+            self.create(registry)
+        
+        self.assertEqual(len(registry), 3)
+        self.assertLessEqual(registry.memory_usage(), record_size * 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
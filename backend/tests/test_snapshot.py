@@ -0,0 +1,141 @@
+"""
+Unit Tests for Binary Tree Snapshots
+"""
+
+import unittest
+import sys
+import os
+import json
+import shutil
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.node import Node
+from app.tree import BinaryTree
+from app import snapshot
+
+
+class TestSnapshot(unittest.TestCase):
+    """Test snapshot encoding, validation and JSON conversion"""
+
+    def setUp(self):
+        """Create a temporary directory for snapshot files"""
+        self.data_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the temporary directory"""
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def learned_tree(self):
+        """Default tree with a learned animal (and a non-ASCII name)"""
+        tree = BinaryTree()
+        for answer in (True, True, True):
+            tree.answer_question(answer)
+        tree.game_history = []  # keep the animals database untouched
+        tree.learn_new_animal("Éléphant de mer", "Does it live in cold water?", True)
+        return tree
+
+    def test_round_trip_keeps_structure_and_ids(self):
+        """Test decode(encode(tree)) gives the same tree, node IDs included"""
+        tree = self.learned_tree()
+        root = snapshot.decode(snapshot.encode(tree.root))
+        self.assertEqual(root.to_dict(include_ids=True), tree.root.to_dict(include_ids=True))
+
+        reloaded = BinaryTree(root)
+        self.assertTrue(reloaded.has_animal("Éléphant de mer"))
+        self.assertEqual(reloaded.get_statistics(), tree.get_statistics())
+
+    def test_strings_are_deduplicated(self):
+        """Test a repeated string is stored once"""
+        root = Node("Does it fly?", left_child=Node("Bat", is_leaf=True),
+                    right_child=Node("Does it fly?", left_child=Node("Bat", is_leaf=True),
+                                     right_child=Node("Cat", is_leaf=True)))
+        data = snapshot.encode(root)
+        self.assertEqual(data.count(b"Does it fly?"), 1)
+        self.assertEqual(data.count(b"Bat"), 1)
+        self.assertEqual(snapshot.decode(data).to_dict(), root.to_dict())
+
+    def test_single_child_question(self):
+        """Test questions with only one answer branch survive a round trip"""
+        root = Node("Does it fly?", right_child=Node("Cat", is_leaf=True))
+        decoded = snapshot.decode(snapshot.encode(root))
+        self.assertIsNone(decoded.left_child)
+        self.assertEqual(decoded.right_child.data, "Cat")
+        self.assertIs(decoded.right_child.parent, decoded)
+
+    def test_deep_chain(self):
+        """Test a tree deeper than the recursion limit is saved and loaded"""
+        depth = sys.getrecursionlimit() * 2
+        root = node = Node("Question 0")
+        for level in range(1, depth):
+            node.right_child = Node(f"Animal {level}", is_leaf=True, parent=node)
+            node.left_child = Node(f"Question {level}", parent=node)
+            node = node.left_child
+        node.is_leaf = True
+
+        decoded = snapshot.decode(snapshot.encode(root))
+        self.assertEqual(BinaryTree(decoded).get_statistics()['height'], depth - 1)
+
+    def test_empty_tree(self):
+        """Test an empty tree encodes to a snapshot that decodes to None"""
+        self.assertIsNone(snapshot.decode(snapshot.encode(None)))
+
+    def test_corruption_is_detected(self):
+        """Test flipped bits and truncation are rejected"""
+        data = bytearray(snapshot.encode(self.learned_tree().root))
+        data[len(data) // 2] ^= 0x01
+        with self.assertRaises(snapshot.SnapshotError):
+            snapshot.decode(bytes(data))
+        with self.assertRaises(snapshot.SnapshotError):
+            snapshot.decode(snapshot.encode(self.learned_tree().root)[:-10])
+        with self.assertRaises(snapshot.SnapshotError):
+            snapshot.decode(b'{"data": "Cat"}')
+
+    def test_unknown_version_is_rejected(self):
+        """Test a snapshot from a newer format version is refused"""
+        data = bytearray(snapshot.encode(Node("Cat", is_leaf=True)))
+        data[4] = snapshot.SNAPSHOT_VERSION + 1
+        body = bytes(data[:-4])
+        data[-4:] = snapshot._CHECKSUM.pack(snapshot.zlib.crc32(body))
+        with self.assertRaisesRegex(snapshot.SnapshotError, "version"):
+            snapshot.decode(bytes(data))
+
+    def test_reads_version_1(self):
+        """Test snapshots written before the journal sequence field still load"""
+        root = self.learned_tree().root
+        data = snapshot.encode(root, sequence=7)
+        prefix = snapshot._PREFIX.pack(snapshot.SNAPSHOT_MAGIC, 1, 0)
+        counts = snapshot._COUNTS[2].unpack_from(data, snapshot._PREFIX.size)
+        body = (prefix + snapshot._COUNTS[1].pack(*counts[:2])
+                + data[snapshot._PREFIX.size + snapshot._COUNTS[2].size:-4])
+        old = body + snapshot._CHECKSUM.pack(snapshot.zlib.crc32(body))
+
+        decoded, sequence = snapshot.decode_checkpoint(old)
+        self.assertEqual(sequence, 0)
+        self.assertEqual(decoded.to_dict(include_ids=True), root.to_dict(include_ids=True))
+        self.assertEqual(snapshot.decode_checkpoint(data)[1], 7)
+
+    def test_json_conversion_both_ways(self):
+        """Test snapshot -> JSON -> snapshot keeps the tree"""
+        tree = self.learned_tree()
+        snapshot_path = os.path.join(self.data_dir, 'tree.snapshot')
+        json_path = os.path.join(self.data_dir, 'tree.json')
+        copy_path = os.path.join(self.data_dir, 'copy.snapshot')
+
+        snapshot.save(tree.root, snapshot_path)
+        self.assertTrue(snapshot.is_snapshot(snapshot_path))
+        snapshot.export_json(snapshot_path, json_path)
+        self.assertFalse(snapshot.is_snapshot(json_path))
+        with open(json_path, encoding='utf-8') as f:
+            self.assertEqual(json.load(f), tree.root.to_dict(include_ids=True))
+
+        snapshot.import_json(json_path, copy_path)
+        self.assertEqual(snapshot.load(copy_path).to_dict(include_ids=True),
+                         tree.root.to_dict(include_ids=True))
+        self.assertFalse([name for name in os.listdir(self.data_dir) if name.startswith('.tmp-')])
+
+
+if __name__ == '__main__':
+    unittest.main()
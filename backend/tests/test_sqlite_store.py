@@ -0,0 +1,213 @@
+"""
+Unit Tests for the SQLite Storage Engine
+"""
+
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import sqlite3
+from datetime import datetime, timedelta
+from unittest import mock
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.sqlite_store import SQLiteDatabase, SQLiteHistory, SQLiteAnimalStore, migrate_to_sqlite
+from app.game_manager import GameManager
+
+
+def make_record(end: datetime, correct: bool = True, questions: int = 4, animal: str = "Dog"):
+    """A stored game in the GameSession.to_dict shape"""
+    return {
+        'questions_asked': questions,
+        'start_time': (end - timedelta(minutes=1)).isoformat(),
+        'end_time': end.isoformat(),
+        'guessed_correctly': correct,
+        'animal_guessed': animal if correct else "Cat",
+        'animal_actual': "" if correct else animal,
+        'learned_new_animal': False
+    }
+
+
+class TestSQLiteDatabase(unittest.TestCase):
+    """Test the row storage of trees, games and animals"""
+
+    def setUp(self):
+        """Create a database in a temporary directory"""
+        self.data_dir = tempfile.mkdtemp()
+        self.database = SQLiteDatabase(os.path.join(self.data_dir, 'pseudoqui.db'))
+
+    def tearDown(self):
+        """Close and remove the database"""
+        self.database.close()
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def test_wal_mode(self):
+        """Test the database runs in write-ahead-log mode"""
+        mode = self.database.connection.execute('PRAGMA journal_mode').fetchone()[0]
+        self.assertEqual(mode, 'wal')
+
+    def test_history_range_and_totals(self):
+        """Test games are counted and read back by end time"""
+        history = SQLiteHistory(self.database)
+        start = datetime(2024, 1, 1, 12, 0)
+        for minute in range(5):
+            history.append(make_record(start + timedelta(minutes=minute), correct=minute % 2 == 0))
+
+        reopened = SQLiteHistory(self.database)
+        self.assertEqual(reopened.aggregates.games, 5)
+        self.assertEqual(reopened.aggregates.correct, 3)
+        self.assertEqual(reopened.aggregates.questions, 20)
+        self.assertEqual(reopened.aggregates.animals, {'Dog': 5})
+
+        ended = [r['end_time'] for r in reopened.iter_records(start + timedelta(minutes=1),
+                                                              start + timedelta(minutes=3))]
+        self.assertEqual(ended, [(start + timedelta(minutes=m)).isoformat() for m in (1, 2, 3)])
+        self.assertEqual(len(list(reopened)), 5)
+
+    def test_range_query_uses_index(self):
+        """Test time-range queries go through the end-time index"""
+        plan = self.database.connection.execute(
+            'EXPLAIN QUERY PLAN SELECT id FROM sessions WHERE end_ms BETWEEN 0 AND 1 '
+            'AND (end_ms, id) > (0, 0) ORDER BY end_ms, id').fetchall()
+        self.assertIn('sessions_end', ' '.join(str(row) for row in plan))
+
+    def test_iter_sessions_pages(self):
+        """Test streaming continues across fetch batches"""
+        start = datetime(2024, 1, 1)
+        self.database.insert_sessions([make_record(start + timedelta(seconds=s)) for s in range(25)])
+        self.assertEqual(len(list(self.database.iter_sessions(batch=10))), 25)
+        self.assertEqual(len(list(self.database.iter_sessions(since=start, batch=10))), 25)
+
+    def test_animal_store_writes_dirty_rows(self):
+        """Test the animal store flushes updates into the animals table"""
+        self.database.upsert_animals([('Dog', 50.0), ('Cat', 20.0)])
+        store = SQLiteAnimalStore(self.database)
+        store.record_success('Dog', True, [("q", True)])
+        store.add_learned('Owl', [("q", False)])
+        self.assertTrue(store.flush())
+        animals = {a['name']: a['yes_percentage'] for a in self.database.load_animals()}
+        self.assertEqual(animals, {'Dog': 55.0, 'Cat': 20.0, 'Owl': 0.0})
+
+
+class TestSQLiteGameManager(unittest.TestCase):
+    """Test GameManager running on a database"""
+
+    def setUp(self):
+        """Create a manager on a temporary database"""
+        self.data_dir = tempfile.mkdtemp()
+        self.database_file = os.path.join(self.data_dir, 'pseudoqui.db')
+        self.manager = GameManager(
+            data_file=os.path.join(self.data_dir, 'tree_data.snapshot'),
+            history_file=os.path.join(self.data_dir, 'game_history.jsonl'),
+            database_file=self.database_file
+        )
+
+    def tearDown(self):
+        """Close the database and remove the temporary directory"""
+        self.manager.animal_store.close()
+        self.manager.database.close()
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def play_and_learn(self, animal: str, question: str):
+        """Answer "no" until a guess, then teach an animal"""
+        self.manager.start_new_game()
+        while not self.manager.process_answer("no")['reached_leaf']:
+            pass
+        self.manager.submit_guess_result(False, animal)
+        self.assertTrue(self.manager.teach_new_animal(animal, question, "yes"))
+        self.manager.end_current_game()
+
+    def test_no_data_files(self):
+        """Test nothing is written outside the database"""
+        self.play_and_learn("Axolotl", "Can it regrow its limbs?")
+        self.assertEqual(sorted(os.listdir(self.data_dir)),
+                         sorted(n for n in os.listdir(self.data_dir) if n.startswith('pseudoqui.db')))
+
+    def test_learn_touches_three_rows(self):
+        """Test a learn is one small transaction, whatever the tree size"""
+        self.play_and_learn("Axolotl", "Can it regrow its limbs?")
+        connection = self.manager.database.connection
+        before = connection.total_changes
+        self.play_and_learn("Quokka", "Does it always look like it is smiling?")
+        self.assertEqual(connection.total_changes - before, 3 + 3)  # learn + one game row and two counters
+
+    def test_failed_learn_rewrites_tree(self):
+        """Test a learn the database refuses is saved by rewriting the node rows"""
+        error = sqlite3.OperationalError("database is locked")
+        with mock.patch.object(self.manager.database, 'record_learn', side_effect=error):
+            self.play_and_learn("Zebu", "Does it have a hump?")
+        self.assertEqual(self.manager.database.load_tree().to_dict(include_ids=True),
+                         self.manager.tree.root.to_dict(include_ids=True))
+
+        self.play_and_learn("Quokka", "Does it always look like it is smiling?")
+        self.assertEqual(self.manager.database.load_tree().to_dict(include_ids=True),
+                         self.manager.tree.root.to_dict(include_ids=True))
+
+    def test_learn_on_missing_row_is_refused(self):
+        """Test record_learn writes nothing when the replaced leaf has no row"""
+        self.play_and_learn("Axolotl", "Can it regrow its limbs?")
+        question = self.manager.tree.root
+        while not question.left_child.is_leaf:
+            question = question.left_child
+        database = self.manager.database
+        database._transaction([('DELETE FROM nodes WHERE id = ?', (question.node_id,))])
+        before = database.connection.total_changes
+        with self.assertRaises(sqlite3.IntegrityError):
+            database.record_learn(question)
+        self.assertEqual(database.connection.total_changes, before)
+
+    def test_tree_and_history_survive_restart(self):
+        """Test a new manager reads the tree and history back from the database"""
+        self.play_and_learn("Axolotl", "Can it regrow its limbs?")
+        stats = self.manager.get_statistics()
+        self.manager.animal_store.close()
+        self.manager.database.close()
+
+        self.manager = GameManager(
+            data_file=os.path.join(self.data_dir, 'tree_data.snapshot'),
+            history_file=os.path.join(self.data_dir, 'game_history.jsonl'),
+            database_file=self.database_file
+        )
+        self.assertTrue(self.manager.tree.has_animal("Axolotl"))
+        self.assertIs(self.manager.tree.animal_store, self.manager.animal_store)
+        self.assertEqual(self.manager.get_statistics()['games']['total'], stats['games']['total'])
+        self.assertEqual(self.manager.get_statistics()['recent']['1d']['games'], 1)
+        self.play_and_learn("Quokka", "Does it always look like it is smiling?")
+        self.assertEqual(self.manager.database.load_tree().to_dict(include_ids=True),
+                         self.manager.tree.root.to_dict(include_ids=True))
+
+
+class TestMigration(unittest.TestCase):
+    """Test copying the data files into a database"""
+
+    def test_migrate_files_manager(self):
+        """Test tree, history and animals arrive in the database"""
+        data_dir = tempfile.mkdtemp()
+        try:
+            files_manager = GameManager(
+                data_file=os.path.join(data_dir, 'tree_data.snapshot'),
+                history_file=os.path.join(data_dir, 'game_history.jsonl')
+            )
+            files_manager.history_log.append(make_record(datetime(2024, 1, 1)))
+            database = SQLiteDatabase(os.path.join(data_dir, 'pseudoqui.db'))
+            counts = migrate_to_sqlite(database, files_manager.tree.root,
+                                       files_manager.history_log.iter_records(),
+                                       [{'name': 'Dog', 'yes_percentage': 40.0}])
+            self.assertEqual(counts['nodes'], files_manager.tree.root.subtree_nodes)
+            self.assertEqual(counts['sessions'], 1)
+            self.assertEqual(database.load_tree().to_dict(include_ids=True),
+                             files_manager.tree.root.to_dict(include_ids=True))
+            self.assertEqual(database.load_totals().games, 1)
+            self.assertEqual(database.load_animals(), [{'name': 'Dog', 'yes_percentage': 40.0}])
+            with self.assertRaises(ValueError):
+                migrate_to_sqlite(database, files_manager.tree.root, [], [])
+            database.close()
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
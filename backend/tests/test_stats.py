@@ -0,0 +1,105 @@
+"""
+Unit Tests for Rolling Game Statistics
+"""
+
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.stats import RollingWindow, GameStatistics
+from app.game_manager import GameManager
+
+
+class FakeClock:
+    """Manually advanced time source"""
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRollingWindow(unittest.TestCase):
+    """Test ring-buffer windows"""
+
+    def test_games_expire_after_span(self):
+        """Test games leave the window once it moves a full span past them"""
+        window = RollingWindow(60, buckets=6)
+        start = 1_700_000_000.0
+        window.record(start, True, 4)
+        window.record(start + 20, False, 10)
+        self.assertEqual(window.summary(start + 30),
+                         {'games': 2, 'correct_guesses': 1, 'success_rate': 50.0,
+                          'average_questions_per_game': 7.0})
+
+        self.assertEqual(window.summary(start + 65)['games'], 1)
+        self.assertEqual(window.summary(start + 90)['games'], 0)
+        self.assertEqual(window.total_questions, 0)
+
+    def test_long_gap_clears_everything(self):
+        """Test a gap longer than the span empties the ring"""
+        window = RollingWindow(60, buckets=6)
+        window.record(0, True, 3)
+        window.record(10_000, True, 5)
+        self.assertEqual(window.summary(10_000)['games'], 1)
+        self.assertEqual(window.summary(10_000)['average_questions_per_game'], 5.0)
+
+    def test_old_game_is_ignored(self):
+        """Test a game older than the window is not counted"""
+        window = RollingWindow(60, buckets=6)
+        window.record(1000, True, 3)
+        window.record(900, True, 3)
+        self.assertEqual(window.summary(1000)['games'], 1)
+
+
+class TestGameStatistics(unittest.TestCase):
+    """Test the rolling windows of GameManager statistics"""
+
+    def setUp(self):
+        """Create a temporary data directory"""
+        self.data_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the temporary data directory"""
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def manager(self):
+        """Game manager on the temporary directory"""
+        return GameManager(data_file=os.path.join(self.data_dir, 'tree_data.snapshot'),
+                           history_file=os.path.join(self.data_dir, 'game_history.jsonl'))
+
+    def test_windows_by_name(self):
+        """Test each window only sees its own span"""
+        clock = FakeClock()
+        statistics = GameStatistics(clock)
+        statistics.record(True, 3, clock.now - 2 * 3600)
+        statistics.record(False, 5, clock.now - 600)
+        statistics.record(True, 7)
+        summary = statistics.summary()
+        self.assertEqual(summary['5m']['games'], 1)
+        self.assertEqual(summary['1h']['games'], 2)
+        self.assertEqual(summary['1d']['games'], 3)
+        self.assertEqual(summary['1d']['average_questions_per_game'], 5.0)
+
+    def test_recent_games_in_statistics(self):
+        """Test finished games show up in the windows, also after a restart"""
+        manager = self.manager()
+        manager.start_new_game()
+        manager.submit_guess_result(True)
+        manager.end_current_game()
+
+        statistics = manager.get_statistics()
+        self.assertEqual(statistics['games']['total'], 1)
+        self.assertEqual(statistics['recent']['5m']['games'], 1)
+        self.assertEqual(statistics['recent']['1d']['success_rate'], 100.0)
+        self.assertEqual(self.manager().get_statistics()['recent']['1h']['games'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,12 +5,14 @@ Unit Tests for PseudoQui Binary Tree Implementation
 import unittest
 import sys
 import os
+from collections import deque
 
 # Add parent directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from app.node import Node
 from app.tree import BinaryTree
+from app import deep_json
 
 
 class TestNode(unittest.TestCase):
@@ -246,5 +248,443 @@ class TestGameFlow(unittest.TestCase):
         self.assertLessEqual(avg_depth, self.tree.get_tree_height())
 
 
+class TestCachedStatistics(unittest.TestCase):
+    """Test the incrementally maintained tree statistics"""
+    
+    def setUp(self):
+        """Create a fresh tree for each test"""
+        self.tree = BinaryTree()
+    
+    def learn_along(self, answers, animal):
+        """Walk the given answers to a leaf and teach a new animal there"""
+        self.tree.reset_game()
+        for answer in answers:
+            if self.tree.answer_question(answer):
+                break
+        self.tree.game_history = []  # keep the animals database untouched
+        return self.tree.learn_new_animal(animal, f"Is it a {animal}?", True)
+    
+    def test_statistics_follow_learning(self):
+        """Test cached aggregates match a recount after several learns"""
+        for index, answers in enumerate([[True] * 3, [False] * 8, [True, False] * 4, [False] * 9]):
+            self.assertTrue(self.learn_along(answers, f"Animal {index}"))
+            self.tree._verify_statistics()
+        
+        height, nodes, leaves, total_depth = BinaryTree._collect_metrics(self.tree.root)
+        stats = self.tree.get_statistics()
+        self.assertEqual(stats['height'], height)
+        self.assertEqual(stats['total_nodes'], nodes)
+        self.assertEqual(stats['leaf_count'], leaves)
+        self.assertEqual(stats['average_depth'], round(total_depth / leaves, 2))
+    
+    def test_debug_mode_detects_drift(self):
+        """Test debug mode cross-checks the cache against a recount"""
+        self.tree.debug_statistics = True
+        self.tree.get_statistics()
+        
+        # Editing nodes behind the tree's back leaves the cache stale
+        self.tree.root.right_child = Node("Rock", is_leaf=True, parent=self.tree.root)
+        with self.assertRaises(AssertionError):
+            self.tree.get_statistics()
+        
+        self.tree.rebuild_indexes()
+        self.assertEqual(self.tree.get_statistics()['height'], self.tree._calculate_height(self.tree.root))
+
+
+class TestAnimalIndex(unittest.TestCase):
+    """Test the name index of animal leaves"""
+    
+    def setUp(self):
+        """Create a fresh tree for each test"""
+        self.tree = BinaryTree()
+    
+    def test_lookup_is_case_insensitive(self):
+        """Test lookups ignore case and extra spaces"""
+        self.assertTrue(self.tree.has_animal("elephant"))
+        self.assertTrue(self.tree.has_animal("  ELEPHANT "))
+        self.assertFalse(self.tree.has_animal("Unicorn"))
+        self.assertEqual(self.tree.find_animal("whale").data, "Whale")
+        self.assertTrue(self.tree.find_animal("whale").is_leaf)
+        self.assertIsNone(self.tree.find_animal("Unicorn"))
+    
+    def test_learning_updates_index(self):
+        """Test learn_new_animal indexes the new leaves"""
+        for answer in (True, True, True):
+            self.tree.answer_question(answer)
+        old_leaf = self.tree.current_node
+        self.tree.game_history = []  # keep the animals database untouched
+        self.tree.learn_new_animal("Orca", "Is it black and white?", True)
+        
+        self.assertTrue(self.tree.has_animal("orca"))
+        whale = self.tree.find_animal_leaves("Whale")
+        self.assertEqual(len(whale), 1)
+        self.assertIsNot(whale[0], old_leaf)
+        self.assertIs(whale[0].parent, self.tree.current_node)
+        self.assertEqual(len(self.tree.get_all_animals()), self.tree.get_leaf_count())
+        self.tree._verify_statistics()
+    
+    def test_duplicates_are_listed(self):
+        """Test an animal learned twice maps to both leaves"""
+        for answer in (True, True, True):
+            self.tree.answer_question(answer)
+        self.tree.game_history = []
+        self.tree.learn_new_animal("dolphin", "Is it playful?", True)
+        self.assertEqual(len(self.tree.find_animal_leaves("Dolphin")), 2)
+    
+    def test_from_dict_rebuilds_index(self):
+        """Test deserialized trees come with a populated index"""
+        restored = BinaryTree.from_dict(self.tree.to_dict())
+        self.assertEqual(restored.get_all_animals(), self.tree.get_all_animals())
+        self.assertTrue(restored.has_animal("Spider"))
+
+
+class TestPathCodes(unittest.TestCase):
+    """Test the root-to-node path codes"""
+    
+    def setUp(self):
+        """Create a fresh tree for each test"""
+        self.tree = BinaryTree()
+    
+    def test_leaf_codes_resolve_to_their_leaf(self):
+        """Test every leaf's path code leads back to it"""
+        for name in self.tree.get_all_animals():
+            leaf = self.tree.find_animal(name)
+            code, depth = self.tree.get_path_code(leaf)
+            self.assertIs(self.tree.resolve_path_code(code, depth), leaf)
+    
+    def test_decode_matches_game_history(self):
+        """Test decoding gives the questions answered on the way"""
+        for answer in (True, False, True, False, True, True):
+            self.tree.answer_question(answer)
+        node = self.tree.current_node
+        path = self.tree.decode_path_code(node.path_code, node.depth)
+        self.assertEqual(path, [{'question': q, 'answer': 'Yes' if a else 'No'}
+                                for q, a in self.tree.game_history])
+        self.assertEqual(self.tree.get_guess(), "Elephant")
+    
+    def test_codes_survive_learning(self):
+        """Test learning assigns codes to the new nodes"""
+        for answer in (True, True, True):
+            self.tree.answer_question(answer)
+        self.tree.game_history = []  # keep the animals database untouched
+        self.tree.learn_new_animal("Orca", "Is it black and white?", True)
+        
+        orca = self.tree.get_animal_paths("orca")[0]
+        self.assertEqual(orca['depth'], 4)
+        self.assertEqual(orca['path'][-1], {'question': "Is it black and white?", 'answer': 'Yes'})
+        self.assertIs(self.tree.resolve_path_code(int(orca['path_code'], 16), 4),
+                      self.tree.find_animal("Orca"))
+        self.tree._verify_statistics()
+    
+    def test_invalid_codes(self):
+        """Test codes running past a leaf are rejected"""
+        self.assertIsNone(self.tree.resolve_path_code(0b111, 5))
+        with self.assertRaises(ValueError):
+            self.tree.decode_path_code(0b111, 5)
+
+
+class TestTreeDisplay(unittest.TestCase):
+    """Test the line-by-line tree renderer"""
+    
+    def setUp(self):
+        """Create a fresh tree for each test"""
+        self.tree = BinaryTree()
+    
+    def test_lines_match_display(self):
+        """Test the generator yields exactly the lines of display_tree"""
+        self.assertEqual("\n".join(self.tree.iter_display_lines()), self.tree.display_tree())
+    
+    def test_max_depth_collapses_subtrees(self):
+        """Test questions at max_depth get a collapsed marker"""
+        lines = list(self.tree.iter_display_lines(max_depth=1))
+        self.assertEqual(len(lines), 7)
+        self.assertEqual(sum("(collapsed)" in line for line in lines), 2)
+        self.assertNotIn("Whale", "\n".join(lines))
+    
+    def test_start_node_and_paging(self):
+        """Test rendering from a subtree and by line window"""
+        water = self.tree.resolve_path_code(0b1, 1)
+        display = self.tree.display_tree(water)
+        self.assertTrue(display.startswith("❓ Does it live in water?"))
+        self.assertNotIn("Eagle", display)
+        
+        full = self.tree.display_tree().split("\n")
+        self.assertEqual(self.tree.display_tree(offset=5, limit=10).split("\n"), full[5:15])
+
+
+class TestNodeIds(unittest.TestCase):
+    """Test stable node IDs, subtree counts and subtree fetches"""
+    
+    def setUp(self):
+        """Create a fresh tree for each test"""
+        self.tree = BinaryTree()
+    
+    def learn_orca(self):
+        """Replace the Whale guess by a question"""
+        for answer in (True, True, True):
+            self.tree.answer_question(answer)
+        self.tree.game_history = []  # keep the animals database untouched
+        whale_id = self.tree.current_node.node_id
+        self.tree.learn_new_animal("Orca", "Is it black and white?", True)
+        return whale_id
+    
+    def test_ids_are_unique_and_indexed(self):
+        """Test every node gets a distinct ID, root first"""
+        self.assertEqual(self.tree.root.node_id, 0)
+        self.assertEqual(len(self.tree._nodes_by_id), self.tree.get_node_count())
+        self.assertIs(self.tree.find_node(1), self.tree.root.left_child)
+        self.assertIsNone(self.tree.find_node(999))
+    
+    def test_learning_keeps_ids(self):
+        """Test the new question takes the leaf's ID and other IDs do not move"""
+        mammal_id = self.tree.root.left_child.node_id
+        whale_id = self.learn_orca()
+        
+        self.assertEqual(self.tree.find_node(whale_id).data, "Is it black and white?")
+        self.assertEqual(self.tree.root.left_child.node_id, mammal_id)
+        self.assertEqual(self.tree.find_animal("Orca").node_id, 45)
+        self.tree._verify_statistics()
+    
+    def test_ids_survive_serialization(self):
+        """Test IDs are saved with include_ids and restored by from_dict"""
+        self.learn_orca()
+        restored = BinaryTree.from_dict(self.tree.to_dict(include_ids=True))
+        for node_id, node in self.tree._nodes_by_id.items():
+            self.assertEqual(restored.find_node(node_id).data, node.data)
+        self.assertNotIn('id', self.tree.to_dict())
+    
+    def test_subtree_counts_follow_learning(self):
+        """Test subtree counts are updated along the path"""
+        self.learn_orca()
+        root = self.tree.root
+        self.assertEqual(root.subtree_nodes, self.tree.get_node_count())
+        self.assertEqual(root.subtree_leaves, self.tree.get_leaf_count())
+        self.assertEqual(self.tree.find_animal("Orca").parent.subtree_nodes, 3)
+    
+    def test_get_subtree(self):
+        """Test fetching a node with a limited number of levels"""
+        subtree = self.tree.get_subtree(depth=1)
+        self.assertEqual(subtree['node_count'], 45)
+        self.assertEqual(subtree['leaf_count'], 23)
+        self.assertTrue(subtree['left']['collapsed'])
+        self.assertNotIn('left', subtree['left'])
+        
+        water = self.tree.get_subtree(subtree['left']['id'], depth=3)
+        self.assertEqual(water['left']['left']['data'], "Whale")
+        self.assertIsNone(self.tree.get_subtree(999))
+
+
+class TestPersistentVersions(unittest.TestCase):
+    """Test path-copying learning and version history"""
+    
+    def setUp(self):
+        """Create a persistent tree for each test"""
+        self.tree = BinaryTree(persistent=True)
+    
+    def learn(self, answers, animal, question):
+        """Play down to a guess and teach a new animal"""
+        self.tree.reset_game()
+        for answer in answers:
+            if self.tree.answer_question(answer):
+                break
+        self.tree.game_history = []  # keep the animals database untouched
+        return self.tree.learn_new_animal(animal, question, True)
+    
+    def test_old_versions_are_untouched(self):
+        """Test learning copies the path and leaves the old version intact"""
+        old_root = self.tree.root
+        before = self.tree.to_dict()
+        self.assertTrue(self.learn((True, True, True), "Orca", "Is it black and white?"))
+        
+        self.assertEqual(self.tree.version, 1)
+        self.assertIsNot(self.tree.root, old_root)
+        self.assertIs(self.tree.get_version_root(0), old_root)
+        self.assertEqual(old_root.to_dict(), before)
+        # Only the path from the root was copied
+        self.assertIs(self.tree.root.right_child, old_root.right_child)
+        self.assertTrue(self.tree.has_animal("Orca"))
+        self.tree._verify_statistics()
+    
+    def test_diff_between_versions(self):
+        """Test diffs report the replaced leaf"""
+        self.learn((True, True, True), "Orca", "Is it black and white?")
+        self.assertTrue(self.learn((False, True, True, True), "Owl", "Does it hunt at night?"))
+        
+        changes = self.tree.diff_versions(0, 2)
+        self.assertEqual([change['after']['data'] for change in changes],
+                         ["Is it black and white?", "Does it hunt at night?"])
+        self.assertEqual(changes[0]['before'], {'data': "Whale", 'is_leaf': True})
+        self.assertEqual(self.tree.diff_versions(2, 2), [])
+        with self.assertRaises(ValueError):
+            self.tree.diff_versions(0, 9)
+    
+    def test_rollback_is_a_new_version(self):
+        """Test rolling back restores an old tree under a new version number"""
+        before = self.tree.to_dict()
+        self.learn((True, True, True), "Orca", "Is it black and white?")
+        
+        self.assertEqual(self.tree.rollback(0), 2)
+        self.assertEqual(self.tree.to_dict(), before)
+        self.assertFalse(self.tree.has_animal("Orca"))
+        self.assertEqual(self.tree.list_versions(), [0, 1, 2])
+        self.tree._verify_statistics()
+    
+    def test_changes_since_replay_onto_old_copy(self):
+        """Test applying the change log to an old copy yields the current tree"""
+        copy = self.tree.root.to_dict(include_ids=True)
+        self.learn((True, True, True), "Orca", "Is it black and white?")
+        self.learn((False, True, True, True), "Owl", "Does it hunt at night?")
+        self.learn((True, True, True, True), "Narwhal", "Does it have a tusk?")
+        
+        changes = self.tree.changes_since(0)
+        self.assertEqual([change['version'] for change in changes], [1, 2, 3])
+        for change in changes:
+            node, depth, code = copy, change['depth'], int(change['path_code'], 16)
+            parents = []
+            for level in range(depth):
+                parents.append((node, 'left' if code >> level & 1 else 'right'))
+                node = node[parents[-1][1]]
+            self.assertTrue(node['is_leaf'])
+            replacement = {
+                'data': change['question'], 'is_leaf': False, 'id': change['node_id'],
+                'left': {'data': change['yes']['data'], 'is_leaf': True, 'left': None, 'right': None,
+                         'id': change['yes']['node_id']},
+                'right': {'data': change['no']['data'], 'is_leaf': True, 'left': None, 'right': None,
+                          'id': change['no']['node_id']}
+            }
+            if parents:
+                parents[-1][0][parents[-1][1]] = replacement
+            else:
+                copy = replacement
+        self.assertEqual(copy, self.tree.to_dict(include_ids=True))
+        
+        self.assertEqual([change['version'] for change in self.tree.changes_since(2)], [3])
+        self.assertEqual(self.tree.changes_since(3), [])
+        self.assertIsNone(self.tree.changes_since(4))
+    
+    def test_changes_since_requires_resync(self):
+        """Test a rollback or a version older than the log asks for the whole tree"""
+        self.tree._changes = deque(maxlen=2)
+        for number in range(3):
+            self.assertTrue(self.learn((True, True, True) + (True,) * number,
+                                       f"Whale {number}", f"Is it whale number {number}?"))
+        self.assertIsNone(self.tree.changes_since(0))
+        self.assertEqual(len(self.tree.changes_since(1)), 2)
+        
+        self.tree.rollback(1)
+        self.assertIsNone(self.tree.changes_since(2))
+        self.assertEqual(self.tree.changes_since(4), [])
+        self.assertNotEqual(BinaryTree().epoch, self.tree.epoch)
+        self.assertEqual(self.tree.head(), (4, self.tree.root))
+    
+    def test_old_versions_are_dropped(self):
+        """Test only the last change_log_size roots are kept, and head() stays consistent"""
+        self.tree.change_log_size = 3
+        for number in range(10):
+            self.assertTrue(self.learn((True, True, True) + (True,) * number,
+                                       f"Whale {number}", f"Is it whale number {number}?"))
+        self.assertEqual(self.tree.list_versions(), [8, 9, 10])
+        self.assertEqual(self.tree.head(), (10, self.tree.root))
+        self.assertIsNone(self.tree.get_version_root(7))
+        with self.assertRaises(ValueError):
+            self.tree.rollback(7)
+        with self.assertRaises(ValueError):
+            self.tree.diff_versions(7, 10)
+        self.assertEqual(len(self.tree.diff_versions(9, 10)), 1)
+    
+    def test_stale_guess_is_rejected(self):
+        """Test learning at a leaf already replaced in a newer version fails"""
+        self.tree.answer_question(True)
+        self.tree.answer_question(True)
+        self.tree.answer_question(True)
+        stale_leaf = self.tree.current_node
+        self.learn((True, True, True), "Orca", "Is it black and white?")
+        
+        self.tree.current_node = stale_leaf
+        self.assertFalse(self.tree.learn_new_animal("Narwhal", "Does it have a tusk?", True))
+        self.assertEqual(self.tree.version, 1)
+    
+    def test_in_place_mode_keeps_only_current(self):
+        """Test non-persistent trees do not keep edited versions"""
+        tree = BinaryTree()
+        for answer in (True, True, True):
+            tree.answer_question(answer)
+        tree.game_history = []
+        tree.learn_new_animal("Orca", "Is it black and white?", True)
+        self.assertEqual(tree.list_versions(), [1])
+
+
+def build_chain(depth):
+    """Build a tree that grows down the "Yes" side for the given number of questions"""
+    root = Node("Question 0?", is_leaf=False)
+    node = root
+    for level in range(1, depth + 1):
+        node.right_child = Node(f"Animal {level}", is_leaf=True, parent=node)
+        if level == depth:
+            node.left_child = Node("Last animal", is_leaf=True, parent=node)
+        else:
+            node.left_child = Node(f"Question {level}?", is_leaf=False, parent=node)
+            node = node.left_child
+    return root
+
+
+class TestDeepTrees(unittest.TestCase):
+    """Test whole-tree operations beyond Python's recursion limit"""
+    
+    DEPTH = 100000
+    
+    @classmethod
+    def setUpClass(cls):
+        """Build one 100k-deep chain shared by the tests"""
+        cls.tree = BinaryTree(build_chain(cls.DEPTH))
+    
+    def test_statistics_on_deep_chain(self):
+        """Test statistics walk the chain without recursion"""
+        stats = self.tree.get_statistics()
+        self.assertEqual(stats['height'], self.DEPTH)
+        self.assertEqual(stats['total_nodes'], 2 * self.DEPTH + 1)
+        self.assertEqual(stats['leaf_count'], self.DEPTH + 1)
+        self.assertEqual(self.tree.get_tree_height(), self.DEPTH)
+        self.assertEqual(self.tree.get_node_count(), 2 * self.DEPTH + 1)
+        self.assertEqual(self.tree.get_leaf_count(), self.DEPTH + 1)
+        self.assertEqual(len(self.tree.get_all_animals()), self.DEPTH + 1)
+        self.assertEqual(self.tree.get_all_animals()[0], "Last animal")
+    
+    def test_serialization_round_trip(self):
+        """Test to_dict/from_dict and JSON encoding of a deep chain"""
+        text = deep_json.dumps(self.tree.to_dict())
+        restored = BinaryTree.from_dict(deep_json.loads(text))
+        self.assertEqual(restored.get_node_count(), 2 * self.DEPTH + 1)
+        self.assertEqual(restored.get_tree_height(), self.DEPTH)
+    
+    def test_display_beyond_recursion_limit(self):
+        """Test display of a chain deeper than the default recursion limit"""
+        depth = sys.getrecursionlimit() + 200
+        display = BinaryTree(build_chain(depth)).display_tree()
+        self.assertEqual(display.count("🐾"), depth + 1)
+    
+    def test_subtree_of_deep_chain(self):
+        """Test a subtree fetch near the root reports the size of the whole chain"""
+        subtree = self.tree.get_subtree(depth=1)
+        self.assertEqual(subtree['node_count'], 2 * self.DEPTH + 1)
+        self.assertEqual(subtree['left']['leaf_count'], self.DEPTH)
+        self.assertTrue(subtree['left']['collapsed'])
+    
+    def test_display_window_is_lazy(self):
+        """Test a depth-limited window of the deep chain renders without the rest"""
+        display = self.tree.display_tree(max_depth=3, limit=5)
+        self.assertEqual(len(display.split("\n")), 5)
+        self.assertTrue(display.startswith("❓ Question 0?"))
+    
+    def test_learning_at_the_bottom(self):
+        """Test learning under the deepest leaf of a deep chain"""
+        tree = BinaryTree(build_chain(2000))
+        while not tree.answer_question(True):
+            pass
+        tree.game_history = []  # keep the animals database untouched
+        self.assertTrue(tree.learn_new_animal("Newt", "Is it an amphibian?", True))
+        self.assertEqual(tree.get_tree_height(), 2001)
+
+
 if __name__ == '__main__':
     unittest.main()
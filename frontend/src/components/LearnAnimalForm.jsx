@@ -1,7 +1,9 @@
 import React, { useState } from 'react';
 import '../styles/styles.css';
+import { useGameStore } from '../hooks/useGameStore';
 
 export const LearnAnimalForm = ({ onLearned, wrongGuess }) => {
+  const { sessionId } = useGameStore();
   const [animalName, setAnimalName] = useState('');
   const [question, setQuestion] = useState('');
   const [answer, setAnswer] = useState('yes');
@@ -31,6 +33,7 @@ export const LearnAnimalForm = ({ onLearned, wrongGuess }) => {
           'Content-Type': 'application/json',
         },
         body: JSON.stringify({
+          session_id: sessionId,
           new_animal: animalName.trim(),
           question: question.trim(),
           answer_for_new: answer,
@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import '../styles/styles.css';
+import { useGameStore } from '../hooks/useGameStore';
 
 export const ResultsScreen = ({ 
   guess, 
@@ -12,11 +13,12 @@ export const ResultsScreen = ({
   const [showTree, setShowTree] = useState(false);
   const [treeDisplay, setTreeDisplay] = useState('');
   const [saveStatus, setSaveStatus] = useState(null);
+  const { sessionId } = useGameStore();
 
   useEffect(() => {
     const fetchTreePath = async () => {
       try {
-        const response = await fetch('http://localhost:5000/api/tree/path');
+        const response = await fetch(`http://localhost:5000/api/tree/path?session_id=${sessionId}`);
         const data = await response.json();
         if (data.path) {
           let treeStructure = 'Decision Tree Path (Your Journey):\n\n';
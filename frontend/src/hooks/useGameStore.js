@@ -5,12 +5,18 @@ const API_BASE = process.env.REACT_APP_API_URL || 'http://localhost:5000/api';
 
 export const useGameStore = create((set, get) => ({
   // State
+  sessionId: null,
   gameStarted: false,
   currentQuestion: '',
   questionsAsked: 0,
   reachedGuess: false,
   currentGuess: '',
   gameHistory: [],
+  // Tree bundle from /api/tree/bundle: answers are walked locally and sent
+  // to the server in one /game/answers request once a guess is reached
+  bundle: null,
+  currentNode: null,
+  pendingAnswers: '',
   statistics: null,
   allAnimals: [],
   loading: false,
@@ -20,13 +26,19 @@ export const useGameStore = create((set, get) => ({
   startGame: async () => {
     set({ loading: true, error: null });
     try {
-      const response = await axios.post(`${API_BASE}/game/start`);
+      const response = await axios.post(`${API_BASE}/game/start`, {
+        session_id: get().sessionId,
+      });
       if (response.data.success) {
+        const bundle = await get().fetchBundle(response.data.bundle_version);
         set({
+          sessionId: response.data.session_id,
           gameStarted: true,
           currentQuestion: response.data.question,
           questionsAsked: 0,
           reachedGuess: false,
+          currentNode: bundle ? bundle.root : null,
+          pendingAnswers: '',
         });
       }
     } catch (error) {
@@ -36,10 +48,63 @@ export const useGameStore = create((set, get) => ({
     }
   },
 
+  fetchBundle: async (version) => {
+    const { bundle } = get();
+    if (bundle && bundle.version === version) {
+      return bundle;
+    }
+    try {
+      const response = await axios.get(`${API_BASE}/tree/bundle`, {
+        params: bundle ? { have: bundle.version } : {},
+      });
+      if (response.data.success && !response.data.unchanged) {
+        set({ bundle: response.data });
+      }
+      return get().bundle;
+    } catch (error) {
+      // Play with one request per answer instead
+      set({ bundle: null });
+      return null;
+    }
+  },
+
   answerQuestion: async (answer) => {
+    const { bundle, currentNode, pendingAnswers } = get();
+    if (!bundle || currentNode === null) {
+      await get().sendAnswers('answer', { answer });
+      return;
+    }
+
+    const next = bundle.nodes[currentNode * 3 + (answer === 'yes' ? 1 : 2)];
+    const answers = pendingAnswers + (answer === 'yes' ? 'y' : 'n');
+    const isGuess = next !== -1
+      && bundle.nodes[next * 3 + 1] === -1 && bundle.nodes[next * 3 + 2] === -1;
+    if (next !== -1 && !isGuess) {
+      set({
+        currentNode: next,
+        pendingAnswers: answers,
+        questionsAsked: answers.length,
+        currentQuestion: bundle.strings[bundle.nodes[next * 3]],
+      });
+      return;
+    }
+
+    // Reached a guess: the server replays every answer of the game at once
+    const guess = next !== -1 ? bundle.strings[bundle.nodes[next * 3]] : null;
+    set({ currentNode: null, pendingAnswers: '' });
+    const data = await get().sendAnswers('answers', { answers });
+    if (data && (!data.reached_guess || data.guess !== guess)) {
+      set({ bundle: null }); // The tree changed since the bundle was fetched
+    }
+  },
+
+  sendAnswers: async (endpoint, body) => {
     set({ loading: true, error: null });
     try {
-      const response = await axios.post(`${API_BASE}/game/answer`, { answer });
+      const response = await axios.post(`${API_BASE}/game/${endpoint}`, {
+        session_id: get().sessionId,
+        ...body,
+      });
       if (response.data.success) {
         const newState = {
           questionsAsked: response.data.questions_asked,
@@ -52,8 +117,10 @@ export const useGameStore = create((set, get) => ({
         }
         set(newState);
       }
+      return response.data;
     } catch (error) {
       set({ error: error.message });
+      return null;
     } finally {
       set({ loading: false });
     }
@@ -63,6 +130,7 @@ export const useGameStore = create((set, get) => ({
     set({ loading: true, error: null });
     try {
       const response = await axios.post(`${API_BASE}/game/guess-result`, {
+        session_id: get().sessionId,
         was_correct: wasCorrect,
         actual_animal: actualAnimal,
       });
@@ -80,6 +148,7 @@ export const useGameStore = create((set, get) => ({
     set({ loading: true, error: null });
     try {
       const response = await axios.post(`${API_BASE}/game/learn`, {
+        session_id: get().sessionId,
         new_animal: newAnimal,
         question: question,
         answer_for_new: answerForNew,
@@ -99,7 +168,9 @@ export const useGameStore = create((set, get) => ({
   endGame: async () => {
     set({ loading: true, error: null });
     try {
-      const response = await axios.post(`${API_BASE}/game/end`);
+      const response = await axios.post(`${API_BASE}/game/end`, {
+        session_id: get().sessionId,
+      });
       if (response.data.success) {
         set({ gameStarted: false });
       }
@@ -134,6 +205,8 @@ export const useGameStore = create((set, get) => ({
 
   reset: () => set({
     gameStarted: false,
+    currentNode: null,
+    pendingAnswers: '',
     currentQuestion: '',
     questionsAsked: 0,
     reachedGuess: false,